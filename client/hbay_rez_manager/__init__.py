@@ -1,10 +1,20 @@
 from .version import __version__
 
-from .addon import (
-    RezManagerAddon,
-)
-
 __all__ = (
     "__version__",
     "RezManagerAddon",
 )
+
+
+def __getattr__(name):
+    # The addon needs ayon_core and Qt, the headless entry points
+    # (`install`, `mirror`) import this package without them
+    if name == "RezManagerAddon":
+        from .addon import RezManagerAddon
+
+        return RezManagerAddon
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
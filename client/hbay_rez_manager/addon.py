@@ -1,14 +1,15 @@
-import json
 import os
 import platform
 import subprocess
+import threading
 from ayon_core.addon import AYONAddon, ITrayAddon
-from platformdirs import user_data_dir
 
 from qtpy import QtCore, QtWidgets, QtGui
 
 from .version import __version__
-from .qt_helper import ProgressBarDialog, ProgressSignalWrapper
+from .launch_stats import get_launch_stats, get_stats_path
+from .lib import get_rez_root, get_studio_code
+from .qt_helper import LaunchStatsDialog, ProgressBarDialog, ProgressSignalWrapper
 from .rez_config_helper import manage_rez_config_from_settings
 
 ADDON_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -23,16 +24,30 @@ class RezManagerAddon(AYONAddon, ITrayAddon):
         self.rez_install_settings = self.rez_settings.get("rez_install_options",
                                                           {})
         self.log.debug(f"Initialized with settings: {self.rez_settings}")
-        self.studio_code = settings.get("core", {}).get("studio_code",
-                                                        "ayon-rez")
+        self.studio_code = get_studio_code(settings)
         self.log.debug(f"Studio code: {self.studio_code}")
+        self.rez_root = get_rez_root(self.studio_code)
+        self.applications_settings = settings.get("applications", {})
+        self._launch_stats_dialog = None
+        self._settings_watcher = None
+        self._package_index_thread = None
+        self._payload_cache_thread = None
+        self._background_stop = threading.Event()
+        # Rez bin folder this tray put on PATH
+        self._rez_path_folder = None
         # Todo: add a progress bar or a spinner during install
 
     def tray_exit(self) -> None:
-        pass
+        if self._settings_watcher:
+            self._settings_watcher.stop()
+        self._background_stop.set()
 
     def tray_menu(self, tray_menu) -> None:
-        """Add Rez applications to the tray menu."""
+        """Add Rez applications and launch stats to the tray menu."""
+        stats_action = QtWidgets.QAction("Rez Launch Stats", tray_menu)
+        stats_action.triggered.connect(self._show_launch_stats)
+        tray_menu.addAction(stats_action)
+
         rez_apps = self.rez_settings.get("rez_standalone_apps", [])
         if not rez_apps:
             return
@@ -72,6 +87,12 @@ class RezManagerAddon(AYONAddon, ITrayAddon):
 
         tray_menu.addMenu(rez_menu)
 
+    def _show_launch_stats(self):
+        """Show p50/p95 timings of the rez launch hooks."""
+        rows = get_launch_stats(get_stats_path(self.rez_root))
+        self._launch_stats_dialog = LaunchStatsDialog(rows)
+        self._launch_stats_dialog.show()
+
     def _execute_command(self, command):
         """Executes a command the logging output is logged back into the main log"""
         self.log.info("Executing command: %s", command)
@@ -104,7 +125,6 @@ class RezManagerAddon(AYONAddon, ITrayAddon):
                 if stderr:
                     self.log.debug(f"STDERR:\n{stderr}")
 
-            import threading
             threading.Thread(target=log_output, daemon=True).start()
 
         except Exception as e:
@@ -114,29 +134,30 @@ class RezManagerAddon(AYONAddon, ITrayAddon):
         pass
 
     def tray_start(self) -> None:
-        # we dont want to import this at root level as it is ment for tray only
-        from . import rez_installer
-        path = user_data_dir(appname="rez", appauthor=self.studio_code)
-
-        # Check if Rez is installed, if not, install it
-        installer = rez_installer.RezInstaller(path,
-                                               self.rez_install_settings.get(
-                                                   "rez_version"),
-                                               self.rez_install_settings.get(
-                                                   "rez_python_version"),
-                                               self.rez_install_settings.get(
-                                                   "graphviz_version"),
-                                               json.loads(
-                                                   self.rez_install_settings.get(
-                                                       "additional_dependencies_pip")),
-                                               astral_python_tag=self.rez_install_settings.get("astral_python_tag"),
-                                               logger=self.log)
+        installer = self._get_installer()
         if not installer.check_if_installed():
             # quick check if all versions already line up
             # if not, we go ahead and install
             # individual versions might be skipped
+            from .install_engine import AsyncInstallEngine
+
+            # Wheels download while python and rez install, separate
+            # installer as the prefetch state is per instance. Needs an
+            # installed bundle python, the engine prefetches with the new
+            # one right after the python phase otherwise
+            threading.Thread(
+                target=self._get_installer().prefetch_wheels,
+                name="rez-wheel-prefetch",
+                daemon=True,
+            ).start()
+
+            engine = AsyncInstallEngine(
+                installer,
+                timeout=self.rez_install_settings.get(
+                    "install_phase_timeout", 30.0) * 60,
+            )
             progress_signal_wrapper_rez_installer = ProgressSignalWrapper(
-                installer)
+                engine)
 
             rez_installer_thread = QtCore.QThread()
             progress_signal_wrapper_rez_installer.moveToThread(
@@ -150,21 +171,211 @@ class RezManagerAddon(AYONAddon, ITrayAddon):
             dialog.exec_()
             rez_installer_thread.quit()
             rez_installer_thread.wait()
+            if dialog.error:
+                # The previous bundle, if any, is still active
+                self.log.warning(f"Rez install stopped: {dialog.error}")
 
         else:
             self.log.info("Rez already installed.")
 
+        self._activate_rez(installer)
+        self._apply_rez_config()
+        self._start_package_index()
+        self._start_payload_cache()
+
+        launch_options = self.rez_settings.get("rez_launch_options", {})
+        if (
+            launch_options.get("resolve_cache_enabled", True)
+            and launch_options.get("pre_resolve_on_tray_start", True)
+        ):
+            threading.Thread(
+                target=self._pre_resolve,
+                args=(launch_options,),
+                daemon=True,
+            ).start()
+
+        interval = self.rez_install_settings.get("settings_check_interval", 60)
+        if interval:
+            from .settings_watcher import SettingsWatcher
+
+            self._settings_watcher = SettingsWatcher(
+                self.name, self.version, self.rez_settings,
+                self._on_settings_changed, interval=interval, logger=self.log,
+            )
+            self._settings_watcher.start()
+
+    def _get_installer(self):
+        # we dont want to import this at root level as it is ment for tray only
+        from .rez_installer import RezInstaller
+        from .shared_install import get_shared_install_root
+
+        shared_root = get_shared_install_root(self.rez_install_settings)
+        return RezInstaller.from_settings(
+            shared_root or self.rez_root, self.rez_install_settings,
+            logger=self.log, shared=bool(shared_root))
+
+    def _activate_rez(self, installer) -> None:
+        """Put the installer's rez on PATH instead of the previous one."""
+        from .shared_install import sync_local_overlay
+
+        rez_path_folder = installer.rez_path_folder
+        if installer.shared and self.rez_install_settings.get(
+                "shared_install_local_overlay"):
+            rez_path_folder = sync_local_overlay(
+                installer, os.path.join(self.rez_root, "overlay"), self.log)
+
         # actual bootstrap of rez add the local folder to PATH
-        self.append_to_path(installer.rez_path_folder)
+        if self._rez_path_folder and self._rez_path_folder != rez_path_folder:
+            self.remove_from_path(self._rez_path_folder)
+        self._rez_path_folder = rez_path_folder
+        self.append_to_path(rez_path_folder)
         self.log.info(
-            f"using Rez {installer.rez_path_folder}, adding to PATH."
+            f"using Rez {rez_path_folder}, adding to PATH."
         )
-        # manage rez config
-        rez_config_path = manage_rez_config_from_settings(self.rez_settings.get("rez_config_options", {}))
+
+    def _apply_rez_config(self) -> None:
+        rez_config_path = manage_rez_config_from_settings(
+            self.rez_settings.get("rez_config_options", {}), self.rez_root)
         if rez_config_path:
             self.log.info(f"Rez Config: {rez_config_path}")
             os.environ["REZ_CONFIG_FILE"] = rez_config_path
 
+    def _on_settings_changed(self, rez_settings, changes):
+        """Apply changed settings, called from the settings watcher thread.
+
+        Only the changed parts are applied, a rez config change rewrites
+        the config and a changed install runs in the background, the
+        running rez stays on PATH until the new bundle is active. A failed
+        install raises, the watcher calls this again on its next check.
+        """
+        self.rez_settings = rez_settings
+        self.rez_install_settings = rez_settings.get("rez_install_options", {})
+        if "rez_config_options" in changes:
+            self._apply_rez_config()
+            self._start_package_index()
+            self._start_payload_cache()
+
+        if "rez_install_options" not in changes:
+            return
+        installer = self._get_installer()
+        if not installer.check_if_installed():
+            from .install_engine import AsyncInstallEngine
+
+            self.log.info("Updating rez in the background: %s", changes)
+            AsyncInstallEngine(
+                installer,
+                timeout=self.rez_install_settings.get(
+                    "install_phase_timeout", 30.0) * 60,
+            ).run()
+        self._activate_rez(installer)
+
+    def _start_package_index(self) -> None:
+        """Refresh the package index in the background if enabled."""
+        config_options = self.rez_settings.get("rez_config_options", {})
+        if not config_options.get("package_index_enabled", False):
+            return
+        if self._package_index_thread and self._package_index_thread.is_alive():
+            return
+        self._background_stop.clear()
+        self._package_index_thread = threading.Thread(
+            target=self._refresh_package_index,
+            name="rez-package-index",
+            daemon=True,
+        )
+        self._package_index_thread.start()
+
+    def _refresh_package_index(self) -> None:
+        """Refresh the index every interval until disabled or tray exit.
+
+        The first refresh also checks the package files of unchanged
+        families, which picks up files edited in place.
+        """
+        from .package_index import (
+            get_index_locations,
+            get_index_root,
+            refresh_package_indexes,
+        )
+
+        verify_files = True
+        while True:
+            config_options = self.rez_settings.get("rez_config_options", {})
+            if not config_options.get("package_index_enabled", False):
+                return
+            config_path = os.environ.get("REZ_CONFIG_FILE", "")
+            try:
+                refresh_package_indexes(
+                    get_index_locations(config_path) if config_path else [],
+                    get_index_root(self.rez_root),
+                    verify_files=verify_files,
+                    logger=self.log,
+                )
+                verify_files = False
+            except Exception:
+                self.log.warning("Package index refresh failed",
+                                 exc_info=True)
+            interval = config_options.get("package_index_interval", 300)
+            if not interval or self._background_stop.wait(interval):
+                return
+
+    def _start_payload_cache(self) -> None:
+        """Sync the package payload cache in the background if enabled."""
+        config_options = self.rez_settings.get("rez_config_options", {})
+        if not config_options.get("package_cache_enabled", False):
+            return
+        if self._payload_cache_thread and self._payload_cache_thread.is_alive():
+            return
+        self._background_stop.clear()
+        self._payload_cache_thread = threading.Thread(
+            target=self._sync_payload_cache,
+            name="rez-payload-cache",
+            daemon=True,
+        )
+        self._payload_cache_thread.start()
+
+    def _sync_payload_cache(self) -> None:
+        """Sync every `SYNC_INTERVAL` until disabled or tray exit."""
+        from .payload_cache import (
+            SYNC_INTERVAL,
+            get_payload_cache_root,
+            sync_payload_cache,
+        )
+
+        while True:
+            config_options = self.rez_settings.get("rez_config_options", {})
+            if not config_options.get("package_cache_enabled", False):
+                return
+            try:
+                sync_payload_cache(
+                    get_payload_cache_root(self.rez_root),
+                    config_options.get("package_cache_max_size", 20.0),
+                    config_options.get("package_cache_min_launches", 3),
+                    logger=self.log,
+                )
+            except Exception:
+                self.log.warning("Package payload cache sync failed",
+                                 exc_info=True)
+            if self._background_stop.wait(SYNC_INTERVAL):
+                return
+
+    def _pre_resolve(self, launch_options):
+        """Fill the resolve cache with all application rez requests."""
+        from .pre_resolve import collect_rez_requests, pre_resolve_requests
+
+        requests = collect_rez_requests(self.applications_settings)
+        if not requests:
+            return
+        try:
+            pre_resolve_requests(
+                requests,
+                self.rez_root,
+                launch_options.get("resolve_cache_ttl", 12.0),
+                workers=launch_options.get("pre_resolve_workers", 4),
+                logger=self.log,
+            )
+        except Exception:
+            self.log.warning("Pre-resolve of rez requests failed",
+                             exc_info=True)
+
     def get_launch_hook_paths(self, app):
         return [
             os.path.join(ADDON_ROOT, "hooks")
@@ -176,3 +387,10 @@ class RezManagerAddon(AYONAddon, ITrayAddon):
         if new_path not in paths:
             paths.append(new_path)
             os.environ["PATH"] = os.pathsep.join(paths)
+
+    @staticmethod
+    def remove_from_path(old_path: str):
+        paths = os.environ.get("PATH", "").split(os.pathsep)
+        if old_path in paths:
+            paths = [path for path in paths if path != old_path]
+            os.environ["PATH"] = os.pathsep.join(paths)
@@ -0,0 +1,270 @@
+"""Per-file manifests of rez bundles and seeding a new bundle from an old one.
+
+Every bundle (`source/rez/<python>-<rez>`) gets `bundle_files.json` with
+size, mtime and sha256 of each file. When a new bundle is installed, the
+distributions of a previous bundle of the same python that the requested
+pip dependencies need are hardlinked (or copied) over before pip runs,
+including their transitive dependencies. pip then finds them satisfied
+and doesn't download or unpack them. A requested dependency is only taken
+over if it is pinned to the version of the previous bundle, unpinned
+ones are left to pip.
+
+Files are only taken over if their hash still matches both the previous
+bundle manifest and the wheel `RECORD`. Files outside site-packages, like
+console scripts, are copied with the bundle path rewritten.
+"""
+from __future__ import annotations
+import base64
+import csv
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+
+from .dedup_store import link_or_copy
+from .mirror import get_file_sha256
+
+BUNDLE_MANIFEST_NAME = "bundle_files.json"
+
+# Launchers are small, skip anything bigger when rewriting paths
+MAX_RELOCATE_FILE_SIZE = 4 * 1024 * 1024
+
+log = logging.getLogger(__name__)
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def relocate_file(path: str, old: bytes, new: bytes) -> bool:
+    """Replace an absolute path in a small file, e.g. a script shebang."""
+    try:
+        if os.path.getsize(path) > MAX_RELOCATE_FILE_SIZE:
+            return False
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return False
+    if old not in data:
+        return False
+    # Replace instead of writing in place, the file might be a hardlink
+    temp_path = f"{path}.relocate-{os.getpid()}"
+    with open(temp_path, "wb") as f:
+        f.write(data.replace(old, new))
+    shutil.copymode(path, temp_path)
+    os.replace(temp_path, path)
+    return True
+
+
+def load_bundle_manifest(bundle_folder: str) -> dict | None:
+    try:
+        with open(os.path.join(bundle_folder, BUNDLE_MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_bundle_manifest(bundle_folder: str) -> dict:
+    """Hash all files of a bundle, unchanged files of the last run are reused.
+
+    Returns:
+        dict: Relative posix path to `[size, mtime_ns, sha256]`.
+    """
+    previous = (load_bundle_manifest(bundle_folder) or {}).get("files", {})
+    files = {}
+    for root, dirs, names in os.walk(bundle_folder):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                continue
+            relpath = os.path.relpath(path, bundle_folder).replace("\\", "/")
+            if relpath == BUNDLE_MANIFEST_NAME:
+                continue
+            stat = os.stat(path)
+            entry = previous.get(relpath)
+            if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                files[relpath] = entry
+            else:
+                files[relpath] = [
+                    stat.st_size, stat.st_mtime_ns, get_file_sha256(path)]
+
+    manifest_path = os.path.join(bundle_folder, BUNDLE_MANIFEST_NAME)
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump({"files": files}, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return files
+
+
+def find_previous_bundle(bundle_folder: str, python_version: str) -> str | None:
+    """Newest other bundle of the same python that has a manifest."""
+    bundle_folder = os.path.normpath(bundle_folder)
+    candidates = []
+    for folder in glob.glob(os.path.join(
+            os.path.dirname(bundle_folder), f"{python_version}-*")):
+        folder = os.path.normpath(folder)
+        manifest_path = os.path.join(folder, BUNDLE_MANIFEST_NAME)
+        if folder != bundle_folder and os.path.exists(manifest_path):
+            candidates.append((os.path.getmtime(manifest_path), folder))
+    return max(candidates)[1] if candidates else None
+
+
+def _get_site_packages(bundle_folder: str) -> str | None:
+    for pattern in (
+        os.path.join("lib", "python*", "site-packages"),
+        os.path.join("Lib", "site-packages"),
+    ):
+        found = glob.glob(os.path.join(bundle_folder, pattern))
+        if found:
+            return found[0]
+    return None
+
+
+def _get_requirement_name(requirement: str) -> str:
+    match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", requirement)
+    return _normalize_name(match.group(1)) if match else ""
+
+
+def _get_requirements(requirements: list[str]) -> dict[str, str | None]:
+    """Requested names with their pinned version, None if not pinned."""
+    requested = {}
+    for requirement in requirements:
+        name = _get_requirement_name(requirement)
+        if not name:
+            continue
+        _, sep, version = requirement.partition("==")
+        version = version.split(";")[0].strip()
+        requested[name] = version if sep and version else None
+    return requested
+
+
+def _read_requires(dist_info: str) -> list[str]:
+    """Names of the dependencies, without the ones of extras."""
+    names = []
+    try:
+        with open(os.path.join(dist_info, "METADATA"), encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    # End of the headers
+                    break
+                key, _, value = line.partition(":")
+                if key != "Requires-Dist" or "extra ==" in value:
+                    continue
+                names.append(_get_requirement_name(value))
+    except OSError:
+        pass
+    return [name for name in names if name]
+
+
+def _get_needed_distributions(
+    previous_site: str, requested: dict[str, str | None]
+) -> dict[str, str]:
+    """dist-info folders of the requested names and their dependencies.
+
+    Requested names are only included when they are pinned to the version
+    installed in the previous bundle.
+    """
+    dist_infos = {}
+    for dist_info in glob.glob(os.path.join(previous_site, "*.dist-info")):
+        name, _, version = os.path.basename(dist_info)[:-10].partition("-")
+        dist_infos[_normalize_name(name)] = (version, dist_info)
+
+    needed = {}
+    pending = list(requested)
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in dist_infos:
+            continue
+        seen.add(name)
+        version, dist_info = dist_infos[name]
+        if name not in requested or requested[name] == version:
+            needed[name] = dist_info
+        pending.extend(_read_requires(dist_info))
+    return needed
+
+
+def _read_record(dist_info: str) -> list[tuple[str, str]]:
+    """Paths relative to site-packages with their sha256 hex digest."""
+    entries = []
+    with open(os.path.join(dist_info, "RECORD"), newline="") as f:
+        for row in csv.reader(f):
+            if not row or not row[0]:
+                continue
+            digest = row[1] if len(row) > 1 else ""
+            if digest.startswith("sha256="):
+                digest = base64.urlsafe_b64decode(digest[7:] + "==").hex()
+            entries.append((row[0], digest))
+    return entries
+
+
+def seed_from_previous_bundle(
+    previous_folder: str,
+    bundle_folder: str,
+    requirements: list[str],
+    logger: logging.Logger = None,
+) -> dict:
+    """Take over needed distributions which are unchanged in the old bundle.
+
+    See `_get_needed_distributions` for which distributions are needed.
+
+    Returns:
+        dict: Statistics, `distributions`, `linked`, `copied` and `bytes`.
+    """
+    logger = logger or log
+    stats = {"distributions": 0, "linked": 0, "copied": 0, "bytes": 0}
+    manifest = load_bundle_manifest(previous_folder)
+    previous_site = _get_site_packages(previous_folder)
+    site = _get_site_packages(bundle_folder)
+    requested = _get_requirements(requirements)
+    if not manifest or not previous_site or not site or not requested:
+        return stats
+
+    files = manifest["files"]
+    old_root = os.path.normpath(previous_folder).encode("utf-8")
+    new_root = os.path.normpath(bundle_folder).encode("utf-8")
+    needed = _get_needed_distributions(previous_site, requested)
+    for dist_info in sorted(needed.values()):
+        name = os.path.basename(dist_info)[:-10].partition("-")[0]
+        if glob.glob(os.path.join(site, f"{name}-*.dist-info")):
+            continue
+
+        # Only take over the distribution if no file changed since install
+        plan = []
+        for relpath, digest in _read_record(dist_info):
+            source = os.path.normpath(os.path.join(previous_site, relpath))
+            manifest_key = os.path.relpath(
+                source, previous_folder).replace("\\", "/")
+            entry = files.get(manifest_key)
+            if entry is None or (digest and entry[2] != digest):
+                if relpath.endswith(".pyc") or "__pycache__" in relpath:
+                    continue
+                plan = None
+                break
+            plan.append((source, os.path.normpath(os.path.join(site, relpath)),
+                         entry[0]))
+        if not plan:
+            logger.debug("Not seeding %s, files changed", dist_info)
+            continue
+
+        site_root = os.path.normpath(previous_site)
+        for source, destination, size in plan:
+            if os.path.exists(destination):
+                continue
+            if os.path.commonpath([source, site_root]) == site_root:
+                linked = link_or_copy(source, destination)
+            else:
+                # Console scripts point to the python of the old bundle
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(source, destination)
+                relocate_file(destination, old_root, new_root)
+                linked = False
+            stats["linked" if linked else "copied"] += 1
+            stats["bytes"] += size
+        stats["distributions"] += 1
+
+    logger.info(
+        "Seeded %s from %s: %s", bundle_folder, previous_folder, stats)
+    return stats
@@ -0,0 +1,81 @@
+"""Precompile the bytecode of a rez bundle.
+
+Without `.pyc` files the first `rez` command after an install compiles
+every module it imports, and launches with `PYTHONDONTWRITEBYTECODE` or
+from a read-only (shared) install pay that on every start.
+
+Bundles are compiled with all cores and checked-hash pycs. Those are
+validated against the source hash instead of its mtime, so they stay
+valid when the bundle is copied (`shared_install` overlay) or files are
+hardlinked (`dedup_store`) with new mtimes.
+"""
+from __future__ import annotations
+import logging
+import os
+import subprocess
+import time
+
+INVALIDATION_MODE = "checked-hash"
+
+log = logging.getLogger(__name__)
+
+
+def get_compile_command(python: str, folder: str, workers: int = 0) -> list[str]:
+    """compileall command, `workers=0` uses all cores.
+
+    Forced, compileall keeps every pyc with a matching timestamp header and
+    pip already wrote those for the installed packages.
+    """
+    return [
+        python, "-m", "compileall",
+        "-q",
+        "-f",
+        "-j", str(workers),
+        "--invalidation-mode", INVALIDATION_MODE,
+        folder,
+    ]
+
+
+def count_bytecode_files(folder: str) -> int:
+    count = 0
+    for root, _, names in os.walk(folder):
+        if os.path.basename(root) == "__pycache__":
+            count += sum(name.endswith(".pyc") for name in names)
+    return count
+
+
+def get_bytecode_report(folder: str, returncode: int, seconds: float) -> dict:
+    """Result to store in the manifest.
+
+    compileall exits with 1 if single files fail, e.g. python 2 only test
+    files of a package, everything else is still compiled.
+    """
+    return {
+        "invalidation_mode": INVALIDATION_MODE,
+        "files": count_bytecode_files(folder),
+        "seconds": round(seconds, 3),
+        "errors": returncode != 0,
+    }
+
+
+def compile_bytecode(
+    python: str, folder: str, env: dict = None, logger: logging.Logger = None
+) -> dict:
+    """Compile all modules below `folder` with `python`.
+
+    Returns:
+        dict: See `get_bytecode_report`.
+    """
+    logger = logger or log
+    start = time.perf_counter()
+    result = subprocess.run(
+        get_compile_command(python, folder),
+        env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        logger.warning(
+            "Some files of %s failed to compile:\n%s",
+            folder, result.stdout[-2000:],
+        )
+    return get_bytecode_report(
+        folder, result.returncode, time.perf_counter() - start)
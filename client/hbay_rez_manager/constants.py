@@ -4,4 +4,6 @@ GRAPHVIZ_URL = "https://gitlab.com/api/v4/projects/4207231/packages/generic/grap
 
 ASTRAL_PYTHON_DOWNLOAD_ROOT = "https://github.com/astral-sh/python-build-standalone/releases/download"
 
-ASTRAL_PYTHON_TAGS = "https://api.github.com/repos/astral-sh/python-build-standalone/tags?per_page=120"
\ No newline at end of file
+ASTRAL_PYTHON_TAGS = "https://api.github.com/repos/astral-sh/python-build-standalone/tags?per_page=120"
+# Path of a Chrome trace file written by RezInstaller.run
+TRACE_FILE_ENV = "HBAY_REZ_TRACE_FILE"
@@ -0,0 +1,139 @@
+"""Content addressed file store to hardlink identical files across bundles.
+
+Python installs and rez bundles share a lot of identical files, e.g. the
+libpython copied into every rez venv or unchanged site-packages between
+rez versions. `DedupStore.dedup_folder` moves every file into
+`<rez root>/store/<sha[:2]>/<sha>` once and replaces the other copies with
+hardlinks to it.
+
+Files must not be modified in place afterwards, writers replace files
+instead (see `bundle_delta.relocate_file`).
+"""
+from __future__ import annotations
+import logging
+import os
+import shutil
+import stat
+
+# Small files don't save enough to be worth a link
+MIN_DEDUP_SIZE = 4096
+
+log = logging.getLogger(__name__)
+
+
+def link_or_copy(source: str, destination: str) -> bool:
+    """Hardlink `source` to `destination`, falls back to a copy.
+
+    An existing `destination` is replaced.
+
+    Returns:
+        bool: True if linked.
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temp_path = f"{destination}.link-{os.getpid()}"
+    try:
+        os.link(source, temp_path)
+        linked = True
+    except OSError:
+        shutil.copy2(source, temp_path)
+        linked = False
+    os.replace(temp_path, destination)
+    return linked
+
+
+class DedupStore:
+    """Hardlink store under `root`, blobs are named by their sha256."""
+
+    def __init__(self, root: str, logger: logging.Logger = None):
+        self.root = root
+        self.log = logger or log
+
+    def get_blob_path(self, sha256: str, executable: bool = False) -> str:
+        # Links share the mode, keep executables apart
+        name = f"{sha256}.x" if executable else sha256
+        return os.path.join(self.root, sha256[:2], name)
+
+    def add_file(self, path: str, sha256: str) -> int:
+        """Link `path` to the blob of its content.
+
+        Returns:
+            int: Bytes saved, 0 if the file became the blob or was linked.
+        """
+        file_stat = os.stat(path)
+        executable = bool(file_stat.st_mode & stat.S_IXUSR)
+        blob_path = self.get_blob_path(sha256, executable)
+        try:
+            blob_stat = os.stat(blob_path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            try:
+                os.link(path, blob_path)
+            except FileExistsError:
+                return self.add_file(path, sha256)
+            except OSError as e:
+                self.log.debug("Can't add %s to store: %s", path, e)
+            return 0
+
+        if os.path.samestat(file_stat, blob_stat):
+            return 0
+        if blob_stat.st_size != file_stat.st_size:
+            self.log.warning("Store blob %s size mismatch, skipped", blob_path)
+            return 0
+        try:
+            link_or_copy(blob_path, path)
+        except OSError as e:
+            self.log.debug("Can't link %s: %s", path, e)
+            return 0
+        return file_stat.st_size
+
+    def dedup_folder(self, folder: str, files: dict) -> dict:
+        """Dedup all files of a bundle manifest (see `bundle_delta`).
+
+        Args:
+            folder (str): Bundle folder.
+            files (dict): Relative path to `[size, mtime_ns, sha256]`.
+
+        Returns:
+            dict: `files` looked at, `linked` and `bytes_saved` by this run.
+        """
+        report = {"files": 0, "linked": 0, "bytes_saved": 0}
+        for relpath, (size, _, sha256) in files.items():
+            if size < MIN_DEDUP_SIZE:
+                continue
+            path = os.path.join(folder, relpath)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            report["files"] += 1
+            saved = self.add_file(path, sha256)
+            if saved:
+                report["linked"] += 1
+                report["bytes_saved"] += saved
+        return report
+
+    def report(self) -> dict:
+        """Store totals, `bytes_saved` counts all links beyond the first."""
+        report = {"blobs": 0, "bytes": 0, "bytes_saved": 0}
+        if not os.path.isdir(self.root):
+            return report
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                blob_stat = os.stat(os.path.join(root, name))
+                report["blobs"] += 1
+                report["bytes"] += blob_stat.st_size
+                # one link is the store itself, one the first real file
+                report["bytes_saved"] += (
+                    blob_stat.st_size * max(0, blob_stat.st_nlink - 2))
+        return report
+
+    def prune(self) -> int:
+        """Remove blobs no bundle links to anymore."""
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(root, name)
+                if os.stat(path).st_nlink == 1:
+                    os.remove(path)
+                    removed += 1
+        return removed
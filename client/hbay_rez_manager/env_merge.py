@@ -0,0 +1,73 @@
+"""Merge a rez resolved environment into a launch environment."""
+from __future__ import annotations
+import os
+
+# Variables holding a list of paths, these get deduplicated on merge
+PATH_LIST_VARIABLES = frozenset({
+    "PATH",
+    "PYTHONPATH",
+    "LD_LIBRARY_PATH",
+    "DYLD_LIBRARY_PATH",
+    "DYLD_FRAMEWORK_PATH",
+    "MANPATH",
+    "PKG_CONFIG_PATH",
+    "QT_PLUGIN_PATH",
+    "PXR_PLUGINPATH_NAME",
+    "MAYA_MODULE_PATH",
+    "MAYA_PLUG_IN_PATH",
+    "MAYA_SCRIPT_PATH",
+    "XBMLANGPATH",
+    "NUKE_PATH",
+    "OFX_PLUGIN_PATH",
+    "ARNOLD_PLUGIN_PATH",
+    "MTOA_TEMPLATES_PATH",
+    "KATANA_RESOURCES",
+    "HOUDINI_OTLSCAN_PATH",
+    "REZ_PACKAGES_PATH",
+})
+
+
+def normalize_path_list(value: str, pathsep: str = os.pathsep) -> str:
+    """Remove empty entries and duplicates from a path list, keeps order.
+
+    Entries are compared normalized (case and slashes on Windows), the
+    first occurrence is kept as is.
+    """
+    unique_paths = {}
+    for path in value.split(pathsep):
+        path = path.strip()
+        if not path:
+            continue
+        key = os.path.normcase(os.path.normpath(path))
+        unique_paths.setdefault(key, path)
+    return pathsep.join(unique_paths.values())
+
+
+def merge_environment(
+    env: dict[str, str],
+    update: dict[str, str],
+    path_list_variables: frozenset = PATH_LIST_VARIABLES,
+    pathsep: str = os.pathsep,
+) -> list[str]:
+    """Merge `update` into `env` in place.
+
+    Only keys with a different value are touched, so the cost depends on
+    the amount of changed variables and not on the environment size.
+    Path list variables are deduplicated, other values only get a leading
+    path separator stripped, rez prepends it to variables that were empty.
+
+    Returns:
+        list[str]: Keys that changed in `env`.
+    """
+    changed = []
+    for key, value in update.items():
+        if env.get(key) == value or not isinstance(value, str):
+            continue
+        if key.upper() in path_list_variables:
+            value = normalize_path_list(value, pathsep)
+        elif value.startswith(pathsep):
+            value = value.lstrip(pathsep)
+        if env.get(key) != value:
+            env[key] = value
+            changed.append(key)
+    return changed
@@ -1,5 +1,8 @@
 from ayon_applications import PreLaunchHook, LaunchTypes
+from hbay_rez_manager.launch_stats import get_stats_path, record_launch_timings
+from hbay_rez_manager.lib import get_rez_root, get_studio_code
 from hbay_rez_manager.rez_config_helper import manage_rez_config_from_settings
+from hbay_rez_manager.tracing import Tracer
 
 class PreLaunchSetRezConfig(PreLaunchHook):
     """Injects Rez config environment variables before DCC launch."""
@@ -11,12 +14,27 @@ class PreLaunchSetRezConfig(PreLaunchHook):
     def execute(self):
         # Access the addon settings
         self.log.info("Setting Rez Config Environment Variables")
-        rez_settings = self.launch_context.data.get("project_settings", {}).get(
+        tracer = Tracer(self.log)
+        project_settings = self.launch_context.data.get("project_settings", {})
+        rez_settings = project_settings.get(
             "hbay_rez_manager", {}).get("rez_config_options", {})
 
-        rez_config_path = manage_rez_config_from_settings(rez_settings)
+        rez_root = get_rez_root(get_studio_code(project_settings))
+        with tracer.span("config", category="launch"):
+            rez_config_path = manage_rez_config_from_settings(
+                rez_settings, rez_root)
 
         if rez_config_path:
             self.launch_context.env.update({"REZ_CONFIG_FILE": rez_config_path})
             self.log.info(f"Rez Environment Set: REZ_CONFIG={rez_config_path}")
 
+        timings = {
+            name: item["seconds"] for name, item in tracer.summary().items()
+        }
+        record_launch_timings(
+            get_stats_path(rez_root),
+            self.__class__.__name__,
+            rez_settings.get("config_type", "config_web"),
+            timings,
+        )
+
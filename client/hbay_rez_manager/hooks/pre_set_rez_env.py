@@ -1,6 +1,8 @@
+import logging
 import os
 import subprocess
 import json
+import tempfile
 
 from ayon_applications import PreLaunchHook, ApplicationLaunchFailed, \
     LaunchTypes
@@ -8,6 +10,30 @@ from ayon_applications import PreLaunchHook, ApplicationLaunchFailed, \
 from ayon_core.lib.vendor_bin_utils import find_executable
 from ayon_applications.defs import ApplicationExecutable
 
+from hbay_rez_manager.env_merge import merge_environment
+from hbay_rez_manager.launch_stats import get_stats_path, record_launch_timings
+from hbay_rez_manager.lib import get_rez_root, get_studio_code
+from hbay_rez_manager.payload_cache import (
+    get_payload_cache_root,
+    get_usage_path,
+)
+from hbay_rez_manager.resolve_helper import (
+    find_neighbour_context,
+    get_context_cache_path,
+    get_fail_graph_file,
+    get_failure_cache_path,
+    get_request_key,
+    get_resolve_base_key,
+    get_resolve_command,
+    is_context_fresh,
+    load_failure,
+    parse_rez_packages,
+    render_fail_graph,
+    start_background_resolve,
+)
+from hbay_rez_manager.scripts import context_diff, env_transport
+from hbay_rez_manager.tracing import Tracer
+
 
 class PreLaunchSetRezEnv(PreLaunchHook):
     """Add Rez packages to the launch environment.
@@ -22,6 +48,34 @@ class PreLaunchSetRezEnv(PreLaunchHook):
 
     Note that the rez resolved environment will be resolved with all parent
     variables enabled and will merge into the launch context environment.
+
+    Timings of the single steps are stored in the launch stats file next to
+    the rez installation, see `launch_stats`.
+
+    The resolved environment is passed back either as binary payload in a
+    temp file (`marshal`, default) or as JSON on stdout (`json`), see
+    `rez_launch_options/env_transport` setting. The binary payload is not
+    affected by packages printing to stdout.
+
+    Resolved contexts are cached as .rxt files next to the rez installation
+    for `rez_launch_options/resolve_cache_ttl` hours, or until one of their
+    package families gets a release. The tray pre-resolves the application
+    variants at start so most launches only load a context.
+
+    Failed resolves are cached for `rez_launch_options/failure_cache_ttl`
+    minutes so a retry of the same request fails right away. Their fail graph
+    is rendered to svg in the background and linked in the error message.
+
+    With `rez_launch_options/resolve_neighbour_enabled` a request without a
+    cached context is resolved with the versions of the cached context of
+    the most similar request, differing in at most
+    `resolve_neighbour_max_changes` package families. The package
+    difference to that context is logged, the environment difference only
+    at debug level. Such a context isn't cached, the request is resolved
+    from scratch into the cache in the background.
+
+    With `rez_config_options/package_cache_enabled` the resolved variants
+    are logged for the package payload cache, see `payload_cache`.
     """
     order = -98  # leave some space to egg bootstrap
     # the path to rez itself in a hook
@@ -33,12 +87,82 @@ class PreLaunchSetRezEnv(PreLaunchHook):
             return
         self.log.info(f"AYON_REZ_PACKAGES: {ayon_rez_packages}")
 
-        packages: list[str] = ayon_rez_packages.split(os.pathsep)
-        python_cmd = (
-            "import json;"
-            "from rez.resolved_context import ResolvedContext;"
-            f"print(json.dumps(ResolvedContext({repr(packages)}).get_environ()))"
-        )
+        packages: list[str] = parse_rez_packages(ayon_rez_packages)
+        tracer = Tracer(self.log)
+        project_settings = self.launch_context.data.get("project_settings", {})
+        launch_settings = project_settings.get("hbay_rez_manager", {}).get(
+            "rez_launch_options", {})
+        transport = launch_settings.get("env_transport", "marshal")
+
+        # Enforce upstream environment to be included so that it includes the
+        # parent AYON environment completely
+        tmp_env = self.launch_context.env.copy()
+        tmp_env["REZ_ALL_PARENT_VARIABLES"] = "1"
+
+        rez_root = get_rez_root(get_studio_code(project_settings))
+        base_key = get_resolve_base_key(tmp_env)
+        request_key = get_request_key(packages, tmp_env, base_key)
+
+        # Fail right away if the same request failed a moment ago
+        failure_path = get_failure_cache_path(rez_root, request_key)
+        failure_ttl = launch_settings.get("failure_cache_ttl", 5.0)
+        if failure_ttl:
+            failure = load_failure(failure_path, failure_ttl * 60)
+            if failure:
+                self.log.info("Using cached resolve failure %s", failure_path)
+                raise ApplicationLaunchFailed(self._get_failure_message(
+                    packages, failure, get_fail_graph_file(failure)))
+        try:
+            os.remove(failure_path)
+        except OSError:
+            pass
+
+        script_args = ["--failure-output", failure_path] + packages
+        cache_ttl = launch_settings.get("resolve_cache_ttl", 12.0)
+        diff_path = None
+        if launch_settings.get("resolve_cache_enabled", True) and cache_ttl:
+            cache_path = get_context_cache_path(rez_root, request_key)
+            script_args = [
+                "--context-cache", cache_path,
+                "--max-age", str(cache_ttl * 3600),
+                "--cache-base", base_key,
+            ] + script_args
+            if (
+                launch_settings.get("resolve_neighbour_enabled", False)
+                and not is_context_fresh(cache_path, cache_ttl * 3600)
+            ):
+                neighbour = find_neighbour_context(
+                    rez_root, packages, base_key, cache_ttl * 3600,
+                    launch_settings.get("resolve_neighbour_max_changes", 1),
+                )
+                if neighbour:
+                    self.log.info(
+                        "Resolving from similar cached request: %s",
+                        " ".join(neighbour[1]))
+                    diff_path = (
+                        f"{os.path.splitext(cache_path)[0]}.{os.getpid()}.diff")
+                    script_args = [
+                        "--neighbour-context", neighbour[0],
+                        "--diff-output", diff_path,
+                    ] + script_args
+                    # Runs the commands of every package of the neighbour
+                    if self.log.isEnabledFor(logging.DEBUG):
+                        script_args = ["--diff-environ"] + script_args
+
+        config_options = project_settings.get("hbay_rez_manager", {}).get(
+            "rez_config_options", {})
+        if config_options.get("package_cache_enabled", False):
+            script_args = [
+                "--usage-log",
+                get_usage_path(get_payload_cache_root(rez_root)),
+            ] + script_args
+
+        payload_path = None
+        if transport == "marshal":
+            fd, payload_path = tempfile.mkstemp(
+                prefix="rez-env-", suffix=".bin")
+            os.close(fd)
+            script_args = ["--output", payload_path] + script_args
 
         # We assume `rez` is available on PATH as command-line and has the rez
         # python available with rez python library so we can resolve the env
@@ -46,66 +170,151 @@ class PreLaunchSetRezEnv(PreLaunchHook):
         # TODO: If the current environment would have `rez` python package
         #  available then we could avoid the subprocess call here and resolve
         #  directly within current Python process.
+        command = get_resolve_command(script_args)
 
-        command = [
-            "rez",
-            "python",
-            "-c",
-            python_cmd
-        ]
+        try:
+            rez_env = self._resolve_environment(
+                command, tmp_env, packages, payload_path, failure_path, tracer)
+            if diff_path:
+                diff = context_diff.load_diff(diff_path)
+                self._log_neighbour_diff(diff)
+                if diff and diff.get("reused"):
+                    start_background_resolve(
+                        cache_path, base_key, packages, tmp_env)
+        finally:
+            for path in (payload_path, diff_path):
+                if not path:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
 
-        # Enforce upstream environment to be included so that it includes the
-        # parent AYON environment completely
-        tmp_env = self.launch_context.env.copy()
-        tmp_env["REZ_ALL_PARENT_VARIABLES"] = "1"
+        # Merge only changed keys, path lists like PATH or PYTHONPATH are
+        # deduplicated in order
+        with tracer.span("env_merge", category="launch") as span:
+            changed_keys = merge_environment(self.launch_context.env, rez_env)
+            span.set(changed=len(changed_keys))
+
+        # Formatting thousands of variables is expensive, only do it when
+        # somebody is going to read it
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(f"Rez changed {len(changed_keys)} variables:")
+            for key in sorted(changed_keys):
+                self.log.debug("%s=%s", key, self.launch_context.env[key])
+
+        # patch the executable in launch_context so later executed prelaunch hooks continue to function
+        with tracer.span("find_executable", category="launch"):
+            executable = find_executable(
+                str(self.launch_context.executable),
+                env=self.launch_context.env)
+        self.launch_context.executable = ApplicationExecutable(executable)
+
+        self._record_timings(" ".join(packages), tracer)
 
+    def _resolve_environment(
+        self,
+        command: list[str],
+        env: dict[str, str],
+        packages: list[str],
+        payload_path: str,
+        failure_path: str,
+        tracer: Tracer,
+    ) -> dict[str, str]:
+        """Run the resolve subprocess and decode its environment."""
         # Get the rez resolved enviroment
-        result = subprocess.run(
-            command,
-            env=tmp_env,
-            capture_output=True,
-            creationflags=subprocess.CREATE_NO_WINDOW,
-        )
-        if result.returncode != 0:
+        with tracer.span("spawn", category="launch"):
+            process = subprocess.Popen(
+                command,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        with tracer.span("resolve", category="launch"):
+            stdout, stderr = process.communicate()
+        if process.returncode != 0:
             output = ""
-            if result.stdout:
-                output += result.stdout.decode("utf-8")
-            if result.stderr:
-                output += result.stderr.decode("utf-8")
+            if stdout:
+                output += stdout.decode("utf-8", errors="replace")
+            if stderr:
+                output += stderr.decode("utf-8", errors="replace")
 
             rez_packages = " ".join(packages)
             self.log.error(output)
 
+            # Resolve conflicts are written by the resolve script, render
+            # the fail graph without waiting for it
+            failure = load_failure(failure_path, float("inf"))
+            if failure:
+                graph_file = render_fail_graph(failure.get("graph"), env)
+                raise ApplicationLaunchFailed(self._get_failure_message(
+                    packages, failure, graph_file or failure.get("graph")))
+
             # Assume we can parse last line as traceback message
             message = output.splitlines()[-1].split(":", 1)[-1].strip()
             raise ApplicationLaunchFailed(
                 f"Rez environment resolution failed for packages: {rez_packages}."
                 f"\n\n{message}"
             )
-        # self.log.info(result.stdout.decode("utf-8"))
-        # Update self.launch_context.env with the rez environment
-        rez_env: dict[str, str] = json.loads(result.stdout)
-
-        # Sanitize rez_env: strip leading path separator from values
-        # Rez might prepend pathsep to variables if they were empty
-        for key, value in rez_env.items():
-            if isinstance(value, str) and value.startswith(os.pathsep):
-                rez_env[key] = value.lstrip(os.pathsep)
 
-        self.launch_context.env.update(rez_env)
+        with tracer.span("decode", category="launch"):
+            if payload_path:
+                return env_transport.read_payload(payload_path)
+            return json.loads(stdout)
 
-        # filter paths for duplicates
-        paths = self.launch_context.env.get("PATH", "").split(os.pathsep)
-        # dict.fromkeys is a fast way to get unique items in order
-        unique_paths = list(dict.fromkeys(p for p in paths if p))
-        self.launch_context.env["PATH"] = os.pathsep.join(unique_paths)
+    def _log_neighbour_diff(self, diff: dict):
+        """Log what changed compared to the similar cached request."""
+        if not diff:
+            return
+        if not diff.get("reused"):
+            self.log.info(
+                "Versions of the similar request don't satisfy the request,"
+                " resolved from scratch")
+        packages = diff.get("packages", {})
+        changes = (
+            [f"+{name}" for name in packages.get("added", [])]
+            + [f"-{name}" for name in packages.get("removed", [])]
+            + [f"{old} -> {new}" for old, new in packages.get("changed", [])]
+        )
+        self.log.info(
+            "Packages changed from similar request: %s",
+            ", ".join(changes) or "none")
+        environ = diff.get("environ")
+        if environ is None:
+            return
+        self.log.debug(
+            "Variables changed from similar request: %d added, %d removed,"
+            " %d changed",
+            len(environ.get("added", [])),
+            len(environ.get("removed", [])),
+            len(environ.get("changed", [])),
+        )
+        for kind in ("added", "removed", "changed"):
+            if environ.get(kind):
+                self.log.debug(
+                    "Variables %s: %s", kind, ", ".join(environ[kind]))
 
-        for k in sorted(self.launch_context.env.keys()):
-            v = self.launch_context.env[k]
-            self.log.debug(f"{k}={v}")
+    @staticmethod
+    def _get_failure_message(
+        packages: list[str], failure: dict, graph_file: str = None
+    ) -> str:
+        message = (
+            f"Rez environment resolution failed for packages: "
+            f"{' '.join(packages)}.\n\n{failure.get('summary', '')}"
+        )
+        if graph_file:
+            message += f"\n\nFail graph: {graph_file}"
+        return message
 
-        # patch the executable in launch_context so later executed prelaunch hooks continue to function
-        executable = find_executable(
-            str(self.launch_context.executable),
-            env=self.launch_context.env)
-        self.launch_context.executable = ApplicationExecutable(executable)
+    def _record_timings(self, request: str, tracer: Tracer):
+        timings = {
+            name: item["seconds"] for name, item in tracer.summary().items()
+        }
+        timings["total"] = round(sum(timings.values()), 3)
+        self.log.debug(f"Rez env timings: {timings}")
+        project_settings = self.launch_context.data.get("project_settings", {})
+        stats_path = get_stats_path(
+            get_rez_root(get_studio_code(project_settings)))
+        record_launch_timings(
+            stats_path, self.__class__.__name__, request, timings)
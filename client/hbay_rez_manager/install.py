@@ -0,0 +1,157 @@
+"""Headless rez install for farm nodes and image baking.
+
+Reads the addon settings from a JSON file or the AYON server and runs
+`RezInstaller` without the tray::
+
+    python -m hbay_rez_manager.install --settings settings.json --json
+    python -m hbay_rez_manager.install --check-only
+
+The settings file holds either the `hbay_rez_manager` addon settings or
+the studio settings of all addons. Without `--settings` they are fetched
+with `ayon_api`, which connects through `AYON_SERVER_URL` and
+`AYON_API_KEY`.
+
+With `--json` progress is written to stdout as one JSON object per line,
+logging goes to stderr.
+"""
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import sys
+
+from .lib import get_rez_root, get_studio_code
+from .rez_config_helper import manage_rez_config_from_settings
+from .rez_installer import RezInstaller
+from .shared_install import get_shared_install_root, sync_local_overlay
+
+ADDON_NAME = "hbay_rez_manager"
+
+EXIT_OK = 0
+# --check-only, rez is missing or doesn't match the settings
+EXIT_NOT_INSTALLED = 1
+EXIT_INSTALL_FAILED = 2
+EXIT_SETTINGS_ERROR = 3
+
+log = logging.getLogger("hbay_rez_manager.install")
+
+
+def load_settings(settings_file: str = None) -> dict:
+    """Studio settings of all addons, from file or the AYON server."""
+    if settings_file:
+        with open(settings_file) as f:
+            settings = json.load(f)
+    else:
+        import ayon_api
+
+        settings = ayon_api.get_addons_studio_settings()
+    if ADDON_NAME not in settings:
+        settings = {ADDON_NAME: settings}
+    return settings
+
+
+def _emit(use_json: bool, event: str, **data) -> None:
+    if use_json:
+        sys.stdout.write(json.dumps(dict(event=event, **data)) + "\n")
+        sys.stdout.flush()
+    else:
+        log.info("%s: %s", event, data)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Install rez without the AYON tray")
+    parser.add_argument(
+        "--settings", help="JSON settings file, default is the AYON server")
+    parser.add_argument(
+        "--root", help="Install root, default is the per user data folder")
+    parser.add_argument(
+        "--check-only", action="store_true",
+        help=f"Only check the installation, exit code {EXIT_NOT_INSTALLED} "
+             f"if rez is missing or outdated")
+    parser.add_argument(
+        "--rollback", action="store_true",
+        help="Activate the previously installed bundle again")
+    parser.add_argument(
+        "--json", action="store_true", help="JSON lines progress on stdout")
+    parser.add_argument("--trace", help="Write a Chrome trace of the install")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        stream=sys.stderr,
+    )
+
+    try:
+        settings = load_settings(args.settings)
+        rez_settings = settings[ADDON_NAME]
+        install_settings = rez_settings.get("rez_install_options", {})
+        local_root = get_rez_root(get_studio_code(settings))
+        shared_root = get_shared_install_root(install_settings)
+        root = args.root or shared_root or local_root
+        installer = RezInstaller.from_settings(
+            root,
+            install_settings,
+            logger=log,
+            trace_path=args.trace,
+            shared=bool(shared_root) and not args.root,
+        )
+    except Exception as e:
+        log.exception("Failed to load settings")
+        _emit(args.json, "error", message=f"Failed to load settings: {e}")
+        return EXIT_SETTINGS_ERROR
+
+    if args.rollback:
+        if not installer.rollback():
+            _emit(args.json, "error", message="No previous bundle to roll back to")
+            return EXIT_INSTALL_FAILED
+        _emit(
+            args.json, "rollback",
+            root=installer.root_folder, rez_path=installer.rez_path_folder,
+        )
+        return EXIT_OK
+
+    installed = installer.check_if_installed()
+    if args.check_only:
+        _emit(
+            args.json, "check",
+            installed=installed, root=installer.root_folder,
+            rez_path=installer.rez_path_folder,
+        )
+        return EXIT_OK if installed else EXIT_NOT_INSTALLED
+
+    if not installed:
+        installer.progress_callback = lambda percent, message: _emit(
+            args.json, "progress", percent=percent, message=message)
+        try:
+            installer.run()
+        except Exception as e:
+            _emit(args.json, "error", message=str(e))
+            return EXIT_INSTALL_FAILED
+        if not installer.check_if_installed():
+            _emit(
+                args.json, "error",
+                message="Installation incomplete", errors=installer.errors,
+            )
+            return EXIT_INSTALL_FAILED
+
+    rez_path = installer.rez_path_folder
+    if installer.shared and install_settings.get(
+            "shared_install_local_overlay"):
+        rez_path = sync_local_overlay(
+            installer, os.path.join(local_root, "overlay"), log)
+
+    config_path = manage_rez_config_from_settings(
+        rez_settings.get("rez_config_options", {}), local_root)
+    _emit(
+        args.json, "done",
+        installed=True, root=installer.root_folder,
+        rez_path=rez_path, rez_config=config_path,
+    )
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
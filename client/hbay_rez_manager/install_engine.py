@@ -0,0 +1,425 @@
+"""Asyncio engine for `RezInstaller` with phase timeouts and cancellation.
+
+`AsyncInstallEngine` runs the same steps as the blocking
+`RezInstaller.run`, but awaits downloads and subprocesses so an install
+can be cancelled at any point and every phase has a timeout. Independent
+steps run concurrently::
+
+    fetch python ──┐         ┌─> wheel prefetch ──┐
+    fetch rez ─────┼─> python ─> rez ─┬─> dependencies ─┬─> bytecode ─> finalize
+    fetch graphviz ┘                  └─> graphviz ─────┘
+
+The dependency wheels are prefetched with the bundle python as soon as it
+is installed, while rez installs. On a first install or a python change
+there is no other python with pip before that.
+
+Downloads and other blocking steps (url resolution, extraction, hashing)
+run in daemon threads which stop at the installer's next cancel check.
+Subprocesses are asyncio subprocesses and get killed on cancellation.
+
+`run` and `cancel` can be called from different threads, which is what
+`qt_helper.ProgressSignalWrapper` does for the install dialog.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import platform
+import subprocess
+import threading
+import time
+
+from .bytecode import get_bytecode_report, get_compile_command
+from .rez_installer import InstallCancelled, RezInstaller
+
+# Seconds per phase, None or 0 means no timeout
+DEFAULT_PHASE_TIMEOUTS = {
+    "fetch": 1800.0,
+    "python": 600.0,
+    "rez": 600.0,
+    "dependencies": 1800.0,
+    "graphviz": 600.0,
+    "bytecode": 600.0,
+    "finalize": 600.0,
+}
+
+# Time a cancelled thread gets to stop before it is left behind, e.g. when
+# it hangs on a dead connection
+CANCEL_GRACE_PERIOD = 5.0
+
+
+def _resolve_future(future: asyncio.Future, result=None, error=None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class AsyncInstallEngine:
+    """Drives a `RezInstaller` on an asyncio event loop.
+
+    Args:
+        installer (RezInstaller): Installer to run.
+        timeout (float): Timeout of every phase in seconds, overrides
+            `DEFAULT_PHASE_TIMEOUTS`.
+        timeouts (dict): Timeouts of single phases in seconds.
+    """
+
+    def __init__(
+        self,
+        installer: RezInstaller,
+        timeout: float = None,
+        timeouts: dict = None,
+        logger: logging.Logger = None,
+    ):
+        self.installer = installer
+        self.log = logger or installer.log
+        if timeout is not None:
+            self.timeouts = dict.fromkeys(DEFAULT_PHASE_TIMEOUTS, timeout)
+        else:
+            self.timeouts = dict(DEFAULT_PHASE_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self._loop = None
+        self._task = None
+        self._prefetch = None
+
+    @property
+    def progress_callback(self):
+        return self.installer.progress_callback
+
+    @progress_callback.setter
+    def progress_callback(self, callback) -> None:
+        self.installer.progress_callback = callback
+
+    def run(self) -> None:
+        """Blocking install on a new event loop.
+
+        Raises:
+            InstallCancelled: If `cancel` was called.
+            TimeoutError: If a phase exceeded its timeout.
+        """
+        asyncio.run(self.run_async())
+
+    def cancel(self) -> None:
+        """Cancel the install, safe to call from any thread."""
+        self.installer.cancel()
+        loop, task = self._loop, self._task
+        if loop is None or task is None:
+            return
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # Loop is already closed, nothing left to cancel
+            pass
+
+    async def run_async(self) -> None:
+        """Install under the root's install lock, see `RezInstaller.run`."""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        installer = self.installer
+        try:
+            lock = await self._to_thread(installer._acquire_install_lock)
+            if lock is None:
+                return
+            try:
+                await self._install()
+            finally:
+                installer._release_install_lock(lock)
+        except asyncio.CancelledError:
+            raise InstallCancelled("Install cancelled") from None
+        finally:
+            self._task = None
+
+    async def _install(self) -> None:
+        installer = self.installer
+        installer.errors = []
+        new_bundle = installer._needs_new_bundle()
+        try:
+            installer._report_progress(0, "Downloading")
+            python_archive, rez_archive, graphviz_archive = await self._phase(
+                "fetch",
+                self._gather(
+                    self._fetch_python(),
+                    self._fetch_rez(new_bundle),
+                    self._fetch_graphviz(new_bundle),
+                ),
+            )
+
+            installer._report_progress(20, "Installing Python")
+            await self._phase("python", self._install_python(python_archive))
+            if new_bundle:
+                self._prefetch = self._start_prefetch()
+
+            previous = None
+            if new_bundle:
+                previous = installer._stage_bundle()
+
+            installer._report_progress(40, "Installing Rez")
+            await self._phase("rez", self._install_rez(rez_archive))
+
+            installer._report_progress(
+                60, "Installing Dependencies and Graphviz")
+            await self._gather(
+                self._phase(
+                    "dependencies", self._install_dependencies(new_bundle)),
+                self._phase(
+                    "graphviz",
+                    self._install_graphviz(graphviz_archive, new_bundle),
+                ),
+            )
+
+            installer._report_progress(82, "Compiling bytecode")
+            await self._phase("bytecode", self._compile_bytecode())
+
+            await self._phase(
+                "finalize",
+                self._to_thread(installer._finish_install, previous),
+            )
+        except InstallCancelled:
+            raise
+        except Exception as e:
+            self.log.exception("Installation failed: %s", e)
+            raise
+        finally:
+            self._prefetch = None
+            installer._end_run()
+
+    async def _phase(self, name: str, coroutine):
+        timeout = self.timeouts.get(name) or None
+        with self.installer.tracer.span(f"phase.{name}", category="phase"):
+            try:
+                return await asyncio.wait_for(coroutine, timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"Install phase '{name}' timed out after {timeout:.0f}s"
+                ) from None
+
+    @staticmethod
+    async def _gather(*coroutines) -> list:
+        """Like `asyncio.gather`, but the others are cancelled on a failure."""
+        tasks = [asyncio.ensure_future(c) for c in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def _start_prefetch(self) -> asyncio.Future:
+        """Prefetch the wheels in a daemon thread, resolves to its result.
+
+        Not cancelled with the install, wheels downloaded after a failure
+        are used by the next install.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def target():
+            try:
+                callback_args = (future, self.installer.prefetch_wheels())
+            except BaseException as e:
+                callback_args = (future, None, e)
+            try:
+                loop.call_soon_threadsafe(_resolve_future, *callback_args)
+            except RuntimeError:
+                # Install ended, loop is gone
+                pass
+
+        threading.Thread(
+            target=target, name="install-prefetch_wheels", daemon=True
+        ).start()
+        return future
+
+    async def _to_thread(self, func, *args):
+        """Await blocking `func` running in a daemon thread.
+
+        On cancellation the installer is cancelled and the thread gets
+        `CANCEL_GRACE_PERIOD` seconds to stop before it is left behind.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def target():
+            try:
+                result = func(*args)
+            except BaseException as e:
+                callback_args = (future, None, e)
+            else:
+                callback_args = (future, result)
+            try:
+                loop.call_soon_threadsafe(_resolve_future, *callback_args)
+            except RuntimeError:
+                # Left behind after cancellation, loop is gone
+                pass
+
+        threading.Thread(
+            target=target, name=f"install-{func.__name__}", daemon=True
+        ).start()
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.installer.cancel()
+            await asyncio.wait([future], timeout=CANCEL_GRACE_PERIOD)
+            if future.done():
+                # Mark as retrieved, it's usually InstallCancelled
+                future.exception()
+            else:
+                self.log.warning(
+                    "%s didn't stop after cancel, leaving it behind",
+                    func.__name__,
+                )
+            raise
+
+    async def download(self, url: str, destination: str, sha256: str = None):
+        """Cancellable `RezInstaller._download`."""
+        await self._to_thread(
+            self.installer._download, url, destination, sha256)
+
+    async def run_command(
+        self, command: list[str], env: dict = None
+    ) -> tuple[str, str]:
+        """Run a subprocess, it is killed when the install gets cancelled.
+
+        Returns:
+            tuple[str, str]: stdout and stderr.
+
+        Raises:
+            subprocess.CalledProcessError: On a non zero exit code.
+        """
+        self.log.debug(" ".join(command))
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        try:
+            stdout, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        stdout = stdout.decode(errors="replace")
+        stderr = stderr.decode(errors="replace")
+        if process.returncode:
+            self.log.error(
+                "Command failed with exit code %s\nstdout: %s\nstderr: %s",
+                process.returncode, stdout, stderr,
+            )
+            raise subprocess.CalledProcessError(
+                process.returncode, command, stdout, stderr)
+        return stdout, stderr
+
+    async def _fetch_python(self) -> str | None:
+        installer = self.installer
+        if installer._use_installed_python():
+            return None
+        url, sha256 = await self._to_thread(installer._get_python_source)
+        archive = installer._get_python_archive_path(url)
+        self.log.info("Downloading Python from %s", url)
+        await self.download(url, archive, sha256)
+        return archive
+
+    async def _fetch_rez(self, new_bundle: bool) -> str | None:
+        if not new_bundle:
+            return None
+        installer = self.installer
+        url, sha256 = await self._to_thread(installer._get_rez_source)
+        archive = installer._get_rez_archive_path()
+        self.log.info("Downloading Rez from %s", url)
+        await self.download(url, archive, sha256)
+        return archive
+
+    async def _fetch_graphviz(self, new_bundle: bool) -> str | None:
+        if not new_bundle or platform.system().lower() != "windows":
+            return None
+        installer = self.installer
+        url, sha256 = await self._to_thread(installer._get_graphviz_source)
+        archive = installer._get_graphviz_archive_path()
+        self.log.info("Downloading Graphviz from %s", url)
+        await self.download(url, archive, sha256)
+        return archive
+
+    async def _install_python(self, archive: str | None) -> None:
+        if archive is None:
+            return
+        installer = self.installer
+        await self._to_thread(installer._install_python, archive)
+        installer.write_manifest("python_version", installer.python_version)
+
+    async def _install_rez(self, archive: str | None) -> None:
+        if archive is None:
+            return
+        installer = self.installer
+        cmd = await self._to_thread(installer._prepare_rez_install, archive)
+        with installer.tracer.span("subprocess", command="install.py"):
+            stdout, stderr = await self.run_command(
+                cmd, installer._get_install_env())
+        self.log.debug(stdout)
+        if stderr:
+            self.log.warning(stderr)
+        await self._to_thread(installer._link_python_libs)
+        self.log.info("Successfully installed Rez to %s", installer.rez_folder)
+        installer.write_manifest("rez_version", installer.rez_version)
+
+    async def _install_dependencies(self, new_bundle: bool) -> None:
+        if not new_bundle:
+            return
+        installer = self.installer
+        await self._to_thread(installer._seed_dependencies)
+        if self._prefetch is not None:
+            await self._prefetch
+        else:
+            await self._to_thread(installer.prefetch_wheels)
+        env = installer._get_install_env()
+        # One at a time, pip doesn't lock the venv
+        for package in installer.dependencies:
+            self.log.info("Installing %s ...", package)
+            with installer.tracer.span(
+                "subprocess", command="pip install", package=package
+            ):
+                try:
+                    await self.run_command(
+                        installer._get_pip_command(package), env)
+                except subprocess.CalledProcessError as e:
+                    self.log.error("Failed to install %s: %s", package, e)
+                    continue
+            self.log.info("Successfully installed %s", package)
+        installer.write_manifest("dependencies", installer.dependencies)
+
+    async def _compile_bytecode(self) -> None:
+        installer = self.installer
+        if not installer._needs_bytecode():
+            return
+        start = time.perf_counter()
+        try:
+            await self.run_command(
+                get_compile_command(installer.python, installer.rez_folder),
+                installer._get_install_env(),
+            )
+            returncode = 0
+        except subprocess.CalledProcessError as e:
+            returncode = e.returncode
+        report = await self._to_thread(
+            get_bytecode_report,
+            installer.rez_folder,
+            returncode,
+            time.perf_counter() - start,
+        )
+        installer._record_bytecode(report)
+
+    async def _install_graphviz(
+        self, archive: str | None, new_bundle: bool
+    ) -> None:
+        if not new_bundle:
+            return
+        installer = self.installer
+        if archive is None:
+            self.log.info(
+                "Skipping Graphviz installation on non-Windows platform.")
+        elif not await self._to_thread(installer._install_graphviz, archive):
+            return
+        installer.write_manifest(
+            "graphviz_version", installer.graphviz_version)
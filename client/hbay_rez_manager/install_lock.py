@@ -0,0 +1,213 @@
+"""Lock file so only one process installs into a rez root at a time."""
+from __future__ import annotations
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+
+def is_pid_alive(pid: int) -> bool:
+    """Check if a process of this machine is still running."""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        ERROR_INVALID_PARAMETER = 87
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(
+            PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # Only an unknown pid is gone, access denied is e.g. the
+            # process of another user
+            return ctypes.get_last_error() != ERROR_INVALID_PARAMETER
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class InstallLock:
+    """Exclusive lock through an `O_EXCL` created file.
+
+    Works on local disks and network shares (SMB, NFSv3+). The lock file
+    holds host and pid of the owner, a heartbeat thread touches it every
+    `heartbeat_interval` seconds while it is held.
+
+    A lock is stale if its heartbeat didn't change for `stale_after`
+    seconds or its owner process on this host is gone. Stale locks are taken
+    over. The heartbeat is timed with the local monotonic clock, comparing
+    the file server's mtime with the local time would make a live lock look
+    stale on hosts with a skewed clock.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        timeout: float = 3600.0,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 120.0,
+        logger: logging.Logger = None,
+    ):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.log = logger or logging.getLogger(self.__class__.__name__)
+        self.locked = False
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat_thread = None
+        # Last seen heartbeat of the owner and the monotonic time it was seen
+        self._observed = None
+        self._observed_at = 0.0
+
+    def read_owner(self, path: str = None) -> dict:
+        try:
+            with open(path or self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _is_stale(self, owner: dict) -> bool:
+        if (
+            owner.get("host") == socket.gethostname()
+            and "pid" in owner
+            and not is_pid_alive(owner["pid"])
+        ):
+            return True
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        observed = (mtime_ns, json.dumps(owner, sort_keys=True))
+        now = time.monotonic()
+        if observed != self._observed:
+            self._observed = observed
+            self._observed_at = now
+            return False
+        return now - self._observed_at > self.stale_after
+
+    def _take_over_stale(self, owner: dict) -> None:
+        """Move a stale lock away, puts it back if it changed meanwhile."""
+        self._observed = None
+        stale_path = f"{self.path}.stale-{socket.gethostname()}-{os.getpid()}"
+        try:
+            os.replace(self.path, stale_path)
+        except OSError:
+            return
+        if self.read_owner(stale_path) != owner:
+            # Another process took over first, that is its fresh lock
+            try:
+                os.link(stale_path, self.path)
+            except OSError as e:
+                self.log.debug(
+                    "Failed to link install lock %s back: %s", self.path, e)
+                self._restore_copy(stale_path)
+        else:
+            self.log.warning(
+                "Took over stale install lock %s of %s", self.path, owner)
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+
+    def _restore_copy(self, stale_path: str) -> None:
+        """Put a lock back as copy, for shares without hard links."""
+        try:
+            with open(stale_path, "rb") as f:
+                data = f.read()
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # A third process holds the lock by now
+            return
+        except OSError as e:
+            self.log.warning(
+                "Failed to restore install lock %s: %s", self.path, e)
+            return
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+    def acquire(self, on_wait=None) -> None:
+        """Wait for the lock, `on_wait(owner)` is called on every poll.
+
+        Raises:
+            TimeoutError: If the lock isn't released within `timeout`.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        owner = {"host": socket.gethostname(), "pid": os.getpid()}
+        start = time.monotonic()
+        waiting = False
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                current = self.read_owner()
+                if self._is_stale(current):
+                    self._take_over_stale(current)
+                    continue
+                if not waiting:
+                    waiting = True
+                    self.log.info(
+                        "Waiting for install lock %s held by %s",
+                        self.path, current)
+                if on_wait:
+                    on_wait(current)
+                if time.monotonic() - start > self.timeout:
+                    raise TimeoutError(
+                        f"Timed out waiting for install lock {self.path}")
+                time.sleep(self.poll_interval)
+                continue
+            with os.fdopen(fd, "w") as f:
+                json.dump(dict(owner, time=time.time()), f)
+            self.locked = True
+            self._start_heartbeat()
+            return
+
+    def _start_heartbeat(self) -> None:
+        self._stop_heartbeat.clear()
+
+        def heartbeat():
+            while not self._stop_heartbeat.wait(self.heartbeat_interval):
+                try:
+                    os.utime(self.path)
+                except OSError as e:
+                    self.log.warning("Install lock heartbeat failed: %s", e)
+
+        self._heartbeat_thread = threading.Thread(
+            target=heartbeat, name="install-lock-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+    def release(self) -> None:
+        if not self.locked:
+            return
+        self.locked = False
+        self._stop_heartbeat.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            self.log.warning("Failed to remove install lock %s: %s", self.path, e)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -0,0 +1,77 @@
+"""Rolling launch hook timing statistics stored next to the rez install."""
+from __future__ import annotations
+import json
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+STATS_FILE_NAME = "launch_stats.json"
+# Samples kept per hook and request
+MAX_SAMPLES = 50
+
+
+def get_stats_path(rez_root: str) -> str:
+    return os.path.join(rez_root, STATS_FILE_NAME)
+
+
+def _load_stats(stats_path: str) -> dict:
+    if not os.path.exists(stats_path):
+        return {}
+    try:
+        with open(stats_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Failed to read launch stats %s: %s", stats_path, e)
+        return {}
+
+
+def record_launch_timings(
+    stats_path: str, hook: str, request: str, timings: dict[str, float]
+) -> None:
+    """Append a timing sample, only the last `MAX_SAMPLES` are kept."""
+    stats = _load_stats(stats_path)
+    key = f"{hook}|{request}"
+    samples = stats.setdefault(key, [])
+    samples.append({"time": time.time(), "timings": timings})
+    del samples[:-MAX_SAMPLES]
+
+    # write to a temp file first, parallel launches must not see half files
+    try:
+        os.makedirs(os.path.dirname(stats_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(stats_path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, stats_path)
+    except OSError as e:
+        logger.warning("Failed to write launch stats %s: %s", stats_path, e)
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    values = sorted(values)
+    index = round(percentile / 100 * (len(values) - 1))
+    return values[index]
+
+
+def get_launch_stats(stats_path: str) -> list[dict]:
+    """p50/p95 per hook, request and step in milliseconds."""
+    rows = []
+    for key, samples in sorted(_load_stats(stats_path).items()):
+        hook, request = key.split("|", 1)
+        steps: dict[str, list[float]] = {}
+        for sample in samples:
+            for step, seconds in sample["timings"].items():
+                steps.setdefault(step, []).append(seconds)
+        for step, values in steps.items():
+            rows.append({
+                "hook": hook,
+                "request": request,
+                "step": step,
+                "samples": len(values),
+                "p50": _percentile(values, 50) * 1000,
+                "p95": _percentile(values, 95) * 1000,
+            })
+    return rows
@@ -0,0 +1,14 @@
+"""Helpers shared between the tray addon and the launch hooks."""
+from platformdirs import user_data_dir
+
+DEFAULT_STUDIO_CODE = "ayon-rez"
+
+
+def get_studio_code(settings: dict) -> str:
+    """Studio code from studio or project settings."""
+    return settings.get("core", {}).get("studio_code") or DEFAULT_STUDIO_CODE
+
+
+def get_rez_root(studio_code: str) -> str:
+    """Local root folder of the rez installation and its caches."""
+    return user_data_dir(appname="rez", appauthor=studio_code)
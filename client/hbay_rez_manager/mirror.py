@@ -0,0 +1,248 @@
+"""Local mirror of the installer downloads for machines without internet.
+
+A mirror is a directory, served as is or over HTTP, with this layout::
+
+    index.json
+    python/cpython-<version>+<tag>-<target>-<flavor>.tar.<ext>
+    rez/rez-<version>.zip
+    graphviz/Graphviz-<version>-win64.zip
+    wheels/<wheel files>
+
+`index.json` maps versions to the files, so the installer resolves all
+downloads with a single read of the index::
+
+    {
+        "version": 1,
+        "python": {"<version>": {"<target>": {"path": ..., "sha256": ...}}},
+        "rez": {"<version>": {"path": ..., "sha256": ...}},
+        "graphviz": {"<version>": {"path": ..., "sha256": ...}},
+        "wheels": "wheels"
+    }
+
+Populate a mirror on a connected machine with::
+
+    python -m hbay_rez_manager.mirror <mirror dir> --python-version 3.13.11
+        --astral-tag 20260127 --rez-version 3.3.0 --graphviz-version 14.1.1
+        --dependencies PySide6==6.10.1 Qt.py==1.4.8
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+MIRROR_INDEX_NAME = "index.json"
+MIRROR_INDEX_VERSION = 1
+
+# python-build-standalone targets and the matching pip platform tags
+PYTHON_TARGET_PLATFORMS = {
+    "x86_64-pc-windows-msvc": ["win_amd64"],
+    "x86_64-unknown-linux-gnu": [
+        "manylinux_2_28_x86_64", "manylinux2014_x86_64"],
+    "aarch64-unknown-linux-gnu": [
+        "manylinux_2_28_aarch64", "manylinux2014_aarch64"],
+    "x86_64-apple-darwin": ["macosx_11_0_x86_64", "macosx_10_9_x86_64"],
+    "aarch64-apple-darwin": ["macosx_11_0_arm64"],
+}
+
+
+def get_file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class Mirror:
+    """Read access to a mirror directory or HTTP root.
+
+    Args:
+        root (str): Local directory, `file://` or `http(s)://` url.
+    """
+
+    def __init__(self, root: str, logger: logging.Logger = None):
+        self.log = logger or logging.getLogger(self.__class__.__name__)
+        if "://" in root:
+            self.url = root.rstrip("/")
+        else:
+            self.url = Path(root).resolve().as_uri()
+        self._index = None
+
+    @property
+    def local_root(self) -> str | None:
+        """Local directory of the mirror, None for HTTP mirrors."""
+        parsed = urllib.parse.urlparse(self.url)
+        if parsed.scheme != "file":
+            return None
+        return urllib.request.url2pathname(parsed.path)
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            url = f"{self.url}/{MIRROR_INDEX_NAME}"
+            try:
+                with urllib.request.urlopen(url, timeout=30) as resp:
+                    self._index = json.loads(resp.read().decode("utf-8"))
+            except (OSError, ValueError) as e:
+                raise RuntimeError(
+                    f"Failed to read mirror index {url}: {e}") from e
+            self.log.debug("Loaded mirror index %s", url)
+        return self._index
+
+    def _get_entry(self, entry: dict | None, label: str) -> tuple[str, str]:
+        if not entry:
+            raise RuntimeError(f"{label} is not available in mirror {self.url}")
+        return f"{self.url}/{entry['path']}", entry.get("sha256", "")
+
+    def get_python(self, version: str, target: str) -> tuple[str, str]:
+        """Url and sha256 of a python build."""
+        entry = self.index.get("python", {}).get(version, {}).get(target)
+        return self._get_entry(entry, f"Python {version} ({target})")
+
+    def get_rez(self, version: str) -> tuple[str, str]:
+        entry = self.index.get("rez", {}).get(version)
+        return self._get_entry(entry, f"Rez {version}")
+
+    def get_graphviz(self, version: str) -> tuple[str, str]:
+        entry = self.index.get("graphviz", {}).get(version)
+        return self._get_entry(entry, f"Graphviz {version}")
+
+    def get_wheels_location(self) -> str:
+        """Location for pip `--find-links`, a path for local mirrors."""
+        wheels = self.index.get("wheels", "wheels")
+        if self.local_root:
+            return os.path.join(self.local_root, wheels)
+        return f"{self.url}/{wheels}/"
+
+
+def _add_file(root: Path, path: Path) -> dict:
+    return {
+        "path": path.relative_to(root).as_posix(),
+        "sha256": get_file_sha256(str(path)),
+    }
+
+
+def populate_mirror(
+    root: str,
+    python_version: str,
+    rez_version: str,
+    graphviz_version: str,
+    dependencies: list[str],
+    astral_python_tag: str = "",
+    targets: list[str] = None,
+    logger: logging.Logger = None,
+) -> dict:
+    """Download everything the installer needs into a mirror directory.
+
+    Existing index entries of other versions are kept, files which are
+    already in the index are not downloaded again.
+
+    Returns:
+        dict: The written index.
+    """
+    from .constants import GRAPHVIZ_URL, REZ_URL
+    from .rez_installer import RezInstaller
+
+    log = logger or logging.getLogger(__name__)
+    root_path = Path(root).resolve()
+    index_path = root_path / MIRROR_INDEX_NAME
+    index = {"version": MIRROR_INDEX_VERSION, "wheels": "wheels"}
+    if index_path.exists():
+        index.update(json.loads(index_path.read_text()))
+
+    work_dir = tempfile.mkdtemp(prefix="rez-mirror-")
+    try:
+        # Only used for url resolution and downloads
+        installer = RezInstaller(
+            work_dir, rez_version, python_version, graphviz_version,
+            dependencies, astral_python_tag=astral_python_tag, logger=log,
+        )
+
+        python_entries = index.setdefault("python", {}).setdefault(
+            python_version, {})
+        for target in targets or list(PYTHON_TARGET_PLATFORMS):
+            if target in python_entries:
+                continue
+            url = installer._resolve_python_build_standalone_url(
+                python_version, target)
+            path = root_path / "python" / url.rsplit("/", 1)[-1]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            installer._download(url, str(path))
+            python_entries[target] = _add_file(root_path, path)
+
+        for key, version, url, name in (
+            ("rez", rez_version, REZ_URL.format(rez_version),
+             f"rez-{rez_version}.zip"),
+            ("graphviz", graphviz_version,
+             GRAPHVIZ_URL.format(graphviz_version),
+             f"Graphviz-{graphviz_version}-win64.zip"),
+        ):
+            entries = index.setdefault(key, {})
+            if not version or version in entries:
+                continue
+            path = root_path / key / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            installer._download(url, str(path))
+            entries[version] = _add_file(root_path, path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    wheels_dir = root_path / index["wheels"]
+    wheels_dir.mkdir(parents=True, exist_ok=True)
+    python_tag = ".".join(python_version.split(".")[:2])
+    for target in targets or list(PYTHON_TARGET_PLATFORMS):
+        if not dependencies:
+            break
+        cmd = [
+            sys.executable, "-m", "pip", "download",
+            "--dest", str(wheels_dir),
+            "--only-binary=:all:",
+            "--python-version", python_tag,
+        ]
+        for platform_tag in PYTHON_TARGET_PLATFORMS.get(target, []):
+            cmd += ["--platform", platform_tag]
+        log.info("Downloading wheels for %s", target)
+        subprocess.run(cmd + list(dependencies), check=True)
+
+    index_path.write_text(json.dumps(index, indent=4, sort_keys=True))
+    log.info("Wrote mirror index %s", index_path)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Populate a rez installer mirror for offline machines")
+    parser.add_argument("root", help="Mirror directory")
+    parser.add_argument("--python-version", required=True)
+    parser.add_argument("--astral-tag", default="")
+    parser.add_argument("--rez-version", required=True)
+    parser.add_argument("--graphviz-version", default="")
+    parser.add_argument("--dependencies", nargs="*", default=[])
+    parser.add_argument(
+        "--targets", nargs="*", choices=list(PYTHON_TARGET_PLATFORMS),
+        help="python-build-standalone targets, defaults to all")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    populate_mirror(
+        args.root,
+        args.python_version,
+        args.rez_version,
+        args.graphviz_version,
+        args.dependencies,
+        astral_python_tag=args.astral_tag,
+        targets=args.targets,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""Local index of rez package repositories on network shares.
+
+Every resolve lists the family and version folders of each `packages_path`
+entry and stats and reads `package.py` files, which means many small round
+trips on SMB/NFS shares. This module keeps a local copy of those listings
+and package definitions per repository in
+`<rez root>/cache/package_index/<key>`::
+
+    index.json
+    files/<family>/<version>/package.py
+
+`index.json` records the modification times of the repository and family
+folders::
+
+    {
+        "format": 1,
+        "location": "P:/pipe/rez/p-ext",
+        "mtime_ns": ...,
+        "refreshed": ...,
+        "families": {
+            "<family>": {"mtime_ns": ..., "versions": {"<version>": [
+                "package.py", size, mtime_ns]}, "ignored": {...}},
+            "<combined family>": {"ext": "py"}
+        }
+    }
+
+Refreshes are incremental, only families whose folder changed are listed
+again and only changed package files are copied. rez updates the family
+folder's modification time on every release, so that covers new and
+re-released versions.
+
+The `hbay_index` rez repository plugin in `rezplugins/` reads the index.
+`write_index_config` writes a rezconfig overlay which turns the indexed
+`packages_path` entries into `hbay_index@<path>` repositories. The plugin
+checks a family's folder modification time before it trusts its entry and
+lists the share like the `filesystem` repository for anything the index
+doesn't cover.
+"""
+from __future__ import annotations
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+from .install_lock import InstallLock
+
+INDEX_FORMAT = 1
+INDEX_NAME = "index.json"
+INDEX_LOCK_NAME = ".lock"
+INDEX_CONFIG_NAME = "rezconfig.py"
+REPOSITORY_TYPE = "hbay_index"
+PACKAGE_FILE_NAMES = ("package.py", "package.yaml")
+
+# rez.utils.formatting.PACKAGE_NAME_REGEX
+_PACKAGE_NAME_RE = re.compile(r"^[a-zA-Z_0-9](\.?[a-zA-Z0-9_]+)*\Z")
+_IGNORE_PREFIX = ".ignore"
+
+# Folder above `rezplugins`, rez's `plugin_path` entry
+PLUGIN_PATH = os.path.dirname(os.path.abspath(__file__))
+
+log = logging.getLogger(__name__)
+
+
+def get_index_root(rez_root: str) -> str:
+    return os.path.join(rez_root, "cache", "package_index")
+
+
+def get_index_folder(index_root: str, location: str) -> str:
+    key = os.path.normcase(os.path.normpath(location))
+    return os.path.join(
+        index_root, hashlib.sha256(key.encode("utf-8")).hexdigest()[:16])
+
+
+def get_config_literals(config_path: str) -> dict:
+    """Literal module level assignments of rezconfig.py files, not run.
+
+    That covers the configs rendered from the web config. Values built in
+    code, e.g. with `ModifyList`, are left out.
+
+    Args:
+        config_path (str): rezconfig.py or a `REZ_CONFIG_FILE` path list,
+            later files win.
+    """
+    literals = {}
+    for path in config_path.split(os.pathsep):
+        try:
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), path)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in tree.body:
+            if not isinstance(node, ast.Assign):
+                continue
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError:
+                continue
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    literals[target.id] = value
+    return literals
+
+
+def _expand_path(path: str) -> str:
+    return os.path.expanduser(os.path.expandvars(path))
+
+
+def _same_path(path_1: str, path_2: str) -> bool:
+    return (
+        os.path.normcase(os.path.normpath(path_1))
+        == os.path.normcase(os.path.normpath(path_2))
+    )
+
+
+def get_index_locations(config_path: str) -> list[str]:
+    """`packages_path` entries of rezconfig.py files worth indexing.
+
+    Entries of other repository types (`type@location`) and the local
+    packages path, which changes with every local build, are left out.
+    Entries of the index overlay count as their location.
+    """
+    literals = get_config_literals(config_path)
+    packages_path = literals.get("packages_path")
+    if not isinstance(packages_path, list):
+        return []
+    local_path = _expand_path(
+        literals.get("local_packages_path") or "~/packages")
+    locations = []
+    for path in packages_path:
+        if not isinstance(path, str):
+            continue
+        if path.startswith(f"{REPOSITORY_TYPE}@"):
+            path = path[len(REPOSITORY_TYPE) + 1:]
+        elif "@" in path:
+            continue
+        path = _expand_path(path)
+        if not _same_path(path, local_path):
+            locations.append(path)
+    return locations
+
+
+def _is_valid_package_name(name: str) -> bool:
+    return bool(_PACKAGE_NAME_RE.match(name))
+
+
+class PackageIndex:
+    """Index of a single package repository folder, see module docs."""
+
+    def __init__(self, location: str, folder: str, logger: logging.Logger = None):
+        self.location = location
+        self.folder = folder
+        self.log = logger or log
+        self.index_path = os.path.join(folder, INDEX_NAME)
+        self.files_folder = os.path.join(folder, "files")
+
+    def load(self) -> dict:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        if (
+            index.get("format") != INDEX_FORMAT
+            or index.get("location") != self.location
+        ):
+            index = {}
+        index.setdefault("families", {})
+        return index
+
+    def _write(self, index: dict) -> None:
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+
+    def _get_copy_path(self, family: str, version: str, filename: str) -> str:
+        return os.path.join(self.files_folder, family, version, filename)
+
+    def _copy_package_file(
+        self, source: str, family: str, version: str, filename: str
+    ) -> None:
+        path = self._get_copy_path(family, version, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, path)
+
+    def _scan_family(
+        self, path: str, name: str, mtime_ns: int, previous: dict | None,
+        stats: dict,
+    ) -> dict:
+        """List the versions of a family and copy changed package files."""
+        stats["scanned"] += 1
+        previous_files = {}
+        if previous:
+            previous_files.update(previous.get("versions") or {})
+            previous_files.update(previous.get("ignored") or {})
+
+        with os.scandir(path) as entries:
+            entries = list(entries)
+        names = {entry.name for entry in entries}
+        if any(filename in names for filename in PACKAGE_FILE_NAMES):
+            # Unversioned package, left to the share
+            return {"mtime_ns": mtime_ns, "versions": None}
+
+        versions = {}
+        ignored = {}
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            record = self._index_version(
+                entry.path, name, entry.name,
+                previous_files.get(entry.name), stats,
+            )
+            if record is None:
+                # Not a package (yet), e.g. still being released
+                continue
+            if _IGNORE_PREFIX + entry.name in names:
+                ignored[entry.name] = record
+            else:
+                versions[entry.name] = record
+        return {"mtime_ns": mtime_ns, "versions": versions, "ignored": ignored}
+
+    def _index_version(
+        self, path: str, family: str, version: str, previous: list | None,
+        stats: dict,
+    ) -> list | None:
+        for filename in PACKAGE_FILE_NAMES:
+            source = os.path.join(path, filename)
+            try:
+                stat = os.stat(source)
+            except OSError:
+                continue
+            record = [filename, stat.st_size, stat.st_mtime_ns]
+            if record != previous or not os.path.isfile(
+                self._get_copy_path(family, version, filename)
+            ):
+                self._copy_package_file(source, family, version, filename)
+                stats["copied"] += 1
+            return record
+        return None
+
+    def _remove_stale_copies(self, old: dict, new: dict) -> None:
+        for family, entry in old.items():
+            new_entry = new.get(family) or {}
+            if not new_entry.get("versions") and not new_entry.get("ignored"):
+                shutil.rmtree(
+                    os.path.join(self.files_folder, family), ignore_errors=True)
+                continue
+            old_versions = set(entry.get("versions") or {})
+            old_versions.update(entry.get("ignored") or {})
+            new_versions = set(new_entry.get("versions") or {})
+            new_versions.update(new_entry.get("ignored") or {})
+            for version in old_versions - new_versions:
+                shutil.rmtree(
+                    os.path.join(self.files_folder, family, version),
+                    ignore_errors=True,
+                )
+
+    def refresh(self, verify_files: bool = False) -> dict:
+        """Update the index from the share.
+
+        Args:
+            verify_files (bool): Also stat the package files of unchanged
+                families, picks up package files edited in place instead
+                of released.
+
+        Returns:
+            dict: Counts of `families`, `scanned` families and `copied`
+                package files.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        with InstallLock(
+            os.path.join(self.folder, INDEX_LOCK_NAME), logger=self.log
+        ):
+            return self._refresh(verify_files)
+
+    def _refresh(self, verify_files: bool) -> dict:
+        old_families = self.load()["families"]
+        stats = {"families": 0, "scanned": 0, "copied": 0}
+        # Taken before listing, a change during the scan marks it stale
+        root_mtime_ns = os.stat(self.location).st_mtime_ns
+        families = {}
+        with os.scandir(self.location) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or name == "settings.yaml":
+                    continue
+                if not entry.is_dir():
+                    stem, ext = os.path.splitext(name)
+                    if ext in (".py", ".yaml") and _is_valid_package_name(stem):
+                        families[stem] = {"ext": ext[1:]}
+                    continue
+                if not _is_valid_package_name(name):
+                    continue
+                mtime_ns = entry.stat().st_mtime_ns
+                previous = old_families.get(name)
+                if (
+                    previous
+                    and previous.get("mtime_ns") == mtime_ns
+                    and not verify_files
+                ):
+                    families[name] = previous
+                    continue
+                families[name] = self._scan_family(
+                    entry.path, name, mtime_ns, previous, stats)
+
+        self._remove_stale_copies(old_families, families)
+        self._write({
+            "format": INDEX_FORMAT,
+            "location": self.location,
+            "mtime_ns": root_mtime_ns,
+            "refreshed": time.time(),
+            "families": families,
+        })
+        stats["families"] = len(families)
+        return stats
+
+
+def refresh_package_indexes(
+    locations: list[str],
+    index_root: str,
+    verify_files: bool = False,
+    logger: logging.Logger = None,
+) -> dict[str, dict]:
+    """Refresh the index of every reachable location.
+
+    Returns:
+        dict[str, dict]: Location to its `PackageIndex.refresh` counts,
+            unreachable locations are left out.
+    """
+    logger = logger or log
+    results = {}
+    for location in locations:
+        if not os.path.isdir(location):
+            logger.debug("Package repository %s not reachable", location)
+            continue
+        index = PackageIndex(
+            location, get_index_folder(index_root, location), logger)
+        start = time.perf_counter()
+        results[location] = index.refresh(verify_files)
+        logger.debug(
+            "Indexed %s in %.2fs: %s",
+            location, time.perf_counter() - start, results[location],
+        )
+    return results
+
+
+def render_index_config(
+    index_root: str, packages_path: list[str], locations: list[str]
+) -> str:
+    """rezconfig overlay turning `locations` into indexed repositories."""
+    indexes = {
+        location: get_index_folder(index_root, location)
+        for location in locations
+    }
+    overlay_path = []
+    for path in packages_path:
+        if isinstance(path, str) and _expand_path(path) in indexes:
+            path = f"{REPOSITORY_TYPE}@{_expand_path(path)}"
+        overlay_path.append(path)
+    return (
+        "# Auto-generated package index overlay, loaded after the rez config\n"
+        f"plugin_path = ModifyList(append=[{PLUGIN_PATH!r}])\n"
+        f"packages_path = {overlay_path!r}\n"
+        "plugins = {\n"
+        "    'package_repository': {\n"
+        f"        {REPOSITORY_TYPE!r}: {{'indexes': {indexes!r}}},\n"
+        "    },\n"
+        "}\n"
+    )
+
+
+def write_index_config(index_root: str, config_path: str) -> str | None:
+    """Write the rezconfig overlay for the indexed locations of a config.
+
+    The overlay replaces `packages_path` of `config_path`, so it has to be
+    loaded after it (`REZ_CONFIG_FILE` is a path list, later files win).
+
+    Returns:
+        str | None: Path of the overlay, None if no location is indexed.
+    """
+    locations = get_index_locations(config_path)
+    if not locations:
+        return None
+    os.makedirs(index_root, exist_ok=True)
+    content = render_index_config(
+        index_root,
+        get_config_literals(config_path)["packages_path"],
+        locations,
+    )
+    path = os.path.join(index_root, INDEX_CONFIG_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == content:
+                return path
+    except OSError:
+        pass
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+    return path
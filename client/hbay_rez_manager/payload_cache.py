@@ -0,0 +1,140 @@
+"""Local copies of frequently launched packages from network repositories.
+
+Contexts put the package roots of the share on PATH and PYTHONPATH, a DCC
+start then imports thousands of files over SMB. With
+`rez_config_options/package_cache_enabled` the tray copies the payloads of
+the variants launched at least `package_cache_min_launches` times within
+`USAGE_WINDOW` to rez's package cache on local disk, in
+`<rez root>/cache/payload_cache`::
+
+    packages/     rez package cache (cache_packages_path)
+    usage.jsonl   variants of every launch, see `scripts/payload_ledger`
+    ledger.json   cached variants with content hash, size and last use
+    rezconfig.py  overlay enabling the package cache
+
+Launches read the cached roots through rez's package caching, resolves
+themselves don't write to the cache (`write_package_cache = False`), only
+the background sync in `scripts/package_cache_sync.py` does. The cache is
+kept below `package_cache_max_size` GB by evicting the least recently used
+variants.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import subprocess
+import time
+
+from .install_lock import InstallLock
+from .resolve_helper import get_script_command
+from .scripts import payload_ledger
+
+SYNC_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(payload_ledger.__file__)),
+    "package_cache_sync.py",
+)
+CACHE_CONFIG_NAME = "rezconfig.py"
+# Launches counted for the hot packages
+USAGE_WINDOW = 30 * 24 * 3600
+# Seconds between syncs in the tray
+SYNC_INTERVAL = 3600
+
+log = logging.getLogger(__name__)
+
+
+def get_payload_cache_root(rez_root: str) -> str:
+    return os.path.join(rez_root, "cache", "payload_cache")
+
+
+def get_packages_cache_path(cache_root: str) -> str:
+    return os.path.join(cache_root, "packages")
+
+
+def get_usage_path(cache_root: str) -> str:
+    return os.path.join(cache_root, "usage.jsonl")
+
+
+def get_ledger_path(cache_root: str) -> str:
+    return os.path.join(cache_root, "ledger.json")
+
+
+def render_cache_config(cache_root: str) -> str:
+    return (
+        "# Auto-generated package payload cache overlay\n"
+        f"cache_packages_path = {get_packages_cache_path(cache_root)!r}\n"
+        "read_package_cache = True\n"
+        "write_package_cache = False\n"
+    )
+
+
+def write_cache_config(cache_root: str) -> str:
+    """Write the rezconfig overlay enabling the package cache.
+
+    Returns:
+        str: Path of the overlay, to append to `REZ_CONFIG_FILE`.
+    """
+    os.makedirs(get_packages_cache_path(cache_root), exist_ok=True)
+    content = render_cache_config(cache_root)
+    path = os.path.join(cache_root, CACHE_CONFIG_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == content:
+                return path
+    except OSError:
+        pass
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+    return path
+
+
+def sync_payload_cache(
+    cache_root: str,
+    max_size: float,
+    min_launches: int,
+    env: dict = None,
+    logger: logging.Logger = None,
+) -> dict:
+    """Copy hot variants to the package cache and evict the coldest.
+
+    Args:
+        cache_root (str): See `get_payload_cache_root`.
+        max_size (float): Cache size limit in GB.
+        min_launches (int): Launches within `USAGE_WINDOW` that make a
+            variant hot.
+        env (dict): Environment of the `rez python` process, its
+            `REZ_CONFIG_FILE` has to include the cache overlay.
+
+    Returns:
+        dict: Counts of `added`, `updated`, `evicted`, `skipped` and
+            `failed` variants and the cache `size` in bytes.
+    """
+    logger = logger or log
+    usage_path = get_usage_path(cache_root)
+    with InstallLock(os.path.join(cache_root, ".lock"), logger=logger):
+        payload_ledger.compact_usage(usage_path, USAGE_WINDOW)
+        usage = payload_ledger.load_usage(usage_path, USAGE_WINDOW)
+        usage_file = os.path.join(cache_root, f"usage.{os.getpid()}.json")
+        with open(usage_file, "w") as f:
+            json.dump(list(usage.values()), f)
+        command = get_script_command(SYNC_SCRIPT, [
+            "--usage", usage_file,
+            "--ledger", get_ledger_path(cache_root),
+            "--min-launches", str(min_launches),
+            "--max-size", str(int(max_size * 1024 ** 3)),
+        ])
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(
+                command, env=env, check=True, capture_output=True, text=True,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        finally:
+            os.remove(usage_file)
+    report = json.loads(result.stdout.splitlines()[-1])
+    logger.debug(
+        "Synced package payload cache in %.1fs: %s",
+        time.perf_counter() - start, report,
+    )
+    return report
@@ -0,0 +1,219 @@
+"""Resolve the rez requests of all applications ahead of their launch.
+
+The tray collects `AYON_REZ_PACKAGES` of every application variant and tool
+from the applications settings and resolves them in parallel rez processes.
+The contexts land in the resolve cache `PreLaunchSetRezEnv` reads from, so
+a launch only has to load an already resolved context.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .resolve_helper import (
+    RESOLVE_ENV_KEYS,
+    get_context_cache_dir,
+    get_context_cache_path,
+    get_request_key,
+    get_resolve_base_key,
+    get_resolve_command,
+    is_context_fresh,
+    parse_rez_packages,
+)
+
+REZ_PACKAGES_KEY = "AYON_REZ_PACKAGES"
+
+log = logging.getLogger(__name__)
+
+
+def _get_env_value(environment, key: str, platform_name: str):
+    """Value of `key` in an application environment setting."""
+    if isinstance(environment, str):
+        try:
+            environment = json.loads(environment or "{}")
+        except ValueError:
+            return None
+    if not isinstance(environment, dict):
+        return None
+    value = environment.get(key)
+    if isinstance(value, dict):
+        value = value.get(platform_name)
+    if isinstance(value, list):
+        value = os.pathsep.join(value)
+    return value or None
+
+
+def _iter_setting_groups(applications_settings: dict):
+    applications = applications_settings.get("applications", {})
+    for name, group in applications.items():
+        if name == "additional_apps":
+            yield from group or []
+        elif isinstance(group, dict):
+            yield group
+    yield from applications_settings.get("tool_groups", []) or []
+
+
+def _get_resolve_env(
+    sources: list[dict], platform_name: str, env: dict
+) -> dict[str, str]:
+    """Variables changing the resolve in the environment of a launch.
+
+    Values of the group and variant environment replace the tray value,
+    `{KEY}` in them is replaced by the previous value.
+    """
+    resolve_env = {}
+    for key in RESOLVE_ENV_KEYS:
+        value = env.get(key, "")
+        for source in sources:
+            source_value = _get_env_value(
+                source.get("environment"), key, platform_name)
+            if source_value:
+                value = source_value.replace("{%s}" % key, value)
+        if value:
+            resolve_env[key] = value
+    return resolve_env
+
+
+def collect_rez_requests(
+    applications_settings: dict, env: dict = None
+) -> list[tuple[list[str], dict[str, str]]]:
+    """Unique rez requests of all enabled application variants and tools.
+
+    A variant value replaces the group value, `{AYON_REZ_PACKAGES}` in it is
+    replaced by the group value. Each request comes with the
+    `RESOLVE_ENV_KEYS` its launch has, based on `env` (the tray
+    environment by default), so pre-resolved contexts get the key the
+    launch hook looks up.
+    """
+    env = os.environ if env is None else env
+    platform_name = platform.system().lower()
+    requests = {}
+    for group in _iter_setting_groups(applications_settings):
+        if not isinstance(group, dict) or group.get("enabled") is False:
+            continue
+        group_value = _get_env_value(
+            group.get("environment"), REZ_PACKAGES_KEY, platform_name)
+        variants = group.get("variants") or []
+        values = [] if variants else [(group_value, [group])]
+        for variant in variants:
+            value = _get_env_value(
+                variant.get("environment"), REZ_PACKAGES_KEY, platform_name)
+            if value:
+                value = value.replace(
+                    "{%s}" % REZ_PACKAGES_KEY, group_value or "")
+            values.append((value or group_value, [group, variant]))
+
+        for value, sources in values:
+            packages = parse_rez_packages(value or "")
+            if not packages:
+                continue
+            resolve_env = _get_resolve_env(sources, platform_name, env)
+            key = (tuple(packages), tuple(sorted(resolve_env.items())))
+            requests.setdefault(key, (packages, resolve_env))
+    return list(requests.values())
+
+
+def prune_context_cache(rez_root: str, max_age: float) -> int:
+    """Remove cached contexts older than `max_age` seconds."""
+    removed = 0
+    cache_dir = get_context_cache_dir(rez_root)
+    if not os.path.isdir(cache_dir):
+        return removed
+    now = time.time()
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > max_age:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _resolve_to_cache(
+    packages: list[str],
+    cache_path: str,
+    max_age: float,
+    base_key: str,
+    env: dict,
+) -> tuple[int, str]:
+    command = get_resolve_command([
+        "--context-cache", cache_path,
+        "--max-age", str(max_age),
+        "--cache-base", base_key,
+        "--no-environ",
+    ] + packages)
+    process = subprocess.run(
+        command,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    return process.returncode, process.stderr.decode("utf-8", "replace")
+
+
+def pre_resolve_requests(
+    requests: list[tuple[list[str], dict[str, str]]],
+    rez_root: str,
+    ttl_hours: float,
+    workers: int = 4,
+    env: dict = None,
+    logger: logging.Logger = None,
+) -> dict:
+    """Resolve requests into the context cache, skips fresh entries.
+
+    Args:
+        requests (list[tuple[list[str], dict[str, str]]]): Packages and
+            resolve variables, see `collect_rez_requests`.
+
+    Returns:
+        dict: Amount of `resolved`, `cached` and `failed` requests.
+    """
+    logger = logger or log
+    env = dict(os.environ if env is None else env)
+    max_age = ttl_hours * 3600
+    prune_context_cache(rez_root, max_age)
+
+    result = {"resolved": 0, "cached": 0, "failed": 0}
+    pending = []
+    for packages, resolve_env in requests:
+        request_env = dict(env, **resolve_env)
+        base_key = get_resolve_base_key(request_env)
+        cache_path = get_context_cache_path(
+            rez_root, get_request_key(packages, request_env, base_key))
+        if is_context_fresh(cache_path, max_age):
+            result["cached"] += 1
+        else:
+            pending.append((packages, cache_path, base_key, request_env))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            (packages, executor.submit(
+                _resolve_to_cache, packages, cache_path, max_age, base_key,
+                request_env))
+            for packages, cache_path, base_key, request_env in pending
+        ]
+        for packages, future in futures:
+            try:
+                returncode, stderr = future.result()
+            except OSError as e:
+                returncode, stderr = 1, str(e)
+            if returncode == 0:
+                result["resolved"] += 1
+            else:
+                result["failed"] += 1
+                logger.warning(
+                    "Pre-resolve failed for %s: %s",
+                    " ".join(packages), stderr.strip())
+
+    logger.info(
+        "Pre-resolved %d rez requests in %.2fs: %s",
+        len(requests), time.perf_counter() - start, result)
+    return result
@@ -2,7 +2,9 @@ from qtpy import QtCore, QtWidgets, QtGui
 from ayon_core import style
 
 class ProgressSignalWrapper(QtCore.QObject):
+    """Runs a controller, e.g. `AsyncInstallEngine`, in a worker thread."""
     progress_changed = QtCore.Signal(int, str)
+    failed = QtCore.Signal(str)
     finished = QtCore.Signal()
 
     def __init__(self, controller):
@@ -12,8 +14,18 @@ class ProgressSignalWrapper(QtCore.QObject):
 
     @QtCore.Slot()
     def run(self):
-        self.controller.run()
-        self.finished.emit()
+        try:
+            self.controller.run()
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self.finished.emit()
+
+    def cancel(self):
+        """Called directly from the GUI thread, `run` blocks the worker."""
+        cancel = getattr(self.controller, "cancel", None)
+        if cancel:
+            cancel()
 
 class ProgressBarDialog(QtWidgets.QDialog):
     def __init__(self, worker: ProgressSignalWrapper, window_title: str = "Installing...", parent=None):
@@ -32,14 +44,49 @@ class ProgressBarDialog(QtWidgets.QDialog):
         self.progress_bar.setRange(0, 100)
         layout.addWidget(self.progress_bar)
 
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel)
+        layout.addWidget(self.cancel_button, 0, QtCore.Qt.AlignRight)
+
+        # Message of a failed or cancelled run
+        self.error = None
+        self._finished = False
+
         # Connect signals from worker
         self.worker.progress_changed.connect(self.update_progress)
-        self.worker.finished.connect(self.accept)  # close dialog when done
+        self.worker.failed.connect(self._on_failed)
+        self.worker.finished.connect(self._on_finished)
 
     @QtCore.Slot(int, str)
     def update_progress(self, progress, message):
-        self.progress_bar.setValue(progress)
-        self.label.setText(message)
+        if self.cancel_button.isEnabled():
+            self.progress_bar.setValue(progress)
+            self.label.setText(message)
+
+    @QtCore.Slot()
+    def cancel(self):
+        if not self.cancel_button.isEnabled():
+            return
+        self.cancel_button.setEnabled(False)
+        self.label.setText("Cancelling...")
+        self.worker.cancel()
+
+    @QtCore.Slot(str)
+    def _on_failed(self, message):
+        self.error = message
+
+    @QtCore.Slot()
+    def _on_finished(self):
+        self._finished = True
+        self.accept()  # close dialog when done
+
+    def reject(self):
+        # Escape and the close button cancel, the dialog closes once the
+        # worker stopped
+        if self._finished:
+            super().reject()
+        else:
+            self.cancel()
 
     def showEvent(self, event):
         super().showEvent(event)
@@ -50,4 +97,39 @@ class ProgressBarDialog(QtWidgets.QDialog):
             self.resize(500, 100)
             current_pos = self.pos()
             new_pos = QtCore.QPoint(current_pos.x(), current_pos.y() - 300)
-            self.move(new_pos)
\ No newline at end of file
+            self.move(new_pos)
+
+
+class LaunchStatsDialog(QtWidgets.QDialog):
+    """Table of launch hook timings collected by `launch_stats`."""
+    columns = ("hook", "request", "step", "samples", "p50", "p95")
+
+    def __init__(self, rows: list, parent=None):
+        super().__init__(parent=parent)
+        self.setWindowTitle("Rez Launch Stats")
+        self._first_show = True
+        layout = QtWidgets.QVBoxLayout(self)
+
+        if not rows:
+            layout.addWidget(QtWidgets.QLabel("No launches recorded yet."))
+            return
+
+        table = QtWidgets.QTableWidget(len(rows), len(self.columns))
+        table.setHorizontalHeaderLabels(
+            ["Hook", "Request", "Step", "Samples", "p50 (ms)", "p95 (ms)"])
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        for row, item in enumerate(rows):
+            for column, key in enumerate(self.columns):
+                value = item[key]
+                if isinstance(value, float):
+                    value = f"{value:.1f}"
+                table.setItem(row, column, QtWidgets.QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._first_show:
+            self._first_show = False
+            self.setStyleSheet(style.load_stylesheet())
+            self.resize(800, 400)
@@ -0,0 +1,229 @@
+"""Helpers to run rez resolves in a subprocess and cache their contexts."""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import time
+
+from .scripts import context_diff, env_transport
+
+# Executed in rez python to resolve the environment
+RESOLVE_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(env_transport.__file__)), "rez_resolve.py")
+
+# Variables which change the outcome of a resolve
+RESOLVE_ENV_KEYS = ("REZ_PACKAGES_PATH", "REZ_PACKAGE_FILTER")
+
+
+def parse_rez_packages(value: str) -> list[str]:
+    """Split an `AYON_REZ_PACKAGES` value into package requests."""
+    return [package.strip() for package in value.split(os.pathsep)
+            if package.strip()]
+
+
+def get_script_command(script: str, script_args: list[str]) -> list[str]:
+    """Command running a script in rez python."""
+    python_cmd = (
+        "import runpy,sys;"
+        f"sys.argv={[script] + list(script_args)!r};"
+        f"runpy.run_path({script!r}, run_name='__main__')"
+    )
+    return ["rez", "python", "-c", python_cmd]
+
+
+def get_resolve_command(script_args: list[str]) -> list[str]:
+    """Command running the resolve script in rez python."""
+    return get_script_command(RESOLVE_SCRIPT, script_args)
+
+
+def get_context_cache_dir(rez_root: str) -> str:
+    return os.path.join(rez_root, "cache", "contexts")
+
+
+def _get_file_hash(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def get_resolve_base_key(env: dict[str, str]) -> str:
+    """Hash of everything besides the request that affects the resolve."""
+    config_path = env.get("REZ_CONFIG_FILE", "")
+    data = {
+        "platform": platform.system().lower(),
+        "config": [_get_file_hash(path) for path in config_path.split(
+            os.pathsep) if path],
+        "env": {key: env.get(key, "") for key in RESOLVE_ENV_KEYS},
+    }
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_request_key(
+    packages: list[str], env: dict[str, str], base_key: str = None
+) -> str:
+    """Hash of the request and everything in env that affects the resolve.
+
+    Pass `base_key` if it was already computed by `get_resolve_base_key`.
+    """
+    data = {
+        "packages": list(packages),
+        "base": base_key or get_resolve_base_key(env),
+    }
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_context_cache_path(rez_root: str, request_key: str) -> str:
+    return os.path.join(get_context_cache_dir(rez_root), f"{request_key}.rxt")
+
+
+def get_request_info_path(context_path: str) -> str:
+    """Request of a cached context, written by the resolve script."""
+    return f"{os.path.splitext(context_path)[0]}.json"
+
+
+def is_context_fresh(path: str, max_age: float) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) <= max_age
+    except OSError:
+        return False
+
+
+def find_neighbour_context(
+    rez_root: str,
+    packages: list[str],
+    base_key: str,
+    max_age: float,
+    max_changes: int = 1,
+) -> tuple[str, list[str]] | None:
+    """Cached context of the most similar request.
+
+    Only requests resolved with the same `base_key` (config, platform and
+    env) are compared. The request with the fewest changed package
+    families wins, the younger context on a tie.
+
+    Returns:
+        tuple[str, list[str]] | None: Context path and its request, None if
+            no cached request has at most `max_changes` changed families.
+    """
+    cache_dir = get_context_cache_dir(rez_root)
+    best = None
+    try:
+        entries = list(os.scandir(cache_dir))
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path) as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if info.get("base") != base_key:
+            continue
+        other = info.get("packages") or []
+        changes = len(context_diff.get_changed_families(packages, other))
+        if not 0 < changes <= max_changes:
+            continue
+        context_path = f"{os.path.splitext(entry.path)[0]}.rxt"
+        try:
+            mtime = os.path.getmtime(context_path)
+        except OSError:
+            continue
+        if time.time() - mtime > max_age:
+            continue
+        if best is None or (changes, -mtime) < best[0]:
+            best = ((changes, -mtime), context_path, other)
+    if best is None:
+        return None
+    return best[1], best[2]
+
+
+def get_failure_cache_path(rez_root: str, request_key: str) -> str:
+    return os.path.join(
+        rez_root, "cache", "failures", f"{request_key}.json")
+
+
+def load_failure(path: str, max_age: float) -> dict | None:
+    """Cached failure of a request if it is younger than `max_age` seconds."""
+    try:
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def render_fail_graph(graph_path: str, env: dict[str, str]) -> str | None:
+    """Render a dot fail graph to svg in the background.
+
+    Uses the Graphviz `dot` found on PATH of `env`, the tray adds the one
+    installed with rez. The render isn't waited for.
+
+    Returns:
+        str | None: Path of the svg file if rendering was started.
+    """
+    dot = shutil.which("dot", path=env.get("PATH"))
+    if not dot or not graph_path or not os.path.exists(graph_path):
+        return None
+    output_path = f"{os.path.splitext(graph_path)[0]}.svg"
+    try:
+        subprocess.Popen(
+            [dot, "-Tsvg", "-o", output_path, graph_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    except OSError:
+        return None
+    return output_path
+
+
+def start_background_resolve(
+    cache_path: str,
+    base_key: str,
+    packages: list[str],
+    env: dict[str, str],
+) -> subprocess.Popen | None:
+    """Resolve a request from scratch into the context cache.
+
+    Replaces a launch's context pinned to a neighbour's versions with the
+    full resolve for the next launches. Not waited for.
+
+    Returns:
+        subprocess.Popen | None: The resolve process if it was started.
+    """
+    command = get_resolve_command([
+        "--context-cache", cache_path,
+        "--cache-base", base_key,
+        "--no-environ",
+    ] + list(packages))
+    try:
+        return subprocess.Popen(
+            command,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    except OSError:
+        return None
+
+
+def get_fail_graph_file(failure: dict) -> str | None:
+    """Rendered fail graph if it exists, the dot file otherwise."""
+    graph_path = failure.get("graph")
+    if not graph_path:
+        return None
+    svg_path = f"{os.path.splitext(graph_path)[0]}.svg"
+    if os.path.exists(svg_path):
+        return svg_path
+    return graph_path if os.path.exists(graph_path) else None
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 from pathlib import Path
 import os
@@ -28,12 +29,58 @@ def _update_python_config(config_path, config_dict):
     logger.info(f"Updated Python config at {config_path}")
 
 
-def manage_rez_config_from_settings(rez_config_settings):
+def _write_rendered_config(config_path, rendered, rendered_hash):
+    """Write server rendered config content if the hash doesn't match."""
+    config_path_obj = Path(config_path)
+    if config_path_obj.exists():
+        existing_hash = hashlib.sha256(config_path_obj.read_bytes()).hexdigest()
+        if existing_hash == rendered_hash:
+            logger.debug("Python config matches server hash, no update needed")
+            return
+
+    config_path_obj.write_bytes(rendered.encode("utf-8"))
+    logger.info(f"Updated Python config at {config_path}")
+
+
+def manage_rez_config_from_settings(rez_config_settings, rez_root=None):
     """Manage Rez configuration based on settings.
 
     This function handles the configuration of Rez based on the settings provided.
     It supports different types of configuration sources: config_file, config_web, and config_envvar.
+
+    With `rez_root`, the overlays of the enabled package index and package
+    payload cache are appended and the result is a `REZ_CONFIG_FILE` path
+    list, later files win.
     """
+    rez_config_path = _get_rez_config_path(rez_config_settings)
+    if not rez_config_path or not rez_root:
+        return rez_config_path
+
+    overlays = []
+    try:
+        if rez_config_settings.get("package_index_enabled", False):
+            from .package_index import get_index_root, write_index_config
+
+            overlays.append(write_index_config(
+                get_index_root(rez_root), rez_config_path))
+        if rez_config_settings.get("package_cache_enabled", False):
+            from .payload_cache import (
+                get_payload_cache_root,
+                write_cache_config,
+            )
+
+            overlays.append(write_cache_config(
+                get_payload_cache_root(rez_root)))
+    except OSError as e:
+        logger.warning(f"Failed to write the rez config overlays: {e}")
+        return rez_config_path
+    overlays = [path for path in overlays if path]
+    if overlays:
+        logger.info(f"Using rez config overlays: {overlays}")
+    return os.pathsep.join([rez_config_path] + overlays)
+
+
+def _get_rez_config_path(rez_config_settings):
 
     config_type = rez_config_settings.get("config_type", "config_web")
     rez_config_path = None
@@ -53,6 +100,15 @@ def manage_rez_config_from_settings(rez_config_settings):
             webconfig_dir.mkdir(exist_ok=True)
             rez_config_path = str(webconfig_dir / "rezconfig.py")
 
+            # Server renders and validates the config on save, older
+            # settings without the rendered content fall back to parsing
+            rendered = rez_config_settings.get("config_web_rendered")
+            rendered_hash = rez_config_settings.get("config_web_hash")
+            if rendered and rendered_hash:
+                _write_rendered_config(rez_config_path, rendered, rendered_hash)
+                logger.info(f"Using config_web, generated: {rez_config_path}")
+                return rez_config_path
+
             # Parse JSON and convert to Python config
             try:
                 config_dict = json.loads(config_json)
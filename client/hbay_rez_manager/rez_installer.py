@@ -4,18 +4,45 @@ import logging
 import os
 import platform
 import shutil
+import socket
 import subprocess
+import sys
 import tarfile
 import tempfile
+import threading
 import time
 import urllib
 import urllib.request
+import uuid
 import zipfile
 from pathlib import Path
 
 import zstandard as zstd
 
-from .constants import GRAPHVIZ_URL, REZ_URL, ASTRAL_PYTHON_DOWNLOAD_ROOT, ASTRAL_PYTHON_TAGS
+from .bytecode import compile_bytecode
+from .bundle_delta import (
+    find_previous_bundle,
+    seed_from_previous_bundle,
+    write_bundle_manifest,
+)
+from .constants import GRAPHVIZ_URL, REZ_URL, ASTRAL_PYTHON_DOWNLOAD_ROOT, ASTRAL_PYTHON_TAGS, TRACE_FILE_ENV
+from .dedup_store import DedupStore, link_or_copy
+from .install_lock import InstallLock
+from .mirror import Mirror, get_file_sha256
+from .tracing import Tracer
+from .wheelhouse import Wheelhouse
+
+
+# Lock and progress file of the running install in the root
+INSTALL_LOCK_NAME = ".install.lock"
+INSTALL_PROGRESS_NAME = ".install.progress.json"
+# Manifest record of the live bundle and its rollback target, the other
+# manifest keys are the entries per bundle version
+ACTIVE_BUNDLE_KEY = "active"
+
+
+class InstallCancelled(Exception):
+    """The install was stopped through `RezInstaller.cancel`."""
 
 
 class RezInstaller:
@@ -29,8 +56,19 @@ class RezInstaller:
         dependencies: list,
         astral_python_tag: str = "",
         logger: logging.Logger = None,
+        trace_path: str = None,
+        mirror_root: str = "",
+        shared: bool = False,
+        use_wheelhouse: bool = False,
     ):
         self.log = logger or logging.getLogger(self.__class__.__name__)
+        # Root is shared between hosts, see `shared_install`
+        self.shared = shared
+        self.tracer = Tracer(self.log)
+        # Offline mode, all downloads come from the mirror, see `mirror`
+        self.mirror = Mirror(mirror_root, self.log) if mirror_root else None
+        # Chrome trace of the install, can also be enabled through env
+        self.trace_path = trace_path or os.environ.get(TRACE_FILE_ENV)
         self.root_folder = root
         self.rez_version = rez_version
         self.python_version = python_version
@@ -43,22 +81,24 @@ class RezInstaller:
         self.python = None
         self.root_folder = os.path.normpath(self.root_folder)
         self.python_folder = os.path.join(self.root_folder, "source", "python")
-        self.rez_folder = os.path.join(
-            self.root_folder,
-            "source",
-            "rez",
-            f"{self.python_version}-{self.rez_version}",
-        )
+        self.rez_source_folder = os.path.join(self.root_folder, "source", "rez")
         self.bundle_version = f"{self.python_version}-{self.rez_version}"
+        # Versions of the settings, a rollback replaces the ones above
+        self._requested = self._get_requested()
         self.manifest_path = os.path.join(
             self.root_folder, "rez_installed.json"
         )
-        self.installed = self.load_manifest()
-        # Use platform-appropriate bin directory
-        system = platform.system().lower()
-        bin_dir = "Scripts" if system == "windows" else "bin"
-        self.rez_path_folder = os.path.join(self.rez_folder, bin_dir, "rez")
-        for i in [self.rez_folder, self.python_folder]:
+        # Wheels shared by all bundles, see `wheelhouse`
+        self.use_wheelhouse = use_wheelhouse
+        self.wheelhouse = Wheelhouse(
+            os.path.join(self.root_folder, "wheelhouse"), self.log
+        )
+        self._wheelhouse_ready = False
+        # Bundles are built in a new folder and activated by pointing the
+        # manifest to it, see `_activate_bundle`
+        self._staging = False
+        self._reload_manifest()
+        for i in [self.rez_source_folder, self.python_folder]:
             if not os.path.isdir(i):
                 try:
                     os.makedirs(i, exist_ok=True)
@@ -66,75 +106,118 @@ class RezInstaller:
                     pass
         self.__garbage = []
         self.progress_callback = None
+        self._progress_path = None
+        # Set from other threads, checked between download blocks, lock
+        # polls and retries
+        self.cancel_event = threading.Event()
+
+    @classmethod
+    def from_settings(
+        cls, root: str, install_settings: dict, **kwargs
+    ) -> RezInstaller:
+        """Create an installer from the `rez_install_options` settings."""
+        return cls(
+            root,
+            install_settings.get("rez_version"),
+            install_settings.get("rez_python_version"),
+            install_settings.get("graphviz_version"),
+            json.loads(
+                install_settings.get("additional_dependencies_pip") or "[]"
+            ),
+            astral_python_tag=install_settings.get("astral_python_tag", ""),
+            mirror_root=install_settings.get("mirror_root", ""),
+            use_wheelhouse=install_settings.get("wheelhouse_enabled", True),
+            **kwargs,
+        )
 
-    def get_python(self) -> None:
-        """Installs Python if not already installed."""
-        # Determine Python executable path based on platform
-        system = platform.system().lower()
-        if system == "windows":
-            python_exe = os.path.join(
-                self.python_folder,
-                f"python-{self.python_version}",
-                "install",
-                "python.exe",
-            )
-        else:
-            python_exe = os.path.join(
-                self.python_folder,
-                f"python-{self.python_version}",
-                "install",
-                "bin",
-                "python3",
-            )
-
-        if not self._should_install(
+    def _get_python_exe(self) -> str:
+        python_folder = os.path.join(
+            self.python_folder, f"python-{self.python_version}", "install"
+        )
+        if platform.system().lower() == "windows":
+            return os.path.join(python_folder, "python.exe")
+        return os.path.join(python_folder, "bin", "python3")
+
+    def _use_installed_python(self) -> bool:
+        """Point to the installed python, False if it needs an install."""
+        python_exe = self._get_python_exe()
+        if self._should_install(
             "python_version", self.python_version
-        ) or os.path.exists(python_exe):
-            self.log.info(
-                "Python %s already found on disk or manifest, skipping installation.",
-                self.python_version,
-            )
-            self.python = python_exe
-            if self.installed.get("python_version") != self.python_version:
-                self.write_manifest("python_version", self.python_version)
-            return
-
-        try:
-            target = self._get_platform_target()
+        ) and not os.path.exists(python_exe):
+            return False
+        self.log.info(
+            "Python %s already found on disk or manifest, skipping installation.",
+            self.python_version,
+        )
+        self.python = python_exe
+        if (self.installed or {}).get("python_version") != self.python_version:
+            self.write_manifest("python_version", self.python_version)
+        return True
+
+    def _get_python_source(self) -> tuple[str, str | None]:
+        """Url and, for mirrors, sha256 of the python build."""
+        target = self._get_platform_target()
+        if self.mirror:
+            return self.mirror.get_python(self.python_version, target)
+        # Resolve correct URL dynamically instead of hardcoding the date tag (e.g. 20240814)
+        url = self._resolve_python_build_standalone_url(
+            self.python_version, target
+        )
+        return url, None
 
-            # Resolve correct URL dynamically instead of hardcoding the date tag (e.g. 20240814)
-            python_build_url = self._resolve_python_build_standalone_url(
-                self.python_version, target
-            )
+    def _get_python_archive_path(self, url: str) -> str:
+        temp_folder = tempfile.mkdtemp(prefix="python-")
+        python_archive = os.path.join(
+            temp_folder, "python.tar." + url.split(".")[-1]
+        )
+        self.__garbage.append(python_archive)
+        return python_archive
 
-            temp_folder = tempfile.mkdtemp(prefix="python-")
-            python_archive = os.path.join(
-                temp_folder, "python.tar." + python_build_url.split(".")[-1]
-            )
+    def _install_python(self, python_archive: str) -> None:
+        """Extract next to the target and rename it in place when complete."""
+        staging_folder = tempfile.mkdtemp(
+            prefix=".staging-", dir=self.python_folder
+        )
+        self.__garbage.append(staging_folder)
+        self.log.info("Extracting Python to %s", staging_folder)
 
-            self.log.info("Downloading Python from %s", python_build_url)
-            urllib.request.urlretrieve(python_build_url, python_archive)
-            self.__garbage.append(python_archive)
+        with self.tracer.span(
+            "extract",
+            archive=os.path.basename(python_archive),
+            bytes=os.path.getsize(python_archive),
+        ):
+            self._extract_archive(Path(python_archive), Path(staging_folder))
 
-            self.log.info("Extracting Python to %s", self.python_folder)
+        extracted_folder = os.path.join(staging_folder, "python")
+        target_folder = os.path.join(
+            self.python_folder, f"python-{self.python_version}"
+        )
+        if os.path.exists(extracted_folder):
+            if os.path.exists(target_folder):
+                # Incomplete install of the same version, moved aside and
+                # removed with the staging folder after the swap
+                os.rename(
+                    target_folder, os.path.join(staging_folder, "replaced"))
+            os.rename(extracted_folder, target_folder)
 
-            self._extract_archive(
-                Path(python_archive), Path(self.python_folder)
-            )
+        self.python = self._get_python_exe()
+        self.log.info("Installed Python to %s", self.python)
 
-            extracted_folder = os.path.join(self.python_folder, "python")
-            target_folder = os.path.join(
-                self.python_folder, f"python-{self.python_version}"
-            )
-            if os.path.exists(extracted_folder):
-                if os.path.exists(target_folder):
-                    shutil.rmtree(target_folder)
-                shutil.move(extracted_folder, target_folder)
+    def get_python(self) -> None:
+        """Installs Python if not already installed."""
+        if self._use_installed_python():
+            return
 
-            self.python = python_exe
-            self.log.info("Installed Python to %s", self.python)
+        try:
+            python_build_url, sha256 = self._get_python_source()
+            python_archive = self._get_python_archive_path(python_build_url)
+            self.log.info("Downloading Python from %s", python_build_url)
+            self._download(python_build_url, python_archive, sha256)
+            self._install_python(python_archive)
             self.write_manifest("python_version", self.python_version)
 
+        except InstallCancelled:
+            raise
         except Exception as e:
             self.log.exception(e)
             self.errors.append("python install failed")
@@ -154,8 +237,15 @@ class RezInstaller:
                     self.log.info("removed tempfile %s", i)
 
     def write_manifest(self, key: str = None, value: any = None) -> None:
-        """Writes or updates the manifest file."""
-        manifest = self.load_manifest() or {}
+        """Writes or updates the manifest file.
+
+        While a bundle is staged the changes are only kept in memory, they
+        are written with the activation of the bundle.
+        """
+        if self._staging:
+            manifest = dict(self.installed or {})
+        else:
+            manifest = self.load_manifest() or {}
 
         if key and value:
             manifest[key] = value
@@ -170,32 +260,225 @@ class RezInstaller:
                 }
             )
 
+        if self._staging:
+            self.installed = manifest
+            return
+        self._write_bundle_entry(manifest, key if key else "all")
+
+    def _write_bundle_entry(
+        self, manifest: dict, label: str, active: dict = None
+    ) -> None:
+        """Replace the current bundle's manifest entry atomically.
+
+        With `active` the `ACTIVE_BUNDLE_KEY` record is replaced as well.
+        """
+        entries = {self.bundle_version: manifest}
+        if active is not None:
+            entries[ACTIVE_BUNDLE_KEY] = active
+        if self._update_manifest_file(entries, label):
+            # Update local cache
+            self.installed = manifest
+
+    def _update_manifest_file(self, entries: dict, label: str) -> bool:
+        """Replace top level entries of the manifest file atomically."""
         try:
             # Load the full file content first, not just the bundle-specific part
-            full_manifest_data = {}
-            if os.path.exists(self.manifest_path):
-                with open(self.manifest_path, "r") as f:
-                    try:
-                        full_manifest_data = json.load(f)
-                    except json.JSONDecodeError:
-                        full_manifest_data = {}
-
-            # Update ONLY the current bundle's entry within the full data
-            full_manifest_data[self.bundle_version] = manifest
+            full_manifest_data = self._load_manifest_data()
+            full_manifest_data.update(entries)
 
-            with open(self.manifest_path, "w") as f:
+            temp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
                 json.dump(full_manifest_data, f, indent=4)
+            os.replace(temp_path, self.manifest_path)
 
             self.log.info(
-                "Manifest updated for %s: %s",
-                self.bundle_version,
-                key if key else "all",
+                "Manifest updated for %s: %s", self.bundle_version, label
             )
-            # Update local cache
-            self.installed = manifest
+            return True
 
         except Exception as e:
             self.log.error("Failed to write manifest: %s", e)
+            return False
+
+    def _load_manifest_data(self) -> dict:
+        """All entries of the manifest file, empty if missing or broken."""
+        try:
+            with open(self.manifest_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _get_requested(self) -> dict:
+        return {
+            "rez_version": self.rez_version,
+            "python_version": self.python_version,
+            "graphviz_version": self.graphviz_version,
+            "dependencies": list(self.dependencies),
+        }
+
+    def _is_requested(self, versions: dict) -> bool:
+        """True if `versions` are the ones of the settings."""
+        return all(
+            versions.get(key) == value
+            for key, value in self._requested.items()
+            if key != "dependencies"
+        ) and set(versions.get("dependencies") or []) == set(
+            self._requested["dependencies"])
+
+    def _reload_manifest(self) -> None:
+        """Load the manifest and point to its active bundle.
+
+        After a rollback the rolled back bundle stays in use until the
+        settings change, see `rollback`.
+        """
+        self._use_versions(self._requested)
+        data = self._load_manifest_data()
+        active = data.get(ACTIVE_BUNDLE_KEY) or {}
+        entry = data.get(active.get("bundle_version"))
+        if (
+            entry
+            and self._is_requested(active.get("rolled_back_from") or {})
+            and os.path.isdir(os.path.join(
+                self.rez_source_folder, active.get("bundle_folder", "")))
+        ):
+            self.log.info(
+                "Using rolled back rez bundle %s", active["bundle_version"])
+            self._use_versions(entry)
+        self.installed = self.load_manifest()
+        self._set_rez_folder(
+            (self.installed or {}).get("bundle_folder", self.bundle_version)
+        )
+
+    def _use_versions(self, entry: dict) -> None:
+        self.rez_version = entry["rez_version"]
+        self.python_version = entry["python_version"]
+        self.graphviz_version = entry.get("graphviz_version")
+        self.dependencies = list(entry.get("dependencies", []))
+        self.bundle_version = f"{self.python_version}-{self.rez_version}"
+
+    def _set_rez_folder(self, folder_name: str) -> None:
+        self.rez_folder = os.path.join(self.rez_source_folder, folder_name)
+        # Use platform-appropriate bin directory
+        system = platform.system().lower()
+        bin_dir = "Scripts" if system == "windows" else "bin"
+        self.rez_path_folder = os.path.join(self.rez_folder, bin_dir, "rez")
+
+    def _needs_new_bundle(self) -> bool:
+        return any(
+            self._should_install(key, value)
+            for key, value in (
+                ("rez_version", self.rez_version),
+                ("dependencies", self.dependencies),
+                ("graphviz_version", self.graphviz_version),
+            )
+        ) or not os.path.isdir(self.rez_folder)
+
+    def _get_active_bundle(self) -> dict:
+        """Manifest entry of the live bundle with its `bundle_version`.
+
+        Empty if nothing is installed.
+        """
+        data = self._load_manifest_data()
+        bundle_version = (data.get(ACTIVE_BUNDLE_KEY) or {}).get(
+            "bundle_version")
+        if bundle_version not in data:
+            # Installed before bundles were tracked
+            bundle_version = self.bundle_version
+        entry = dict(data.get(bundle_version) or {})
+        if not entry.get("rez_version"):
+            return {}
+        entry.setdefault("bundle_folder", bundle_version)
+        entry["bundle_version"] = bundle_version
+        return entry
+
+    def _stage_bundle(self) -> dict:
+        """Point the installer to a new bundle folder, nothing goes live.
+
+        Returns:
+            dict: The live manifest entry to keep as rollback target, of
+                any version.
+        """
+        previous = self._get_active_bundle()
+        self._staging = True
+        self.installed = {
+            key: value for key, value in (self.installed or {}).items()
+            if key == "python_version"
+        }
+        # Not `mkdtemp`, its 0700 mode would stay on the live bundle and
+        # lock other users of a shared install out
+        folder_name = (
+            f"{self.bundle_version}-{time.strftime('%Y%m%d')}-"
+            f"{uuid.uuid4().hex[:8]}"
+        )
+        os.makedirs(os.path.join(self.rez_source_folder, folder_name))
+        self._set_rez_folder(folder_name)
+        self.log.info("Staging rez bundle in %s", self.rez_folder)
+        return previous
+
+    def _activate_bundle(self, previous: dict) -> None:
+        """Switch the manifest to the staged bundle with one file replace.
+
+        The previous bundle, of any version, stays on disk as rollback
+        target, older bundles of the same version are removed.
+        """
+        manifest = dict(self.installed)
+        manifest["bundle_folder"] = os.path.basename(self.rez_folder)
+        self._staging = False
+        self._write_bundle_entry(manifest, "activated bundle", active={
+            "bundle_version": self.bundle_version,
+            "bundle_folder": manifest["bundle_folder"],
+            "previous": previous or None,
+        })
+        self._remove_unused_bundles()
+
+    def _remove_unused_bundles(self) -> None:
+        """Remove bundle folders of this version the manifest doesn't use."""
+        active = self._load_manifest_data().get(ACTIVE_BUNDLE_KEY) or {}
+        keep = {
+            active.get("bundle_folder"),
+            (active.get("previous") or {}).get("bundle_folder"),
+        }
+        for entry in os.scandir(self.rez_source_folder):
+            if not entry.is_dir() or entry.name in keep:
+                continue
+            if entry.name == self.bundle_version or entry.name.startswith(
+                f"{self.bundle_version}-"
+            ):
+                self.log.info("Removing unused rez bundle %s", entry.path)
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def rollback(self) -> bool:
+        """Activate the previous bundle again, also of another version.
+
+        Installers keep using the rolled back bundle as long as the
+        settings request what they requested at the rollback, a settings
+        change installs the requested bundle again. Rolling back twice
+        returns to the rolled back bundle.
+
+        Returns:
+            bool: False if there is no previous bundle on disk.
+        """
+        active = self._load_manifest_data().get(ACTIVE_BUNDLE_KEY) or {}
+        previous = dict(active.get("previous") or {})
+        if not previous or not os.path.isdir(
+            os.path.join(self.rez_source_folder, previous["bundle_folder"])
+        ):
+            return False
+        current = self._get_active_bundle()
+        bundle_version = previous.pop("bundle_version")
+        if not self._update_manifest_file({
+            bundle_version: previous,
+            ACTIVE_BUNDLE_KEY: {
+                "bundle_version": bundle_version,
+                "bundle_folder": previous["bundle_folder"],
+                "previous": current or None,
+                "rolled_back_from": self._requested,
+            },
+        }, f"rollback to {bundle_version}"):
+            return False
+        self._reload_manifest()
+        return True
 
     def load_manifest(self) -> dict | None:
         """Loads the manifest file for the current bundle version."""
@@ -218,165 +501,378 @@ class RezInstaller:
             "Checking if requested configuration matches installed manifest."
         )
         return (
-            self.installed.get("rez_version") == self.rez_version
+            os.path.isdir(self.rez_folder)
+            and self.installed.get("rez_version") == self.rez_version
             and self.installed.get("python_version") == self.python_version
             and self.installed.get("graphviz_version") == self.graphviz_version
             and set(self.installed.get("dependencies", []))
             == set(self.dependencies)
         )
 
+    def cancel(self) -> None:
+        """Stop the install from another thread at its next check.
+
+        Blocking `run` stops between download blocks, pip packages, lock
+        polls and retries, `install_engine` also stops subprocesses.
+        """
+        self.cancel_event.set()
+
+    def _check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise InstallCancelled("Install cancelled")
+
     def run(self):
+        """Install under the root's install lock.
+
+        Other processes (a second tray, a login script or other hosts on a
+        shared root) wait for the lock and follow the installing process
+        through the progress file, then only re-check the manifest.
+        """
+        lock = self._acquire_install_lock()
+        if lock is None:
+            return
+        try:
+            self._run()
+        finally:
+            self._release_install_lock(lock)
+
+    def _acquire_install_lock(self) -> InstallLock | None:
+        """Wait for the install lock and reload the manifest.
+
+        Returns:
+            InstallLock | None: The held lock, None if another process
+                installed while we were waiting.
+        """
+        lock = InstallLock(
+            os.path.join(self.root_folder, INSTALL_LOCK_NAME), logger=self.log
+        )
+        progress_path = os.path.join(self.root_folder, INSTALL_PROGRESS_NAME)
+
+        def on_wait(owner):
+            self._check_cancelled()
+            progress = self._read_progress(progress_path)
+            host = owner.get("host", "another process")
+            self._report_progress(
+                progress.get("percent", 0),
+                f"Waiting for install on {host}: "
+                f"{progress.get('message', 'starting')}",
+            )
+
+        lock.acquire(on_wait=on_wait)
+        try:
+            self._check_cancelled()
+            # Another process might have installed while we were waiting
+            self._reload_manifest()
+        except BaseException:
+            lock.release()
+            raise
+        if self.check_if_installed():
+            self.log.info("Install was done by another process.")
+            self._report_progress(100, "Done")
+            lock.release()
+            return None
+        self._progress_path = progress_path
+        return lock
+
+    def _release_install_lock(self, lock: InstallLock) -> None:
+        if self._progress_path:
+            try:
+                os.remove(self._progress_path)
+            except OSError:
+                pass
+        self._progress_path = None
+        lock.release()
+
+    def _report_progress(self, percent: int, message: str) -> None:
+        """Report to the callback and, while installing, the progress file."""
+        if self.progress_callback:
+            self.progress_callback(percent, message)
+        if not self._progress_path:
+            return
+        data = {
+            "percent": percent,
+            "message": message,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "time": time.time(),
+        }
+        temp_path = f"{self._progress_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self._progress_path)
+        except OSError as e:
+            self.log.debug("Failed to write progress file: %s", e)
+
+    @staticmethod
+    def _read_progress(progress_path: str) -> dict:
+        try:
+            with open(progress_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _run(self):
         self.errors = []
         try:
-            if self.progress_callback:
-                self.progress_callback(0, "Getting Python")
-            self.get_python()
+            self._report_progress(0, "Getting Python")
+            with self.tracer.span("phase.python", category="phase"):
+                self.get_python()
             if "python install failed" in self.errors:
                 raise RuntimeError("Python installation failed")
 
-            if self.progress_callback:
-                self.progress_callback(20, "Getting Rez")
-            rez_zip = self.download_rez()
+            previous = None
+            if self._needs_new_bundle():
+                previous = self._stage_bundle()
+
+            self._report_progress(20, "Getting Rez")
+            with self.tracer.span("phase.download_rez", category="phase"):
+                rez_zip = self.download_rez()
 
-            if self.progress_callback:
-                self.progress_callback(40, "Installing Rez")
-            self.install_rez(rez_zip)
+            self._report_progress(40, "Installing Rez")
+            with self.tracer.span("phase.install_rez", category="phase"):
+                self.install_rez(rez_zip)
             if (
                 not self.installed.get("rez_version") == self.rez_version
                 and rez_zip is not None
             ):
                 raise RuntimeError("Rez installation failed")
 
-            if self.progress_callback:
-                self.progress_callback(60, "Getting Additional Dependencies")
-            self.get_additional_packages()
+            self._report_progress(60, "Getting Additional Dependencies")
+            with self.tracer.span("phase.dependencies", category="phase"):
+                self.get_additional_packages()
 
-            if self.progress_callback:
-                self.progress_callback(80, "Getting Graphviz")
-            self.get_graphviz()
+            self._report_progress(80, "Getting Graphviz")
+            with self.tracer.span("phase.graphviz", category="phase"):
+                self.get_graphviz()
 
-            if self.progress_callback:
-                self.progress_callback(90, "Cleanup")
-            self.post_install()
+            self._report_progress(82, "Compiling bytecode")
+            with self.tracer.span("phase.bytecode", category="phase"):
+                self.compile_bytecode()
 
-            if self.progress_callback:
-                self.progress_callback(100, "Done")
+            self._finish_install(previous)
         except Exception as e:
             self.log.exception("Installation failed: %s", e)
             raise
+        finally:
+            self._end_run()
 
-    def download_rez(self) -> str | None:
-        """Downloads Rez from GitHub and returns the path to the zip file."""
-        if not self._should_install("rez_version", self.rez_version):
-            self.log.info(
-                "Rez %s already downloaded/installed, skipping download.",
-                self.rez_version,
-            )
+    def _needs_bytecode(self) -> bool:
+        return "bytecode" not in (self.installed or {}) and os.path.isdir(
+            self.rez_folder
+        )
+
+    def compile_bytecode(self) -> dict | None:
+        """Compile the bundle's pycs in parallel, see `bytecode`.
+
+        Returns:
+            dict | None: Compile report, also written to the manifest
+                under `bytecode`. None if the bundle is compiled already.
+        """
+        if not self._needs_bytecode():
             return None
+        report = compile_bytecode(
+            self.python, self.rez_folder, self._get_install_env(), self.log
+        )
+        self._record_bytecode(report)
+        return report
 
-        # Get default temp folder
-        temp_folder = Path(tempfile.mkdtemp(prefix="rez-"))
+    def _record_bytecode(self, report: dict) -> None:
+        self.log.info(
+            "Compiled %d modules of %s in %.1fs",
+            report["files"], self.rez_folder, report["seconds"],
+        )
+        self.write_manifest("bytecode", report)
+
+    def _finish_install(self, previous: dict | None) -> None:
+        """Hash and dedup the bundle, activate it if staged and clean up."""
+        self._report_progress(85, "Hashing bundle files")
+        with self.tracer.span("phase.bundle_manifest", category="phase"):
+            bundle_files = write_bundle_manifest(self.rez_folder)
+        with self.tracer.span("phase.dedup", category="phase") as span:
+            report = self.dedup(bundle_files)
+            span.set(bytes=report["bytes_saved"])
+
+        if previous is not None:
+            self._check_cancelled()
+            self._activate_bundle(previous)
+
+        self._report_progress(90, "Cleanup")
+        with self.tracer.span("phase.cleanup", category="phase"):
+            self.post_install()
+
+        self.write_manifest("timings", self.tracer.summary())
+        self._report_progress(100, "Done")
+
+    def _end_run(self) -> None:
+        if self._staging:
+            # Failed while staging, the live bundle wasn't touched
+            self._staging = False
+            shutil.rmtree(self.rez_folder, ignore_errors=True)
+            self._reload_manifest()
+        if self.trace_path:
+            self.tracer.export_chrome_trace(self.trace_path)
+
+    def dedup(self, bundle_files: dict = None) -> dict:
+        """Hardlink identical files of python and rez bundles to the store.
+
+        Returns:
+            dict: Bytes saved by this run and store totals, also written to
+                the manifest under `dedup`.
+        """
+        store = DedupStore(os.path.join(self.root_folder, "store"), self.log)
+        python_folder = os.path.join(
+            self.python_folder, f"python-{self.python_version}"
+        )
+        bytes_saved = 0
+        for folder, files in (
+            (python_folder, None),
+            (self.rez_folder, bundle_files),
+        ):
+            if not os.path.isdir(folder):
+                continue
+            if files is None:
+                files = write_bundle_manifest(folder)
+            bytes_saved += store.dedup_folder(folder, files)["bytes_saved"]
+        report = {"bytes_saved": bytes_saved, "store": store.report()}
+        self.log.info(
+            "Dedup saved %.1f MB, %.1f MB in total",
+            bytes_saved / 1024 ** 2,
+            report["store"]["bytes_saved"] / 1024 ** 2,
+        )
+        self.write_manifest("dedup", report)
+        return report
+
+    def _get_space_free_temp_folder(self, prefix: str, fallback: str) -> Path:
+        temp_folder = Path(tempfile.mkdtemp(prefix=prefix))
 
         # Check for whitespaces in resolved path
         if ' ' in str(temp_folder.resolve()):
             if os.name == 'nt':
                 temp_folder = Path(
-                    os.environ.get('PROGRAMDATA', 'C:\\ProgramData')) / 'rez_temp'
+                    os.environ.get('PROGRAMDATA', 'C:\\ProgramData')) / fallback
             else:
-                temp_folder = Path('/tmp/rez_temp')
+                temp_folder = Path('/tmp') / fallback
 
             temp_folder.mkdir(parents=True, exist_ok=True)
             self.log.info("Using space-free temp location: %s", temp_folder)
+        return temp_folder
+
+    def _get_rez_source(self) -> tuple[str, str | None]:
+        if self.mirror:
+            return self.mirror.get_rez(self.rez_version)
+        return REZ_URL.format(self.rez_version), None
+
+    def _get_rez_archive_path(self) -> str:
+        temp_folder = self._get_space_free_temp_folder("rez-", "rez_temp")
+        rez_temp = str(temp_folder / f"{self.rez_version}.zip")
+        self.__garbage.append(rez_temp)
+        return rez_temp
+
+    def download_rez(self) -> str | None:
+        """Downloads Rez from GitHub and returns the path to the zip file."""
+        if not self._should_install("rez_version", self.rez_version):
+            self.log.info(
+                "Rez %s already downloaded/installed, skipping download.",
+                self.rez_version,
+            )
+            return None
 
-        rez_temp = temp_folder / f"{self.rez_version}.zip"
+        rez_temp = self._get_rez_archive_path()
         self.log.info("Downloading Rez to temporary path")
-        urllib.request.urlretrieve(REZ_URL.format(self.rez_version), str(rez_temp))
-        self.__garbage.append(str(rez_temp))
-        self.log.debug(str(rez_temp))
+        url, sha256 = self._get_rez_source()
+        self._download(url, rez_temp, sha256)
+        self.log.debug(rez_temp)
         self.log.info("Downloaded Rez")
-        return str(rez_temp)
+        return rez_temp
+
+    def _prepare_rez_install(self, archive: str) -> list[str]:
+        """Extract the rez archive, returns the command of its install.py."""
+        temp_folder = self._get_space_free_temp_folder(
+            "rez-temp-", "rez_temp_extract"
+        )
+        with self.tracer.span(
+            "extract",
+            archive=os.path.basename(archive),
+            bytes=os.path.getsize(archive),
+        ) as span:
+            with zipfile.ZipFile(archive, "r") as zip_ref:
+                span.set(files=len(zip_ref.namelist()))
+                zip_ref.extractall(temp_folder)
+        self.__garbage.append(str(temp_folder))
+        self.log.info("Installing Rez...")
+        return [
+            self.python,
+            os.path.join(temp_folder, f"rez-{self.rez_version}", "install.py"),
+            "-v",
+            self.rez_folder,
+        ]
+
+    def _get_install_env(self) -> dict:
+        """Environment for the rez install.py and pip."""
+        # On macOS, clear PYTHONHOME and PYTHONPATH to avoid interference
+        # with the installer script.
+        env = os.environ.copy()
+        env.pop("PYTHONHOME", None)
+        env.pop("PYTHONPATH", None)
+        # One pip cache for all python versions and bundles
+        env["PIP_CACHE_DIR"] = os.path.join(self.root_folder, "cache", "pip")
+
+        # Add DYLD_LIBRARY_PATH to help find libpython
+        if platform.system().lower() == "darwin":
+            actual_lib_path = os.path.join(
+                self.python_folder,
+                f"python-{self.python_version}",
+                "install",
+                "lib",
+            )
+            env["DYLD_LIBRARY_PATH"] = actual_lib_path + (
+                ":" + env.get("DYLD_LIBRARY_PATH", "")
+                if env.get("DYLD_LIBRARY_PATH")
+                else ""
+            )
+        return env
+
+    def _link_python_libs(self) -> None:
+        """Put libpython next to the rez venv on Linux and macOS."""
+        if platform.system().lower() == "windows":
+            return
+        lib_path = os.path.join(os.path.dirname(self.python), "..", "lib")
+        if not os.path.exists(lib_path):
+            return
+        dylibs = [
+            f for f in os.listdir(lib_path) if f.endswith((".dylib", ".so"))
+        ]
+        for dylib in dylibs:
+            link_or_copy(
+                os.path.join(lib_path, dylib),
+                os.path.join(self.rez_folder, "lib", dylib),
+            )
+            self.log.info(f"Copied {dylib} to {self.rez_folder}")
 
     def install_rez(self, archive: str) -> None:
         """Installs Rez from the provided zip file."""
         if archive is None:
             return
 
-        temp_folder = tempfile.mkdtemp(prefix="rez-temp-")
-        # Check for whitespaces in resolved path
-        if ' ' in str(Path(temp_folder).resolve()):
-            if os.name == 'nt':
-                temp_folder = Path(
-                    os.environ.get('PROGRAMDATA', 'C:\\ProgramData')) / 'rez_temp_extract'
-            else:
-                temp_folder = Path('/tmp/rez_temp_extract')
-
-            temp_folder.mkdir(parents=True, exist_ok=True)
-            self.log.info("Using space-free temp location: %s", temp_folder)
-        with zipfile.ZipFile(archive, "r") as zip_ref:
-            zip_ref.extractall(temp_folder)
-        self.__garbage.append(temp_folder)
-        self.log.info("Installing Rez...")
+        cmd = self._prepare_rez_install(archive)
         try:
-            cmd = [
-                self.python,
-                os.path.join(
-                    temp_folder, f"rez-{self.rez_version}", "install.py"
-                ),
-                "-v",
-                self.rez_folder,
-            ]
             self.log.debug(" ".join(cmd))
-
-            # On macOS, clear PYTHONHOME and PYTHONPATH to avoid interference
-            # with the installer script.
-            env = os.environ.copy()
-            env.pop("PYTHONHOME", None)
-            env.pop("PYTHONPATH", None)
-
-            # Add DYLD_LIBRARY_PATH for Rez installation to help find libpython
-            system = platform.system().lower()
-            if system == "darwin":
-                actual_lib_path = os.path.join(
-                    self.python_folder,
-                    f"python-{self.python_version}",
-                    "install",
-                    "lib",
-                )
-                env["DYLD_LIBRARY_PATH"] = actual_lib_path + (
-                    ":" + env.get("DYLD_LIBRARY_PATH", "")
-                    if env.get("DYLD_LIBRARY_PATH")
-                    else ""
+            with self.tracer.span(
+                "subprocess", command="install.py"
+            ) as span:
+                result = subprocess.run(
+                    cmd,
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                    env=self._get_install_env(),
                 )
-
-            result = subprocess.run(
-                cmd,
-                check=True,
-                capture_output=True,
-                text=True,
-                env=env,
-            )
+                span.set(returncode=result.returncode)
             self.log.debug(result.stdout)
             if result.stderr:
                 self.log.warning(result.stderr)
-
-            if system != "windows":
-                lib_path = os.path.join(
-                    os.path.dirname(self.python), "..", "lib"
-                )
-                if os.path.exists(lib_path):
-                    files = os.listdir(lib_path)
-                    dylibs = [
-                        f for f in files if f.endswith((".dylib", ".so"))
-                    ]
-                    if dylibs:
-                        for dylib in dylibs:
-                            shutil.copy(
-                                os.path.join(lib_path, dylib),
-                                os.path.join(self.rez_folder, "lib"),
-                            )
-                            self.log.info(
-                                f"Copied {dylib} to {self.rez_folder}"
-                            )
+            self._link_python_libs()
 
         except subprocess.CalledProcessError as e:
             self.log.error(f"Command failed with exit code {e.returncode}")
@@ -389,89 +885,139 @@ class RezInstaller:
             self.log.info("Successfully installed Rez to %s", self.rez_folder)
             self.write_manifest("rez_version", self.rez_version)
 
-    def get_additional_packages(self) -> None:
-        """Installs additional dependencies using pip."""
-        if not self._should_install("dependencies", self.dependencies):
-            self.log.info("Dependencies already match manifest, skipping.")
-            return
+    def _seed_dependencies(self) -> None:
+        """Take over unchanged dependencies of the previous bundle.
+
+        Pinned dependencies and everything they depend on, pip skips them
+        as already satisfied.
+        """
+        previous_bundle = find_previous_bundle(
+            self.rez_folder, self.python_version
+        )
+        if previous_bundle:
+            with self.tracer.span("delta_seed", source=previous_bundle) as span:
+                stats = seed_from_previous_bundle(
+                    previous_bundle, self.rez_folder, self.dependencies,
+                    logger=self.log,
+                )
+                span.set(**stats)
 
+    def _get_pip_command(self, package: str) -> list[str]:
         # Determine pip path based on platform
-        system = platform.system().lower()
-        if system == "windows":
+        if platform.system().lower() == "windows":
             pip_exe = os.path.join(self.rez_folder, "Scripts", "pip.exe")
         else:
             pip_exe = os.path.join(self.rez_folder, "bin", "pip")
 
+        # Use list-style cmd to avoid shell issues and better handle paths with spaces
+        cmd = [pip_exe, "install", package]
+        if self.mirror:
+            cmd += [
+                "--no-index",
+                "--find-links",
+                self.mirror.get_wheels_location(),
+            ]
+        elif self._wheelhouse_ready:
+            cmd += ["--no-index", "--find-links", self.wheelhouse.root]
+        return cmd
+
+    def _get_prefetch_python(self) -> str | None:
+        """Python with pip for `pip download`, any version will do."""
+        if self.python and os.path.exists(self.python):
+            return self.python
+        if os.path.exists(self._get_python_exe()):
+            return self._get_python_exe()
+        # A frozen launcher can't run pip
+        if not getattr(sys, "frozen", False):
+            return sys.executable
+        return None
+
+    def prefetch_wheels(self) -> bool:
+        """Get the dependency wheels into the wheelhouse.
+
+        Safe to call from a background thread while the install runs, the
+        wheelhouse has its own lock.
+
+        Returns:
+            bool: True if bundles can install the dependencies from the
+                wheelhouse.
+        """
+        self._wheelhouse_ready = False
+        if not self.use_wheelhouse or self.mirror or not self.dependencies:
+            return False
+        python = self._get_prefetch_python()
+        if python is None:
+            return False
+        try:
+            with self.tracer.span("wheel_prefetch") as span:
+                wheels = self.wheelhouse.prefetch(
+                    self.dependencies,
+                    self.python_version,
+                    self._get_platform_target(),
+                    python=python,
+                    env=self._get_install_env(),
+                )
+                span.set(
+                    wheels=len(wheels),
+                    bytes=sum(os.path.getsize(w) for w in wheels),
+                )
+        except Exception as e:
+            self.log.warning(
+                "Wheel prefetch failed, pip installs from the index: %s", e
+            )
+            return False
+        self._wheelhouse_ready = True
+        return True
+
+    def get_additional_packages(self) -> None:
+        """Installs additional dependencies using pip."""
+        if not self._should_install("dependencies", self.dependencies):
+            self.log.info("Dependencies already match manifest, skipping.")
+            return
+
+        self._seed_dependencies()
+        self.prefetch_wheels()
+        env = self._get_install_env()
         for package in self.dependencies:
+            self._check_cancelled()
             try:
                 self.log.info("Installing %s ...", package)
-                # Use list-style cmd to avoid shell issues and better handle paths with spaces
-                cmd = [pip_exe, "install", package]
-
-                # Similar to Rez installation, clean environment for pip
-                env = os.environ.copy()
-                env.pop("PYTHONHOME", None)
-                env.pop("PYTHONPATH", None)
-
-                # Add the library path to DYLD_LIBRARY_PATH on macOS to help pip
-                if system == "darwin":
-                    # Use actual lib path
-                    actual_lib_path = os.path.join(
-                        self.python_folder,
-                        f"python-{self.python_version}",
-                        "install",
-                        "lib",
-                    )
-                    env["DYLD_LIBRARY_PATH"] = actual_lib_path + (
-                        ":" + env.get("DYLD_LIBRARY_PATH", "")
-                        if env.get("DYLD_LIBRARY_PATH")
-                        else ""
+                with self.tracer.span(
+                    "subprocess", command="pip install", package=package
+                ):
+                    subprocess.run(
+                        self._get_pip_command(package),
+                        env=env,
+                        check=True,
+                        capture_output=True,
                     )
-
-                subprocess.run(
-                    cmd,
-                    env=env,
-                    check=True,
-                    capture_output=True,
-                )
             except Exception as e:
                 self.log.exception(e)
             else:
                 self.log.info("Successfully installed %s", package)
         self.write_manifest("dependencies", self.dependencies)
 
-    def get_graphviz(self) -> str | None:
-        """Downloads Graphviz from GitHub and returns the path to the zip file."""
-        if not self._should_install("graphviz_version", self.graphviz_version):
-            self.log.info(
-                "Graphviz %s already installed, skipping.",
-                self.graphviz_version,
-            )
-            return None
-
-        system = platform.system().lower()
-        if system != "windows":
-            self.log.info(
-                "Skipping Graphviz installation on non-Windows platform."
-            )
-            self.write_manifest("graphviz_version", self.graphviz_version)
-            return None
+    def _get_graphviz_source(self) -> tuple[str, str | None]:
+        if self.mirror:
+            return self.mirror.get_graphviz(self.graphviz_version)
+        return GRAPHVIZ_URL.format(self.graphviz_version), None
 
+    def _get_graphviz_archive_path(self) -> str:
         temp_folder = tempfile.mkdtemp(prefix="graphviz-")
         temp = os.path.join(temp_folder, "graphviz.zip")
-        self.log.info(
-            "Downloading Graphviz to temporary path from %s",
-            GRAPHVIZ_URL.format(self.graphviz_version),
-        )
-        urllib.request.urlretrieve(
-            GRAPHVIZ_URL.format(self.graphviz_version), temp
-        )
         self.__garbage.append(temp)
-        self.log.debug(temp)
+        return temp
+
+    def _install_graphviz(self, archive: str) -> bool:
+        """Extract Graphviz into the rez bundle, False if it has no bin."""
         temp_folder = tempfile.mkdtemp(prefix="rez-temp-")
         self.log.info("Installing Graphviz ...")
-        with zipfile.ZipFile(temp, "r") as zip_ref:
-            zip_ref.extractall(temp_folder)
+        with self.tracer.span(
+            "extract", archive="graphviz.zip", bytes=os.path.getsize(archive)
+        ) as span:
+            with zipfile.ZipFile(archive, "r") as zip_ref:
+                span.set(files=len(zip_ref.namelist()))
+                zip_ref.extractall(temp_folder)
 
         graphviz_bin_dir = os.path.join(
             temp_folder, f"Graphviz-{self.graphviz_version}-win64", "bin"
@@ -481,7 +1027,7 @@ class RezInstaller:
             self.log.error(
                 f"Graphviz bin directory not found: {graphviz_bin_dir}"
             )
-            return None
+            return False
 
         file_names = os.listdir(graphviz_bin_dir)
 
@@ -496,6 +1042,34 @@ class RezInstaller:
             )
         self.__garbage.append(temp_folder)
         self.log.info("Installed Graphviz")
+        return True
+
+    def get_graphviz(self) -> str | None:
+        """Downloads Graphviz from GitHub and returns the path to the zip file."""
+        if not self._should_install("graphviz_version", self.graphviz_version):
+            self.log.info(
+                "Graphviz %s already installed, skipping.",
+                self.graphviz_version,
+            )
+            return None
+
+        system = platform.system().lower()
+        if system != "windows":
+            self.log.info(
+                "Skipping Graphviz installation on non-Windows platform."
+            )
+            self.write_manifest("graphviz_version", self.graphviz_version)
+            return None
+
+        temp = self._get_graphviz_archive_path()
+        url, sha256 = self._get_graphviz_source()
+        self.log.info(
+            "Downloading Graphviz to temporary path from %s", url
+        )
+        self._download(url, temp, sha256)
+        self.log.debug(temp)
+        if not self._install_graphviz(temp):
+            return None
         self.write_manifest("graphviz_version", self.graphviz_version)
         return temp
 
@@ -538,8 +1112,7 @@ class RezInstaller:
             raise RuntimeError(f"Unsupported platform: {system} {arch}")
         return target
 
-    @staticmethod
-    def _github_json(url: str, max_retries: int = 5) -> dict:
+    def _github_json(self, url: str, max_retries: int = 5) -> dict:
         """Fetch JSON from GitHub API (no auth) with retry logic."""
         req = urllib.request.Request(
             url,
@@ -552,30 +1125,56 @@ class RezInstaller:
         # Transient errors that should be retried
         retryable_codes = {502, 503, 504}  # Bad Gateway, Service Unavailable, Gateway Timeout
 
-        for attempt in range(max_retries):
-            try:
-                with urllib.request.urlopen(req, timeout=30) as resp:
-                    return json.loads(resp.read().decode("utf-8"))
-            except urllib.error.HTTPError as e:
-                if e.code in retryable_codes and attempt < max_retries - 1:
-                    # Exponential backoff: 2, 4, 8, 16, 32 seconds
-                    wait_time = 2 ** (attempt + 1)
-                    logging.getLogger("RezInstaller").warning(
-                        f"GitHub API returned {e.code}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})"
-                    )
-                    time.sleep(wait_time)
-                else:
-                    raise
-            except urllib.error.URLError as e:
-                # Network errors (timeout, connection refused, etc.)
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** (attempt + 1)
-                    logging.getLogger("RezInstaller").warning(
-                        f"Network error: {e.reason}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})"
-                    )
-                    time.sleep(wait_time)
-                else:
-                    raise
+        with self.tracer.span("github_json", url=url, retries=0) as span:
+            for attempt in range(max_retries):
+                try:
+                    with urllib.request.urlopen(req, timeout=30) as resp:
+                        data = resp.read()
+                        span.set(bytes=len(data))
+                        return json.loads(data.decode("utf-8"))
+                except urllib.error.HTTPError as e:
+                    if e.code in retryable_codes and attempt < max_retries - 1:
+                        # Exponential backoff: 2, 4, 8, 16, 32 seconds
+                        wait_time = 2 ** (attempt + 1)
+                        self.log.warning(
+                            f"GitHub API returned {e.code}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})"
+                        )
+                        span.increment("retries")
+                        self.cancel_event.wait(wait_time)
+                        self._check_cancelled()
+                    else:
+                        raise
+                except urllib.error.URLError as e:
+                    # Network errors (timeout, connection refused, etc.)
+                    if attempt < max_retries - 1:
+                        wait_time = 2 ** (attempt + 1)
+                        self.log.warning(
+                            f"Network error: {e.reason}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})"
+                        )
+                        span.increment("retries")
+                        self.cancel_event.wait(wait_time)
+                        self._check_cancelled()
+                    else:
+                        raise
+
+    def _download(
+        self, url: str, destination: str, sha256: str = None
+    ) -> None:
+        """Download url to destination file, traced with byte count.
+
+        With `sha256` given, the downloaded file is verified against it.
+        """
+
+        def check_cancelled(*args):
+            self._check_cancelled()
+
+        with self.tracer.span("download", url=url) as span:
+            urllib.request.urlretrieve(
+                url, destination, reporthook=check_cancelled
+            )
+            span.set(bytes=os.path.getsize(destination))
+        if sha256 and get_file_sha256(destination) != sha256:
+            raise RuntimeError(f"Checksum mismatch for {url}")
 
     @staticmethod
     def _extract_archive(archive_path: Path, dest: Path) -> None:
@@ -680,9 +1279,15 @@ class RezInstaller:
                     method="HEAD",
                     headers={"User-Agent": "hbay-rez-manager"},
                 )
-                with urllib.request.urlopen(req, timeout=10):
-                    self.log.debug("Verified asset exists: %s", url)
-                    return url
+                with self.tracer.span("head_probe", url=url) as span:
+                    try:
+                        with urllib.request.urlopen(req, timeout=10) as resp:
+                            span.set(status=resp.status)
+                    except urllib.error.HTTPError as e:
+                        span.set(status=e.code)
+                        raise
+                self.log.debug("Verified asset exists: %s", url)
+                return url
             except urllib.error.HTTPError as e:
                 if e.code == 404:
                     self.log.debug("Asset not found (404): %s", filename)
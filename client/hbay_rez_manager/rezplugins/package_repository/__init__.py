@@ -0,0 +1,3 @@
+# rez plugin namespace, see rez.plugin_managers.extend_path
+from rez.plugin_managers import extend_path
+__path__ = extend_path(__path__, __name__)
@@ -0,0 +1,171 @@
+"""Filesystem package repository backed by a local index.
+
+Loaded by rez from `plugin_path`, it can't import the addon package. The
+index is written by `hbay_rez_manager.package_index`, see there for its
+layout. Packages stay on the share, only family and version listings and
+package definitions are read from the index:
+
+- the family list is used while the repository folder is unchanged
+- a family's versions are used while its folder is unchanged, which costs
+  one stat instead of listing the family and its version folders
+- package definitions are loaded from the local copies
+
+Everything else, e.g. unversioned or combined packages, a missing index or
+a changed folder, is read from the share like the `filesystem` repository
+does.
+"""
+import json
+import os
+
+from rez.config import config
+from rez.serialise import FileFormat
+from rez.utils.filesystem import canonical_path
+from rez.utils.formatting import is_valid_package_name
+from rez.utils.platform_ import platform_
+from rezplugins.package_repository.filesystem import (
+    FileSystemPackageFamilyResource,
+    FileSystemPackageRepository,
+)
+
+INDEX_FORMAT = 1
+INDEX_NAME = "index.json"
+
+_FILE_FORMATS = {
+    "py": FileFormat.py,
+    "yaml": FileFormat.yaml,
+}
+
+
+class IndexedPackageRepository(FileSystemPackageRepository):
+    """`filesystem` repository reading listings from the local index."""
+
+    schema_dict = {"indexes": dict}
+
+    @classmethod
+    def name(cls):
+        return "hbay_index"
+
+    def __init__(self, location, resource_pool, **kwargs):
+        super(IndexedPackageRepository, self).__init__(
+            location, resource_pool, **kwargs)
+        self._index_folder = None
+        self._families = {}
+        self._root_unchanged = False
+        # Family folder to whether its index entry is current
+        self._checked_families = {}
+        self._load_index()
+
+    def _load_index(self):
+        settings = config.plugins.package_repository.hbay_index
+        for path, folder in settings.indexes.items():
+            if canonical_path(path, platform_) == self.location:
+                break
+        else:
+            return
+        try:
+            with open(os.path.join(folder, INDEX_NAME)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("format") != INDEX_FORMAT:
+            return
+        self._index_folder = folder
+        self._families = index.get("families") or {}
+        try:
+            mtime_ns = os.stat(self.location).st_mtime_ns
+        except OSError:
+            return
+        self._root_unchanged = mtime_ns == index.get("mtime_ns")
+
+    def _uid(self):
+        return (self.name(),) + tuple(
+            super(IndexedPackageRepository, self)._uid()[1:])
+
+    def _get_family_entry(self, root):
+        """Index entry of the family folder `root`, None if not current."""
+        checked = self._checked_families.get(root)
+        if checked is not None:
+            return checked or None
+        entry = self._families.get(os.path.basename(root))
+        if (
+            not entry
+            or entry.get("versions") is None
+            or os.path.dirname(root) != self.location
+        ):
+            entry = None
+        else:
+            try:
+                if os.stat(root).st_mtime_ns != entry.get("mtime_ns"):
+                    entry = None
+            except OSError:
+                entry = None
+        self._checked_families[root] = entry or False
+        return entry
+
+    def _get_family_dirs(self):
+        if not self._root_unchanged:
+            return super(IndexedPackageRepository, self)._get_family_dirs()
+        return [
+            (name, entry.get("ext"))
+            for name, entry in self._families.items()
+        ]
+
+    def _get_family(self, name):
+        if not self._root_unchanged:
+            return super(IndexedPackageRepository, self)._get_family(name)
+        is_valid_package_name(name, raise_error=True)
+        entry = self._families.get(name)
+        if entry is None:
+            # Matched case-sensitively, like rez does on every platform
+            return None
+        if entry.get("ext"):
+            return super(IndexedPackageRepository, self)._get_family(name)
+        return self.get_resource(
+            FileSystemPackageFamilyResource.key,
+            location=self.location,
+            name=name,
+        )
+
+    def _get_version_dirs(self, root):
+        entry = self._get_family_entry(root)
+        if entry is None:
+            return super(IndexedPackageRepository, self)._get_version_dirs(root)
+        versions = list(entry["versions"])
+        if self.disable_pkg_ignore:
+            versions.extend(entry.get("ignored") or {})
+        return versions
+
+    def _get_file(self, path, package_filename=None):
+        if os.path.dirname(path) == self.location:
+            # Unversioned package, indexed families have versions
+            if self._get_family_entry(path) is not None:
+                return None, None
+            return super(IndexedPackageRepository, self)._get_file(
+                path, package_filename)
+
+        family_root, version = os.path.split(path)
+        entry = self._get_family_entry(family_root)
+        if entry is None:
+            return super(IndexedPackageRepository, self)._get_file(
+                path, package_filename)
+
+        record = entry["versions"].get(version) or (
+            entry.get("ignored") or {}).get(version)
+        if not record:
+            return None, None
+        filename = record[0]
+        stem, ext = os.path.splitext(filename)
+        package_filenames = [package_filename] if package_filename else \
+            config.plugins.package_repository.filesystem.package_filenames
+        if stem not in package_filenames:
+            return super(IndexedPackageRepository, self)._get_file(
+                path, package_filename)
+        filepath = os.path.join(
+            self._index_folder, "files", os.path.basename(family_root),
+            version, filename,
+        )
+        return filepath, _FILE_FORMATS[ext[1:]]
+
+
+def register_plugin():
+    return IndexedPackageRepository
@@ -0,0 +1,5 @@
+hbay_index = {
+    # Repository location to its index folder, written by the addon to the
+    # package index rezconfig overlay
+    "indexes": {},
+}
@@ -0,0 +1,83 @@
+"""Compare rez requests and resolved contexts of similar launches.
+
+Shared by the resolve script (runs in rez's own python) and the launch
+hook, so this module must not import anything from the addon or rez.
+
+Requests are compared per package family, `maya-2024` and `maya-2025` are
+one changed family. A context resolved for a request with few changed
+families is the neighbour of that request, its resolved versions are
+reused for the families that didn't change, see `rez_resolve.py`.
+
+The diff between the neighbour and the new context::
+
+    {"neighbour": [<request>, ...], "reused": true,
+     "packages": {"added": [...], "removed": [...],
+                  "changed": [["foo-1.0", "foo-1.1"], ...]},
+     "environ": {"added": [...], "removed": [...], "changed": [...]}}
+
+`environ` is only there when it was asked for, see `rez_resolve.py`.
+"""
+import json
+import os
+import re
+
+_FAMILY_REGEX = re.compile(r"[~!]?(\w+)")
+
+
+def get_family(request):
+    """Package family of a rez request string, e.g. `maya` of `maya-2024`."""
+    match = _FAMILY_REGEX.match(request.strip())
+    return match.group(1) if match else request.strip()
+
+
+def get_changed_families(packages, other):
+    """Families whose requests differ between two requests."""
+    requests = {}
+    for request in packages:
+        requests.setdefault(get_family(request), set()).add(request)
+    other_requests = {}
+    for request in other:
+        other_requests.setdefault(get_family(request), set()).add(request)
+    return {
+        family for family in set(requests) | set(other_requests)
+        if requests.get(family) != other_requests.get(family)
+    }
+
+
+def diff_packages(old, new):
+    """Difference of two `{family: version}` resolves."""
+    return {
+        "added": sorted(
+            f"{name}-{new[name]}" for name in set(new) - set(old)),
+        "removed": sorted(
+            f"{name}-{old[name]}" for name in set(old) - set(new)),
+        "changed": sorted(
+            [f"{name}-{old[name]}", f"{name}-{new[name]}"]
+            for name in set(old) & set(new)
+            if old[name] != new[name]
+        ),
+    }
+
+
+def diff_environ(old, new):
+    """Variable names added, removed and changed between two environments."""
+    return {
+        "added": sorted(set(new) - set(old)),
+        "removed": sorted(set(old) - set(new)),
+        "changed": sorted(
+            key for key in set(old) & set(new) if old[key] != new[key]),
+    }
+
+
+def load_diff(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_diff(path, diff):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(diff, f)
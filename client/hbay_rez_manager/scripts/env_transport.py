@@ -0,0 +1,48 @@
+"""Length prefixed binary payload used to pass resolved environments.
+
+The resolve script runs in rez's own python, so this module must not
+import anything from the addon. The payload is marshal data (format
+version 4, readable by all python 3 versions) behind a small header:
+
+    magic (4 bytes) | format version (1 byte) | body length (8 bytes)
+"""
+import marshal
+import mmap
+import os
+import struct
+
+MAGIC = b"HBRZ"
+FORMAT_VERSION = 1
+MARSHAL_VERSION = 4
+HEADER = struct.Struct("<4sBQ")
+
+
+def write_payload(path, data):
+    body = marshal.dumps(data, MARSHAL_VERSION)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(body)))
+        f.write(body)
+
+
+def read_payload(path):
+    """Read payload written by `write_payload`.
+
+    The file is memory mapped and unmarshalled from a memoryview, the body
+    is not copied into an intermediate bytes object.
+
+    Raises:
+        ValueError: If the payload is missing, incomplete or unknown.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"Payload {path} is empty or incomplete")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, length = HEADER.unpack_from(mapped)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Unknown payload format in {path}")
+            if HEADER.size + length > size:
+                raise ValueError(f"Payload {path} is incomplete")
+            with memoryview(mapped) as view:
+                with view[HEADER.size:HEADER.size + length] as body:
+                    return marshal.loads(body)
@@ -0,0 +1,176 @@
+"""Copy the payloads of frequently launched variants to the package cache.
+
+Executed by the tray with `rez python`, it can't import the addon package.
+The rez package cache is `cache_packages_path` of the rez config, see
+`hbay_rez_manager.payload_cache`. Contexts read cached variant roots from
+it, so launches load those packages from local disk.
+
+`--usage` is the JSON list of `payload_ledger.load_usage` values. Variants
+used at least `--min-launches` times are added to the cache unless rez
+refuses them, packages are only cachable with `cachable = True` or the
+`default_cachable` settings of the rez config. Entries whose
+package definition changed are copied again and the least recently used
+entries are evicted until the cache fits `--max-size` bytes. The ledger
+(see `payload_ledger`) records what was copied, a JSON report is printed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from payload_ledger import (  # noqa: E402
+    get_ledger_key,
+    get_ledger_size,
+    load_ledger,
+    save_ledger,
+    select_evictions,
+    select_hot,
+)
+
+
+def get_content_hash(variant):
+    """Hash of the package definition and the variant index."""
+    content = hashlib.sha256()
+    filepath = getattr(variant.parent.resource, "filepath", None)
+    if filepath:
+        with open(filepath, "rb") as f:
+            content.update(f.read())
+    else:
+        content.update(str(variant.parent.timestamp).encode("utf-8"))
+    content.update(str(variant.index).encode("utf-8"))
+    return content.hexdigest()
+
+
+def get_folder_size(path):
+    size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return size
+
+
+def _remove(cache, handle):
+    """Remove a variant from the cache, False if it is in use (Windows)."""
+    from rez.packages import get_variant
+
+    try:
+        cache.remove_variant(get_variant(handle))
+    except OSError:
+        return False
+    except Exception:
+        # Variant is gone from its repository, rez cleans its copy by age
+        pass
+    return True
+
+
+def sync(cache, ledger, usage, min_launches, max_size):
+    from rez.exceptions import PackageCacheError
+    from rez.packages import get_variant
+
+    report = {"added": 0, "updated": 0, "evicted": 0, "skipped": 0,
+              "failed": 0}
+
+    # Copies rez cleaned by age are gone
+    for key, entry in list(ledger.items()):
+        if not os.path.isdir(entry.get("root", "")):
+            del ledger[key]
+
+    for item in usage:
+        entry = ledger.get(get_ledger_key(item["handle"]))
+        if entry:
+            entry["uses"] = item["count"]
+            entry["last_used"] = max(
+                entry.get("last_used", 0), item["last_used"])
+
+    for item in select_hot(
+        {get_ledger_key(item["handle"]): item for item in usage},
+        min_launches,
+    ):
+        key = get_ledger_key(item["handle"])
+        try:
+            variant = get_variant(item["handle"])
+            content_hash = get_content_hash(variant)
+        except Exception:
+            report["failed"] += 1
+            continue
+
+        entry = ledger.get(key)
+        if entry and entry["content_hash"] != content_hash:
+            if not _remove(cache, item["handle"]):
+                continue
+            del ledger[key]
+            entry = None
+            report["updated"] += 1
+        if entry:
+            continue
+        if get_ledger_size(ledger) >= max_size:
+            report["skipped"] += 1
+            continue
+
+        try:
+            root, status = cache.add_variant(variant)
+        except PackageCacheError:
+            # Not cachable (rez default), local, on the cache's device or
+            # in a temp repository, a launch must use the original
+            report["skipped"] += 1
+            continue
+        if status not in (cache.VARIANT_FOUND, cache.VARIANT_CREATED):
+            # Being copied by another process or the disk is full
+            report["skipped"] += 1
+            continue
+        ledger[key] = {
+            "handle": item["handle"],
+            "package": variant.qualified_name,
+            "content_hash": content_hash,
+            "size": get_folder_size(root),
+            "root": root,
+            "uses": item["count"],
+            "last_used": item["last_used"],
+        }
+        report["added"] += 1
+
+    for key in select_evictions(ledger, max_size):
+        if _remove(cache, ledger[key]["handle"]):
+            del ledger[key]
+            report["evicted"] += 1
+
+    # Deletes the payloads of removed variants
+    cache.clean()
+    report["size"] = get_ledger_size(ledger)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--usage", required=True, help="Usage JSON file")
+    parser.add_argument("--ledger", required=True, help="Ledger JSON file")
+    parser.add_argument("--min-launches", type=int, default=3)
+    parser.add_argument(
+        "--max-size", type=int, required=True, help="Cache size in bytes")
+    args = parser.parse_args(argv)
+
+    from rez.config import config
+    from rez.package_cache import PackageCache
+
+    if not config.cache_packages_path:
+        sys.stderr.write("cache_packages_path is not configured\n")
+        sys.exit(1)
+    os.makedirs(config.cache_packages_path, exist_ok=True)
+    cache = PackageCache(config.cache_packages_path)
+
+    with open(args.usage) as f:
+        usage = json.load(f)
+    ledger = load_ledger(args.ledger)
+    report = sync(cache, ledger, usage, args.min_launches, args.max_size)
+    save_ledger(args.ledger, ledger)
+    sys.stdout.write(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
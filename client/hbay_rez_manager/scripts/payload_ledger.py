@@ -0,0 +1,138 @@
+"""Usage log and ledger of the local package payload cache.
+
+Shared by the resolve script, the cache sync script (both run in rez's
+own python) and the tray, so this module must not import anything from the
+addon or rez.
+
+Every launch appends the variant handles of its context to the usage log,
+one JSON line per launch::
+
+    {"time": ..., "variants": [<handle dict>, ...]}
+
+The ledger lists the variants copied to the rez package cache, keyed by
+their handle::
+
+    {"<key>": {"handle": {...}, "package": "foo-1.0.0", "content_hash": ...,
+               "size": ..., "root": ..., "uses": ..., "last_used": ...}}
+
+`content_hash` is the hash of the package definition, a re-released
+version gets copied again. Least recently used entries are evicted once
+the sizes add up to more than the size limit.
+"""
+import json
+import os
+import time
+
+
+def get_ledger_key(handle):
+    return json.dumps(handle, sort_keys=True)
+
+
+def record_usage(path, handles):
+    """Append a launch to the usage log.
+
+    Single short appends, parallel launches don't need a lock.
+    """
+    line = json.dumps({"time": time.time(), "variants": list(handles)})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(line + "\n")
+
+
+def _read_usage_lines(path):
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            # Torn line of a launch that was killed while writing
+            continue
+    return records
+
+
+def load_usage(path, max_age):
+    """Launch count and last use per variant of the last `max_age` seconds.
+
+    Returns:
+        dict: Ledger key to `{"handle", "count", "last_used"}`.
+    """
+    since = time.time() - max_age
+    usage = {}
+    for record in _read_usage_lines(path):
+        launched = record.get("time", 0)
+        if launched < since:
+            continue
+        for handle in record.get("variants", []):
+            key = get_ledger_key(handle)
+            item = usage.setdefault(
+                key, {"handle": handle, "count": 0, "last_used": 0})
+            item["count"] += 1
+            item["last_used"] = max(item["last_used"], launched)
+    return usage
+
+
+def compact_usage(path, max_age):
+    """Drop launches older than `max_age` seconds from the usage log.
+
+    The log is moved aside first, launches appending meanwhile start a new
+    log and the kept lines are appended to it.
+    """
+    compact_path = f"{path}.{os.getpid()}.compact"
+    try:
+        os.replace(path, compact_path)
+    except OSError:
+        return
+    since = time.time() - max_age
+    kept = [
+        json.dumps(record) + "\n"
+        for record in _read_usage_lines(compact_path)
+        if record.get("time", 0) >= since
+    ]
+    with open(path, "a") as f:
+        f.writelines(kept)
+    os.remove(compact_path)
+
+
+def select_hot(usage, min_launches):
+    """Variants launched at least `min_launches` times, most used first."""
+    hot = [item for item in usage.values() if item["count"] >= min_launches]
+    hot.sort(key=lambda item: (-item["count"], -item["last_used"]))
+    return hot
+
+
+def load_ledger(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_ledger(path, ledger):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(ledger, f, indent=4, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def get_ledger_size(ledger):
+    return sum(entry.get("size", 0) for entry in ledger.values())
+
+
+def select_evictions(ledger, max_size):
+    """Least recently used keys to evict to get below `max_size` bytes."""
+    size = get_ledger_size(ledger)
+    evictions = []
+    for key, entry in sorted(
+        ledger.items(), key=lambda item: item[1].get("last_used", 0)
+    ):
+        if size <= max_size:
+            break
+        evictions.append(key)
+        size -= entry.get("size", 0)
+    return evictions
@@ -0,0 +1,246 @@
+"""Resolve a rez context and hand its environment to the launch hook.
+
+Executed by `PreLaunchSetRezEnv` with `rez python`, it can't import the
+addon package. With `--output` the environment is written as binary
+payload to that file, otherwise it is printed as JSON to stdout.
+
+With `--context-cache` a resolved context (.rxt) younger than `--max-age`
+seconds is loaded instead of resolving, successful resolves are saved to
+it. A cached context is outdated as soon as one of its resolved families
+got a release, rez touches the family folder on every release.
+`--no-environ` only fills the cache, used to pre-resolve requests.
+
+With `--failure-output` a failed resolve writes its failure description to
+that JSON file and the fail graph in dot format next to it.
+
+With `--usage-log` the resolved variants are appended to the package
+payload cache usage log, see `payload_ledger`.
+
+With `--cache-base` the request is written next to the saved context, the
+launch hook looks up similar cached requests by it. A context passed with
+`--neighbour-context` is used as a starting point when there is no cached
+context: the versions it resolved for the unchanged families are pinned
+with a package filter. If the pinned resolve fails the request is resolved
+from scratch. A pinned context may differ from a full resolve, it is not
+saved to `--context-cache`, the launch hook resolves the request fully in
+the background. `--diff-output` writes the package difference to the
+neighbour, see `context_diff`, with `--diff-environ` also the difference of
+the environments, which runs the commands of the neighbour's packages.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from context_diff import (  # noqa: E402
+    diff_environ,
+    diff_packages,
+    get_changed_families,
+    save_diff,
+)
+from env_transport import write_payload  # noqa: E402
+from payload_ledger import record_usage  # noqa: E402
+
+
+def _is_outdated(context):
+    """True if a resolved family changed on disk since the resolve.
+
+    A few stats of the family folders instead of a resolve.
+    """
+    locations = []
+    for path in context.package_paths:
+        repository_type, _, location = path.rpartition("@")
+        if repository_type in ("", "filesystem", "hbay_index"):
+            locations.append(location)
+    for variant in context.resolved_packages:
+        for location in locations:
+            try:
+                mtime = os.path.getmtime(os.path.join(location, variant.name))
+            except OSError:
+                continue
+            # `created` is whole seconds, taken before the solve
+            if mtime >= context.created:
+                return True
+    return False
+
+
+def _load_cached_context(path, max_age):
+    from rez.resolved_context import ResolvedContext
+
+    try:
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        context = ResolvedContext.load(path)
+        return None if _is_outdated(context) else context
+    except Exception:
+        # missing or unreadable cache, resolve again
+        return None
+
+
+def _save_context(context, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    context.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_request_info(path, packages, base_key):
+    info_path = f"{os.path.splitext(path)[0]}.json"
+    tmp_path = f"{info_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"packages": list(packages), "base": base_key}, f)
+    os.replace(tmp_path, info_path)
+
+
+def _resolve_from_neighbour(packages, neighbour):
+    """Resolve with the neighbour's versions of the unchanged families.
+
+    Returns:
+        ResolvedContext | None: Successful context or None if the pinned
+            versions don't satisfy the request.
+    """
+    from rez.package_filter import PackageFilter, PackageFilterList, RangeRule
+    from rez.resolved_context import ResolvedContext
+    from rez.version import Requirement
+
+    changed = get_changed_families(
+        packages,
+        [str(request) for request in neighbour.requested_packages()],
+    )
+    pins = PackageFilter()
+    for variant in neighbour.resolved_packages:
+        if variant.name in changed:
+            continue
+        pins.add_exclusion(RangeRule(Requirement(variant.name)))
+        pins.add_inclusion(RangeRule(
+            Requirement(f"{variant.name}=={variant.version}")))
+    package_filter = PackageFilterList.singleton.copy()
+    package_filter.add_filter(pins)
+
+    try:
+        context = ResolvedContext(packages, package_filter=package_filter)
+    except Exception:
+        # a required version is hidden by the pins, resolve from scratch
+        return None
+    return context if context.success else None
+
+
+def _get_versions(context):
+    return {
+        variant.name: str(variant.version)
+        for variant in context.resolved_packages
+    }
+
+
+def _write_failure(context, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    graph_path = ""
+    try:
+        dot = context.graph(as_dot=True)
+    except Exception:
+        dot = None
+    if dot:
+        graph_path = f"{os.path.splitext(path)[0]}.dot"
+        with open(graph_path, "w") as f:
+            f.write(dot)
+    failure = {
+        "packages": [str(request) for request in context.requested_packages()],
+        "summary": context.failure_description,
+        "graph": graph_path,
+    }
+    with open(path, "w") as f:
+        json.dump(failure, f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="Binary payload output file")
+    parser.add_argument("--context-cache", help="Resolved context cache file")
+    parser.add_argument(
+        "--max-age", type=float, default=0,
+        help="Seconds a cached context is used for")
+    parser.add_argument(
+        "--failure-output", help="Failure description JSON output file")
+    parser.add_argument(
+        "--no-environ", action="store_true",
+        help="Only resolve and fill the context cache")
+    parser.add_argument(
+        "--usage-log", help="Package payload cache usage log file")
+    parser.add_argument(
+        "--cache-base", help="Key stored with the request of saved contexts")
+    parser.add_argument(
+        "--neighbour-context", help="Cached context of a similar request")
+    parser.add_argument(
+        "--diff-output", help="Neighbour context diff JSON output file")
+    parser.add_argument(
+        "--diff-environ", action="store_true",
+        help="Add the environment difference to the neighbour diff")
+    parser.add_argument("packages", nargs="+", help="Rez package requests")
+    args = parser.parse_args(argv)
+
+    from rez.resolved_context import ResolvedContext
+
+    context = None
+    neighbour = None
+    if args.context_cache and args.max_age > 0:
+        context = _load_cached_context(args.context_cache, args.max_age)
+    if context is None:
+        if args.neighbour_context:
+            # The launch hook only passes contexts that are young enough
+            neighbour = _load_cached_context(
+                args.neighbour_context, float("inf"))
+        if neighbour is not None:
+            context = _resolve_from_neighbour(args.packages, neighbour)
+        reused = context is not None
+        if context is None:
+            context = ResolvedContext(args.packages)
+        # Pinned contexts aren't what a full resolve of the request returns
+        if args.context_cache and context.success and not reused:
+            _save_context(context, args.context_cache)
+            if args.cache_base:
+                _save_request_info(
+                    args.context_cache, args.packages, args.cache_base)
+
+    if not context.success:
+        if args.failure_output:
+            _write_failure(context, args.failure_output)
+        sys.stderr.write(f"{context.failure_description}\n")
+        sys.exit(1)
+
+    if args.no_environ:
+        return
+
+    if args.usage_log:
+        try:
+            record_usage(
+                args.usage_log,
+                [variant.handle.to_dict()
+                 for variant in context.resolved_packages],
+            )
+        except OSError as e:
+            sys.stderr.write(f"Failed to record package usage: {e}\n")
+
+    environ = context.get_environ()
+    if neighbour is not None and args.diff_output:
+        diff = {
+            "neighbour": [
+                str(request) for request in neighbour.requested_packages()],
+            "reused": reused,
+            "packages": diff_packages(
+                _get_versions(neighbour), _get_versions(context)),
+        }
+        if args.diff_environ:
+            diff["environ"] = diff_environ(neighbour.get_environ(), environ)
+        save_diff(args.diff_output, diff)
+
+    if args.output:
+        write_payload(args.output, environ)
+    else:
+        sys.stdout.write(json.dumps(environ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Pick up changed addon settings while the tray is running.
+
+The AYON server creates a `settings.changed` event whenever settings are
+saved. `SettingsWatcher` asks for those events every `interval` seconds,
+which is a single small query, and only fetches the addon settings when
+one of them is about this addon. Servers or `ayon_api` versions without
+the event query fall back to fetching and comparing the settings on every
+poll, other errors of the query are retried on the next poll.
+
+Changed `rez_install_options` and `rez_config_options` are reported per
+key, so the addon can reinstall rez or only rewrite the rez config.
+"""
+from __future__ import annotations
+import datetime
+import logging
+import threading
+
+SETTINGS_CHANGED_TOPIC = "settings.changed"
+WATCHED_SECTIONS = ("rez_install_options", "rez_config_options")
+# Errors of an `ayon_api` or server without the events query
+EVENTS_UNSUPPORTED_ERRORS = (AttributeError, NotImplementedError, TypeError)
+
+log = logging.getLogger(__name__)
+
+
+def diff_settings(old: dict, new: dict) -> dict[str, list[str]]:
+    """Changed keys of the watched settings sections.
+
+    Returns:
+        dict[str, list[str]]: Section to its changed keys, unchanged
+            sections are left out.
+    """
+    changes = {}
+    for section in WATCHED_SECTIONS:
+        old_values = old.get(section) or {}
+        new_values = new.get(section) or {}
+        keys = sorted(
+            key for key in set(old_values) | set(new_values)
+            if old_values.get(key) != new_values.get(key)
+        )
+        if keys:
+            changes[section] = keys
+    return changes
+
+
+def _utc_now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class SettingsWatcher:
+    """Poll for settings changes of an addon in a daemon thread.
+
+    Args:
+        addon_name (str): Addon to watch.
+        addon_version (str): Version whose settings are fetched.
+        settings (dict): Current addon settings to compare against.
+        on_change (Callable[[dict, dict], None]): Called in the watcher
+            thread with the new settings and `diff_settings` changes. If
+            it raises, the changes are applied again on the next poll.
+        interval (float): Seconds between polls.
+        get_settings (Callable[[], dict]): Fetches the addon settings,
+            defaults to `ayon_api.get_addon_studio_settings`.
+        get_events (Callable[[str], list[dict]]): Settings change events
+            newer than an ISO datetime, defaults to `ayon_api.get_events`.
+    """
+
+    def __init__(
+        self,
+        addon_name: str,
+        addon_version: str,
+        settings: dict,
+        on_change,
+        interval: float = 60.0,
+        get_settings=None,
+        get_events=None,
+        logger: logging.Logger = None,
+    ):
+        self.addon_name = addon_name
+        self.addon_version = addon_version
+        self.settings = settings
+        self.on_change = on_change
+        self.interval = interval
+        self.log = logger or log
+        self._get_settings = get_settings or self._get_server_settings
+        self._get_events = get_events or self._get_server_events
+        # Newest event seen, events are compared in server time
+        self._newer_than = _utc_now()
+        self._events_supported = True
+        # Changes whose `on_change` failed, fetched again without an event
+        self._retry = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _get_server_settings(self) -> dict:
+        import ayon_api
+
+        return ayon_api.get_addon_studio_settings(
+            self.addon_name, self.addon_version)
+
+    @staticmethod
+    def _get_server_events(newer_than: str) -> list[dict]:
+        import ayon_api
+
+        return list(ayon_api.get_events(
+            topics=[SETTINGS_CHANGED_TOPIC],
+            newer_than=newer_than,
+            fields={"id", "createdAt", "summary"},
+        ))
+
+    def _has_change_event(self) -> bool:
+        """Check for new change events of this addon."""
+        events = self._get_events(self._newer_than)
+        found = False
+        for event in events:
+            created_at = event.get("createdAt")
+            if created_at and created_at > self._newer_than:
+                self._newer_than = created_at
+            addon_name = (event.get("summary") or {}).get("addon_name")
+            if addon_name in (None, self.addon_name):
+                found = True
+        return found
+
+    def check(self) -> dict[str, list[str]]:
+        """Poll once, calls `on_change` if watched settings changed.
+
+        Returns:
+            dict[str, list[str]]: The changes, empty if there were none.
+        """
+        if self._events_supported and not self._retry:
+            try:
+                if not self._has_change_event():
+                    return {}
+            except EVENTS_UNSUPPORTED_ERRORS as e:
+                self.log.info(
+                    "Settings events not available, comparing settings "
+                    "instead: %s", e,
+                )
+                self._events_supported = False
+
+        settings = self._get_settings()
+        changes = diff_settings(self.settings, settings)
+        if changes:
+            self.log.info("Rez settings changed: %s", changes)
+            self._retry = True
+            self.on_change(settings, changes)
+        self._retry = False
+        self.settings = settings
+        return changes
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="rez-settings-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop polling, a running `on_change` isn't waited for longer."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                self.log.warning(
+                    "Settings check failed, retrying on the next poll",
+                    exc_info=True,
+                )
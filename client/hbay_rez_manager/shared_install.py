@@ -0,0 +1,104 @@
+"""Rez installed once on a network share, optionally synced to local disk.
+
+With `shared_install_root` set, the first host installs into the share
+while others wait on the install lock, afterwards hosts only validate the
+manifest and put the shared rez on PATH.
+
+With `shared_install_local_overlay` the shared python and rez folders are
+copied to local disk on first use, so launches don't read the interpreter
+and rez from the network. Absolute paths to the share in `pyvenv.cfg` and
+the script launchers are rewritten to the local copy.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import platform
+import shutil
+
+from .bundle_delta import relocate_file
+from .rez_installer import RezInstaller
+
+OVERLAY_MANIFEST_NAME = "rez_overlay.json"
+
+log = logging.getLogger(__name__)
+
+
+def get_shared_install_root(install_settings: dict) -> str:
+    """Shared root of the current platform, empty if not configured."""
+    roots = install_settings.get("shared_install_root") or {}
+    return roots.get(platform.system().lower(), "")
+
+
+def _relocate_venv(venv_folder: str, old_root: str, new_root: str) -> int:
+    """Point a copied rez venv from the shared root to the local one."""
+    old = old_root.encode("utf-8")
+    new = new_root.encode("utf-8")
+    relocated = 0
+    candidates = [os.path.join(venv_folder, "pyvenv.cfg")]
+    for bin_dir in ("bin", "Scripts"):
+        for root, _, files in os.walk(os.path.join(venv_folder, bin_dir)):
+            candidates.extend(os.path.join(root, name) for name in files)
+    for path in candidates:
+        if not os.path.islink(path) and relocate_file(path, old, new):
+            relocated += 1
+    return relocated
+
+
+def _copy_folder(source: str, destination: str) -> None:
+    temp_destination = f"{destination}.tmp-{os.getpid()}"
+    shutil.rmtree(temp_destination, ignore_errors=True)
+    shutil.copytree(source, temp_destination, symlinks=True)
+    shutil.rmtree(destination, ignore_errors=True)
+    os.replace(temp_destination, destination)
+
+
+def sync_local_overlay(
+    installer: RezInstaller,
+    overlay_root: str,
+    logger: logging.Logger = None,
+) -> str:
+    """Copy the shared bundle to `overlay_root` if it isn't there yet.
+
+    Returns:
+        str: Local rez bin folder to put on PATH.
+    """
+    logger = logger or log
+    shared_root = installer.root_folder
+    overlay_root = os.path.normpath(overlay_root)
+    manifest_path = os.path.join(overlay_root, OVERLAY_MANIFEST_NAME)
+    expected = {
+        "source": shared_root,
+        "bundle_version": installer.bundle_version,
+        "installed": {
+            key: value for key, value in (installer.installed or {}).items()
+            if key not in ("timings", "dedup")
+        },
+    }
+    rez_path_folder = os.path.join(
+        overlay_root,
+        os.path.relpath(installer.rez_path_folder, shared_root),
+    )
+    try:
+        with open(manifest_path) as f:
+            if json.load(f) == expected:
+                return rez_path_folder
+    except (OSError, ValueError):
+        pass
+
+    logger.info("Syncing shared rez %s to %s", shared_root, overlay_root)
+    python_folder = os.path.join(
+        installer.python_folder, f"python-{installer.python_version}")
+    for folder in (python_folder, installer.rez_folder):
+        _copy_folder(
+            folder,
+            os.path.join(overlay_root, os.path.relpath(folder, shared_root)),
+        )
+    local_rez_folder = os.path.join(
+        overlay_root, os.path.relpath(installer.rez_folder, shared_root))
+    relocated = _relocate_venv(local_rez_folder, shared_root, overlay_root)
+    logger.debug("Relocated %d files to %s", relocated, overlay_root)
+
+    with open(manifest_path, "w") as f:
+        json.dump(expected, f, indent=4)
+    return rez_path_folder
@@ -0,0 +1,120 @@
+"""Lightweight span based timing instrumentation."""
+from __future__ import annotations
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+
+class Span:
+    """A single timed operation with free form attributes."""
+
+    def __init__(self, name: str, category: str, attributes: dict):
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def set(self, **attributes) -> None:
+        """Add or update attributes, e.g. byte counts or retries."""
+        self.attributes.update(attributes)
+
+    def increment(self, key: str, value: int = 1) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def to_record(self) -> dict:
+        record = {
+            "span": self.name,
+            "category": self.category,
+            "duration": round(self.duration, 6),
+        }
+        if self.error:
+            record["error"] = self.error
+        record.update(self.attributes)
+        return record
+
+
+class Tracer:
+    """Collects spans, logs them as JSON and exports Chrome traces.
+
+    Finished spans are logged as one JSON record each on debug level.
+    `export_chrome_trace` writes a file that can be opened in
+    `chrome://tracing` or https://ui.perfetto.dev.
+    """
+
+    def __init__(self, logger: logging.Logger = None):
+        self.log = logger or logging.getLogger(self.__class__.__name__)
+        self.spans: list[Span] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "installer", **attributes):
+        span = Span(name, category, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{e.__class__.__name__}: {e}"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            with self._lock:
+                self.spans.append(span)
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(json.dumps(span.to_record(), default=str))
+
+    def summary(self) -> dict:
+        """Totals per span name, meant to be stored in the manifest."""
+        summary = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            item = summary.setdefault(
+                span.name, {"count": 0, "seconds": 0.0}
+            )
+            item["count"] += 1
+            item["seconds"] += span.duration
+            for key in ("bytes", "retries"):
+                if key in span.attributes:
+                    item[key] = item.get(key, 0) + span.attributes[key]
+            if span.error:
+                item["errors"] = item.get("errors", 0) + 1
+        for item in summary.values():
+            item["seconds"] = round(item["seconds"], 3)
+        return summary
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write collected spans in Chrome trace event format."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": int((span.start - self._origin) * 1e6),
+                "dur": int(span.duration * 1e6),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.to_record(),
+            }
+            for span in spans
+        ]
+        try:
+            with open(path, "w") as f:
+                json.dump({"traceEvents": events}, f, default=str)
+        except OSError as e:
+            self.log.error("Failed to write trace file %s: %s", path, e)
+        else:
+            self.log.info("Wrote trace file %s", path)
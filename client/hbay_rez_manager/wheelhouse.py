@@ -0,0 +1,192 @@
+"""Wheels of the pip dependencies, downloaded once and shared by all bundles.
+
+`<rez root>/wheelhouse` holds the wheels of every dependency set the
+installer was asked for, e.g. PySide6 for python 3.13 on linux x86_64.
+Wheels are downloaded with `pip download`, which checks them against the
+hashes published by the index, and recorded in `index.json` with their
+sha256::
+
+    {
+        "files": {"<wheel>": [size, mtime_ns, sha256]},
+        "sets": {"<key>": {"requirements": [...], "python_version": ...,
+                           "target": ..., "wheels": ["<wheel>", ...]}}
+    }
+
+A set is keyed by requirements, python version and platform target. Once
+all its wheels are present and unchanged, bundles install it with
+`--no-index` from the wheelhouse. Files which aren't in the index or don't
+match it anymore, e.g. from an interrupted download, are removed before
+the next prefetch.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+
+from .install_lock import InstallLock
+from .mirror import PYTHON_TARGET_PLATFORMS, get_file_sha256
+
+WHEELHOUSE_INDEX_NAME = "index.json"
+WHEELHOUSE_LOCK_NAME = ".lock"
+
+# pip download output for new and already present files
+_PIP_FILE_RE = re.compile(
+    r"^(?:Saved|File was already downloaded)\s+(.+\.whl)\s*$", re.MULTILINE)
+
+log = logging.getLogger(__name__)
+
+
+def get_set_key(requirements: list[str], python_version: str, target: str) -> str:
+    data = json.dumps(
+        [sorted(requirements), python_version, target], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+class Wheelhouse:
+    """Verified wheel store in `root`, see module docs."""
+
+    def __init__(self, root: str, logger: logging.Logger = None):
+        self.root = root
+        self.log = logger or log
+        self.index_path = os.path.join(root, WHEELHOUSE_INDEX_NAME)
+
+    def load_index(self) -> dict:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("files", {})
+        index.setdefault("sets", {})
+        return index
+
+    def _write_index(self, index: dict) -> None:
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(index, f, indent=4, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+
+    def _is_valid(self, name: str, entry: list | None) -> bool:
+        """Unchanged since it was indexed, re-hashed if the stat differs."""
+        if not entry:
+            return False
+        try:
+            stat = os.stat(os.path.join(self.root, name))
+        except OSError:
+            return False
+        if [stat.st_size, stat.st_mtime_ns] == entry[:2]:
+            return True
+        return (
+            stat.st_size == entry[0]
+            and get_file_sha256(os.path.join(self.root, name)) == entry[2]
+        )
+
+    def get_wheels(
+        self, requirements: list[str], python_version: str, target: str
+    ) -> list[str] | None:
+        """Wheel paths of a complete, verified set, None if not prefetched."""
+        index = self.load_index()
+        wheel_set = index["sets"].get(
+            get_set_key(requirements, python_version, target))
+        if not wheel_set:
+            return None
+        files = index["files"]
+        if not all(self._is_valid(n, files.get(n)) for n in wheel_set["wheels"]):
+            return None
+        return [os.path.join(self.root, n) for n in wheel_set["wheels"]]
+
+    def verify(self) -> int:
+        """Drop files that aren't indexed or changed, returns the count."""
+        index = self.load_index()
+        removed = 0
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith(".whl"):
+                continue
+            if self._is_valid(entry.name, index["files"].get(entry.name)):
+                continue
+            self.log.warning("Removing unverified wheel %s", entry.path)
+            os.remove(entry.path)
+            index["files"].pop(entry.name, None)
+            removed += 1
+        if removed:
+            self._write_index(index)
+        return removed
+
+    def prefetch(
+        self,
+        requirements: list[str],
+        python_version: str,
+        target: str,
+        python: str = None,
+        env: dict = None,
+    ) -> list[str]:
+        """Download the wheels of a set unless it is complete already.
+
+        Args:
+            requirements (list[str]): pip requirements.
+            python_version (str): Python the wheels are for.
+            target (str): python-build-standalone target, e.g.
+                `x86_64-unknown-linux-gnu`.
+            python (str): Python with pip to run the download with, doesn't
+                have to match `python_version`.
+            env (dict): Environment of the pip process.
+
+        Returns:
+            list[str]: Wheel paths of the set.
+        """
+        wheels = self.get_wheels(requirements, python_version, target)
+        if wheels is not None:
+            return wheels
+
+        os.makedirs(self.root, exist_ok=True)
+        # One prefetch at a time, e.g. the tray's and the installer's
+        with InstallLock(
+            os.path.join(self.root, WHEELHOUSE_LOCK_NAME), logger=self.log
+        ):
+            wheels = self.get_wheels(requirements, python_version, target)
+            if wheels is not None:
+                return wheels
+            self.verify()
+
+            cmd = [
+                python or sys.executable, "-m", "pip", "download",
+                "--dest", self.root,
+                "--only-binary=:all:",
+                "--python-version", python_version,
+                "--disable-pip-version-check",
+            ]
+            for platform_tag in PYTHON_TARGET_PLATFORMS.get(target, []):
+                cmd += ["--platform", platform_tag]
+            self.log.info("Prefetching wheels of %s", requirements)
+            result = subprocess.run(
+                cmd + list(requirements),
+                env=env, check=True, capture_output=True, text=True,
+            )
+            names = sorted({
+                os.path.basename(path)
+                for path in _PIP_FILE_RE.findall(result.stdout)
+            })
+            if not names:
+                raise RuntimeError(
+                    f"pip download reported no wheels: {result.stdout}")
+
+            index = self.load_index()
+            for name in names:
+                if self._is_valid(name, index["files"].get(name)):
+                    continue
+                path = os.path.join(self.root, name)
+                stat = os.stat(path)
+                index["files"][name] = [
+                    stat.st_size, stat.st_mtime_ns, get_file_sha256(path)]
+            index["sets"][get_set_key(requirements, python_version, target)] = {
+                "requirements": sorted(requirements),
+                "python_version": python_version,
+                "target": target,
+                "wheels": names,
+            }
+            self._write_index(index)
+            return [os.path.join(self.root, name) for name in names]
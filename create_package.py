@@ -24,7 +24,10 @@ from __future__ import annotations
 
 import argparse
 import collections
+import concurrent.futures
+import hashlib
 import io
+import json
 import logging
 import os
 import platform
@@ -32,9 +35,11 @@ import re
 import shutil
 import subprocess
 import sys
+import time
 import zipfile
+import zlib
 from pathlib import Path
-from typing import Iterable, Optional, Pattern, Tuple, Union
+from typing import Iterable, Iterator, Optional, Pattern, Tuple, Union
 
 import package
 
@@ -51,6 +56,12 @@ DST_DIST_DIR: str = os.path.join("frontend", "dist")
 PRIVATE_ROOT: str = os.path.join(CURRENT_ROOT, "private")
 PUBLIC_ROOT: str = os.path.join(CURRENT_ROOT, "public")
 CLIENT_ROOT: str = os.path.join(CURRENT_ROOT, "client")
+# Cache of compressed zip members used by '--incremental' builds
+PACKAGE_CACHE_ROOT: str = os.path.join(CURRENT_ROOT, ".package_cache")
+# SHA256 manifest embedded into zips created with '--deterministic'
+PACKAGE_MANIFEST_NAME: str = "package_manifest.json"
+# Compression level used by '--fast' development builds
+FAST_COMPRESS_LEVEL: int = 1
 
 VERSION_PY_CONTENT = (
     f'''"""Package declaring AYON addon '{ADDON_NAME}' version."""
@@ -80,6 +91,15 @@ IGNORE_FILE_PATTERNS: list[Pattern] = [
     )
 ]
 
+# Already compressed files are stored, deflating them again only costs time
+STORED_FILE_PATTERNS: list[Pattern] = [
+    re.compile(pattern)
+    for pattern in (
+        r"\.(png|jpe?g|gif|ico|zip|gz|zst|whl|7z)$",
+    )
+]
+STORED_DIR_NAMES: set[str] = {"icons", "images"}
+
 
 class ZipFileLongPaths(zipfile.ZipFile):
     r"""Allows longer paths in zip files.
@@ -185,19 +205,24 @@ def find_files_in_subdir(
     while hierarchy_queue:
         item: FileMapping = hierarchy_queue.popleft()
         dirpath, parents = item
-        for name in os.listdir(dirpath):
-            path: str = os.path.join(dirpath, name)
-            if os.path.isfile(path):
-                if not _value_match_regexes(name, ignore_file_patterns):
-                    items: list[str] = list(parents)
+        # 'scandir' entries carry the file type, no extra stat per entry
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                name: str = entry.name
+                if entry.is_file():
+                    if not _value_match_regexes(name, ignore_file_patterns):
+                        items: list[str] = list(parents)
+                        items.append(name)
+                        output.append((entry.path, os.path.sep.join(items)))
+                    continue
+
+                if not entry.is_dir():
+                    continue
+
+                if not _value_match_regexes(name, ignore_dir_patterns):
+                    items = list(parents)
                     items.append(name)
-                    output.append((path, os.path.sep.join(items)))
-                continue
-
-            if not _value_match_regexes(name, ignore_dir_patterns):
-                items = list(parents)
-                items.append(name)
-                hierarchy_queue.append((path, items))
+                    hierarchy_queue.append((entry.path, items))
 
     return output
 
@@ -237,7 +262,7 @@ def build_frontend() -> None:
         raise RuntimeError(msg)
 
 
-def get_client_files_mapping(addon_client_dir: str) -> set[FileMapping]:
+def get_client_files_mapping(addon_client_dir: str) -> list[FileMapping]:
     """Mapping of source client code files to destination paths.
 
     Example output:
@@ -273,33 +298,420 @@ def get_client_files_mapping(addon_client_dir: str) -> set[FileMapping]:
     license_path = os.path.join(CURRENT_ROOT, "LICENSE")
     if os.path.exists(license_path):
         mapping.append((license_path, f"{addon_client_dir}/LICENSE"))
-    return set(mapping)
+    # Remove duplicates and keep the order stable between builds
+    return _sort_files_mapping(set(mapping))
+
+
+def _sort_files_mapping(
+        files_mapping: Iterable[FileMapping]) -> list[FileMapping]:
+    return sorted(
+        files_mapping, key=lambda item: item[1].replace(os.path.sep, "/")
+    )
+
+
+def _get_deterministic_date_time() -> tuple:
+    """Timestamp used for all members of deterministic zips.
+
+    Respects 'SOURCE_DATE_EPOCH' (reproducible-builds.org), zip can't store
+    dates before 1980.
+    """
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if source_date_epoch:
+        date_time = time.gmtime(int(source_date_epoch))[:6]
+        if date_time[0] >= 1980:
+            return date_time
+    return (1980, 1, 1, 0, 0, 0)
+
+
+def _get_compress_type(subpath: str) -> int:
+    """Compression method of a zip member based on its destination path."""
+    parts: list[str] = subpath.replace(os.path.sep, "/").split("/")
+    if (
+        STORED_DIR_NAMES.intersection(parts[:-1])
+        or _value_match_regexes(parts[-1], STORED_FILE_PATTERNS)
+    ):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _create_zipinfo(
+    subpath: str,
+    src_path: Optional[str] = None,
+    deterministic: bool = False
+) -> zipfile.ZipInfo:
+    """Create zip member info for a file.
+
+    Deterministic members have a fixed timestamp, creator system and
+    permissions so the zip doesn't depend on the machine it was built on.
+    """
+    if deterministic:
+        zinfo = zipfile.ZipInfo(subpath, _get_deterministic_date_time())
+        zinfo.create_system = 3
+        zinfo.external_attr = 0o100644 << 16
+    elif src_path:
+        zinfo = zipfile.ZipInfo.from_file(src_path, subpath)
+    else:
+        zinfo = zipfile.ZipInfo(subpath, time.localtime(time.time())[:6])
+    zinfo.compress_type = _get_compress_type(subpath)
+    return zinfo
+
+
+def _get_manifest_content(file_hashes: dict[str, str]) -> bytes:
+    """SHA256 manifest of zip members.
+
+    'content_hash' is calculated from the file hashes only, so identical
+    content has the same hash no matter how it was compressed.
+    """
+    files = dict(sorted(file_hashes.items()))
+    content_hash = hashlib.sha256(
+        json.dumps(files, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    manifest = {
+        "addon_name": ADDON_NAME,
+        "addon_version": ADDON_VERSION,
+        "content_hash": content_hash,
+        "files": files,
+    }
+    return json.dumps(manifest, indent=4, sort_keys=True).encode("utf-8")
+
+
+def _write_zip_members(
+    zipf: zipfile.ZipFile,
+    files_mapping: Iterable[FileMapping],
+    deterministic: bool = False,
+    compress_level: int = zlib.Z_DEFAULT_COMPRESSION,
+    jobs: Optional[int] = None
+) -> None:
+    """Write files to zip, deterministic mode adds SHA256 manifest.
+
+    Args:
+        zipf (zipfile.ZipFile): Zip file opened for writing.
+        files_mapping (Iterable[FileMapping]): Source files and
+            destination subpaths.
+        deterministic (bool): Create reproducible zip with SHA256 manifest.
+        compress_level (int): Deflate compression level.
+        jobs (Optional[int]): Compress files in a process pool with given
+            number of workers, '0' uses all CPUs. Single thread if 'None'.
+
+    """
+    if deterministic:
+        files_mapping = _sort_files_mapping(files_mapping)
+    else:
+        files_mapping = list(files_mapping)
+
+    compressed_files: Iterator[tuple] = iter(())
+    if jobs is not None:
+        compressed_files = _iter_compressed_files(
+            [
+                (src_path, _get_compress_type(subpath), compress_level)
+                for src_path, subpath in files_mapping
+                if not isinstance(src_path, io.BytesIO)
+            ],
+            jobs
+        )
+
+    file_hashes: dict[str, str] = {}
+    for src_path, subpath in files_mapping:
+        if isinstance(src_path, io.BytesIO):
+            data = src_path.getvalue()
+        elif jobs is not None:
+            raw_data, crc, file_size, sha256 = next(compressed_files)
+            zinfo = _create_zipinfo(subpath, src_path, deterministic)
+            zinfo.CRC = crc
+            zinfo.file_size = file_size
+            zinfo.compress_size = len(raw_data)
+            _write_raw_member(zipf, zinfo, raw_data)
+            file_hashes[zinfo.filename] = sha256
+            continue
+        elif not deterministic:
+            zipf.write(
+                src_path,
+                subpath,
+                compress_type=_get_compress_type(subpath),
+                compresslevel=compress_level
+            )
+            continue
+        else:
+            data = Path(src_path).read_bytes()
+        zinfo = _create_zipinfo(subpath, deterministic=deterministic)
+        zipf.writestr(zinfo, data, compresslevel=compress_level)
+        file_hashes[zinfo.filename] = hashlib.sha256(data).hexdigest()
+
+    if deterministic:
+        zipf.writestr(
+            _create_zipinfo(PACKAGE_MANIFEST_NAME, deterministic=True),
+            _get_manifest_content(file_hashes)
+        )
 
 
 def get_client_zip_content(
-        addon_client_dir: str, log: logging.Logger) -> io.BytesIO:
+    addon_client_dir: str,
+    log: logging.Logger,
+    deterministic: bool = False,
+    compress_level: int = zlib.Z_DEFAULT_COMPRESSION,
+    jobs: Optional[int] = None
+) -> io.BytesIO:
     """Prepare client code zip.
 
     Args:
         addon_client_dir (str): Client directory path.
         log (logging.Logger): Logger object.
+        deterministic (bool): Create reproducible zip with SHA256 manifest.
+        compress_level (int): Deflate compression level.
+        jobs (Optional[int]): Number of compression processes.
 
     Returns:
         io.BytesIO: BytesIO object with zipped client code.
 
     """
     log.info("Preparing client code zip")
-    files_mapping: set[FileMapping] = get_client_files_mapping(
+    files_mapping: list[FileMapping] = get_client_files_mapping(
         addon_client_dir)
     stream = io.BytesIO()
     with ZipFileLongPaths(stream, "w", zipfile.ZIP_DEFLATED) as zipf:
+        _write_zip_members(
+            zipf, files_mapping, deterministic, compress_level, jobs)
+    stream.seek(0)
+    return stream
+
+
+def _get_file_sha256(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _compress_member_data(
+    data: bytes, compress_type: int, compress_level: int
+) -> bytes:
+    """Compress data the same way 'zipfile' would store it in a member."""
+    if compress_type == zipfile.ZIP_STORED:
+        return data
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_file(job: tuple[str, int, int]) -> tuple[bytes, int, int, str]:
+    """Process pool worker compressing one file.
+
+    Returns:
+        tuple[bytes, int, int, str]: Compressed data, CRC32, uncompressed
+            size and sha256 of the file.
+
+    """
+    src_path, compress_type, compress_level = job
+    data = Path(src_path).read_bytes()
+    return (
+        _compress_member_data(data, compress_type, compress_level),
+        zlib.crc32(data),
+        len(data),
+        hashlib.sha256(data).hexdigest(),
+    )
+
+
+def _iter_compressed_files(
+    jobs_args: list[tuple[str, int, int]], jobs: Optional[int]
+) -> Iterator[tuple[bytes, int, int, str]]:
+    """Compress files concurrently, results are yielded in input order."""
+    if jobs == 1 or len(jobs_args) < 2:
+        for job_args in jobs_args:
+            yield _compress_file(job_args)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs or None
+    ) as executor:
+        yield from executor.map(_compress_file, jobs_args, chunksize=4)
+
+
+def _write_raw_member(
+    zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, raw_data: bytes
+) -> None:
+    """Write already compressed member data into an open zip file.
+
+    'zipfile' has no public API to add pre-compressed data, this follows
+    what 'ZipFile.mkdir' does internally. 'zinfo' must have 'CRC',
+    'file_size', 'compress_size' and 'compress_type' filled.
+    """
+    with zipf._lock:  # noqa: SLF001
+        if zipf._seekable:  # noqa: SLF001
+            zipf.fp.seek(zipf.start_dir)
+        zinfo.header_offset = zipf.fp.tell()
+        zipf._writecheck(zinfo)  # noqa: SLF001
+        zipf._didModify = True  # noqa: SLF001
+
+        zipf.fp.write(zinfo.FileHeader())
+        zipf.fp.write(raw_data)
+        zipf.filelist.append(zinfo)
+        zipf.NameToInfo[zinfo.filename] = zinfo
+        zipf.start_dir = zipf.fp.tell()
+
+
+def write_zip_incremental(
+    output_path: str,
+    files_mapping: Iterable[FileMapping],
+    cache_dir: str,
+    log: logging.Logger,
+    compress_level: int = zlib.Z_DEFAULT_COMPRESSION,
+    deterministic: bool = False,
+    jobs: Optional[int] = None,
+) -> None:
+    """Write zip file directly to disk reusing cached compressed members.
+
+    Cache index stores per destination subpath the source file size,
+    mtime and sha256. Files with unchanged size and mtime are not read at
+    all, files with a known sha256 reuse the compressed bytes from the
+    cache, only new content is compressed.
+
+    Args:
+        output_path (str): Path to output zip file.
+        files_mapping (Iterable[FileMapping]): Source files and
+            destination subpaths.
+        cache_dir (str): Directory where the cache is stored.
+        log (logging.Logger): Logger object.
+        compress_level (int): Deflate compression level.
+        deterministic (bool): Create reproducible zip with SHA256 manifest.
+        jobs (Optional[int]): Number of processes compressing changed files.
+
+    """
+    blobs_dir = os.path.join(cache_dir, "blobs")
+    index_path = os.path.join(cache_dir, "index.json")
+    os.makedirs(blobs_dir, exist_ok=True)
+
+    index: dict = {}
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as stream:
+                index = json.load(stream)
+        except (OSError, ValueError):
+            log.warning("Zip cache index is invalid, rebuilding it")
+
+    if deterministic:
+        files_mapping = _sort_files_mapping(files_mapping)
+    else:
+        files_mapping = list(files_mapping)
+
+    # Find out which files can be taken from cache
+    new_index: dict = {}
+    changed: list[tuple[str, int, int]] = []
+    changed_subpaths: set[str] = set()
+    for src_path, subpath in files_mapping:
+        if isinstance(src_path, io.BytesIO):
+            continue
+        stat = os.stat(src_path)
+        cached = index.get(subpath) or {}
+        if (
+            cached.get("size") == stat.st_size
+            and cached.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            sha256 = cached["sha256"]
+        else:
+            sha256 = _get_file_sha256(src_path)
+
+        compress_type = _get_compress_type(subpath)
+        blob_name = f"{sha256}.{compress_type}.{compress_level}"
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "crc": cached.get("crc"),
+            "blob": blob_name,
+        }
+        blob_path = os.path.join(blobs_dir, blob_name)
+        if cached.get("blob") != blob_name or not os.path.exists(blob_path):
+            changed.append((src_path, compress_type, compress_level))
+            changed_subpaths.add(subpath)
+        new_index[subpath] = entry
+
+    compressed_files = _iter_compressed_files(changed, jobs)
+
+    file_hashes: dict[str, str] = {}
+    tmp_path = f"{output_path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with ZipFileLongPaths(tmp_path, "w", zipfile.ZIP_DEFLATED) as zipf:
         for src_path, subpath in files_mapping:
             if isinstance(src_path, io.BytesIO):
-                zipf.writestr(subpath, src_path.getvalue())
+                data = src_path.getvalue()
+                zinfo = _create_zipinfo(subpath, deterministic=deterministic)
+                zipf.writestr(zinfo, data, compresslevel=compress_level)
+                file_hashes[zinfo.filename] = hashlib.sha256(data).hexdigest()
+                continue
+
+            entry = new_index[subpath]
+            blob_path = os.path.join(blobs_dir, entry["blob"])
+            if subpath in changed_subpaths:
+                raw_data, entry["crc"], _, _ = next(compressed_files)
+                with open(blob_path, "wb") as stream:
+                    stream.write(raw_data)
             else:
-                zipf.write(src_path, subpath)
-    stream.seek(0)
-    return stream
+                with open(blob_path, "rb") as stream:
+                    raw_data = stream.read()
+
+            zinfo = _create_zipinfo(subpath, src_path, deterministic)
+            zinfo.CRC = entry["crc"]
+            zinfo.file_size = entry["size"]
+            zinfo.compress_size = len(raw_data)
+            _write_raw_member(zipf, zinfo, raw_data)
+            file_hashes[zinfo.filename] = entry["sha256"]
+
+        if deterministic:
+            zipf.writestr(
+                _create_zipinfo(PACKAGE_MANIFEST_NAME, deterministic=True),
+                _get_manifest_content(file_hashes)
+            )
+    os.replace(tmp_path, output_path)
+
+    # Drop blobs of files which are not part of the package anymore
+    used_blobs = {entry["blob"] for entry in new_index.values()}
+    for dir_entry in os.scandir(blobs_dir):
+        if dir_entry.name not in used_blobs:
+            os.remove(dir_entry.path)
+
+    with open(index_path, "w", encoding="utf-8") as stream:
+        json.dump(new_index, stream, indent=4, sort_keys=True)
+
+    log.info(
+        "Reused %d of %d cached zip members",
+        len(new_index) - len(changed),
+        len(new_index)
+    )
+
+
+def get_client_zip_path_incremental(
+    addon_client_dir: str,
+    log: logging.Logger,
+    deterministic: bool = False,
+    compress_level: int = zlib.Z_DEFAULT_COMPRESSION,
+    jobs: Optional[int] = None
+) -> str:
+    """Prepare client code zip on disk using the compressed members cache.
+
+    Args:
+        addon_client_dir (str): Client directory path.
+        log (logging.Logger): Logger object.
+        deterministic (bool): Create reproducible zip with SHA256 manifest.
+        compress_level (int): Deflate compression level.
+        jobs (Optional[int]): Number of compression processes.
+
+    Returns:
+        str: Path to zipped client code.
+
+    """
+    log.info("Preparing client code zip (incremental)")
+    cache_dir = os.path.join(PACKAGE_CACHE_ROOT, "client")
+    output_path = os.path.join(PACKAGE_CACHE_ROOT, "client.zip")
+    write_zip_incremental(
+        output_path,
+        get_client_files_mapping(addon_client_dir),
+        cache_dir,
+        log,
+        compress_level=compress_level,
+        deterministic=deterministic,
+        jobs=jobs,
+    )
+    return output_path
 
 
 def get_base_files_mapping() -> list[FileMapping]:
@@ -417,15 +829,24 @@ def copy_addon_package(
 def create_addon_package(
     output_dir: str,
     files_mapping: list[FileMapping],
-    log: logging.Logger
+    log: logging.Logger,
+    deterministic: bool = False,
+    compress_level: int = zlib.Z_DEFAULT_COMPRESSION,
+    jobs: Optional[int] = None
 ) -> None:
     """Create zip package for addon.
 
+    Deterministic packages also get a '.sha256' file next to the zip so
+    identical builds can be recognized without opening them.
+
     Args:
         output_dir (str): Directory path to output package.
         files_mapping (list[FileMapping]): List of tuples with source file
             and destination subpath.
         log (logging.Logger): Logger object
+        deterministic (bool): Create reproducible zip with SHA256 manifest.
+        compress_level (int): Deflate compression level.
+        jobs (Optional[int]): Number of compression processes.
 
     """
     log.info("Creating package for %s-%s", ADDON_NAME, ADDON_VERSION)
@@ -437,11 +858,16 @@ def create_addon_package(
 
     with ZipFileLongPaths(output_path, "w", zipfile.ZIP_DEFLATED) as zipf:
         # Copy server content
-        for src_file, dst_subpath in files_mapping:
-            if isinstance(src_file, io.BytesIO):
-                zipf.writestr(dst_subpath, src_file.getvalue())
-            else:
-                zipf.write(src_file, dst_subpath)
+        _write_zip_members(
+            zipf, files_mapping, deterministic, compress_level, jobs)
+
+    if deterministic:
+        package_hash = _get_file_sha256(output_path)
+        Path(f"{output_path}.sha256").write_text(
+            f"{package_hash}  {os.path.basename(output_path)}\n",
+            encoding="utf-8"
+        )
+        log.info("Package sha256: %s", package_hash)
 
     log.info("Package created")
 
@@ -451,10 +877,18 @@ def main(
     addon_client_dir: Optional[str] = None,
     *,
     skip_zip: Optional[bool] = False,
-    only_client: Optional[bool] = False
+    only_client: Optional[bool] = False,
+    incremental: Optional[bool] = False,
+    deterministic: Optional[bool] = False,
+    compress_level: Optional[int] = None,
+    jobs: Optional[int] = None,
+    fast: Optional[bool] = False
 ) -> None:
     """Main function to create package.
 
+    Compression is single threaded unless 'jobs' is set, 'fast' trades
+    package size for speed and overrides 'compress_level'.
+
     Raises:
         RuntimeError: If client code is not found.
 
@@ -465,6 +899,11 @@ def main(
     if not output_dir:
         output_dir = os.path.join(CURRENT_ROOT, "package")
 
+    if fast:
+        compress_level = FAST_COMPRESS_LEVEL
+    elif compress_level is None:
+        compress_level = zlib.Z_DEFAULT_COMPRESSION
+
     # has_client_code = bool(addon_client_dir)
     if addon_client_dir:
         client_dir: str = os.path.join(CLIENT_ROOT, addon_client_dir)
@@ -493,17 +932,31 @@ def main(
     files_mapping: list[FileMapping] = []
     files_mapping.extend(get_base_files_mapping())
 
-    if addon_client_dir:
+    if addon_client_dir and incremental:
+        files_mapping.append(
+            (get_client_zip_path_incremental(
+                addon_client_dir, log, deterministic, compress_level, jobs),
+             "private/client.zip")
+        )
+    elif addon_client_dir:
         files_mapping.append(
             (get_client_zip_content(
-                addon_client_dir, log), "private/client.zip")
+                addon_client_dir, log, deterministic, compress_level, jobs),
+             "private/client.zip")
         )
 
     # Skip server zipping
     if skip_zip:
         copy_addon_package(output_dir, files_mapping, log)
     else:
-        create_addon_package(output_dir, files_mapping, log)
+        create_addon_package(
+            output_dir,
+            files_mapping,
+            log,
+            deterministic,
+            compress_level,
+            jobs
+        )
 
     log.info("Package creation finished")
 
@@ -537,6 +990,51 @@ if __name__ == "__main__":
             " Requires '-o', '--output' argument to be filled."
         )
     )
+    parser.add_argument(
+        "--incremental",
+        dest="incremental",
+        action="store_true",
+        help=(
+            "Reuse compressed client files from previous builds."
+            " Cache is stored in '.package_cache' next to this script."
+        )
+    )
+    parser.add_argument(
+        "--deterministic",
+        dest="deterministic",
+        action="store_true",
+        help=(
+            "Create reproducible zips with sorted members, fixed timestamps"
+            " and permissions and an embedded SHA256 manifest."
+        )
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        dest="jobs",
+        type=int,
+        default=None,
+        help=(
+            "Compress files in a process pool with given number of workers,"
+            " '0' uses all CPUs. Single threaded by default."
+        )
+    )
+    parser.add_argument(
+        "--compress-level",
+        dest="compress_level",
+        type=int,
+        choices=range(0, 10),
+        default=None,
+        help="Deflate compression level (0-9)."
+    )
+    parser.add_argument(
+        "--fast",
+        dest="fast",
+        action="store_true",
+        help=(
+            "Prefer speed over size, useful for development builds."
+            " Overrides '--compress-level'."
+        )
+    )
     parser.add_argument(
         "--debug",
         dest="debug",
@@ -553,5 +1051,10 @@ if __name__ == "__main__":
         args.output_dir,
         ADDON_CLIENT_DIR,
         skip_zip=args.skip_zip,
-        only_client=args.only_client
+        only_client=args.only_client,
+        incremental=args.incremental,
+        deterministic=args.deterministic,
+        compress_level=args.compress_level,
+        jobs=args.jobs,
+        fast=args.fast
     )
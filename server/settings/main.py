@@ -1,8 +1,15 @@
 """Settings for the addon."""
 from typing import Any
-from pydantic import Field
+from pydantic import Field, validator
+from ayon_server.exceptions import BadRequestException
 from ayon_server.settings import BaseSettingsModel, SettingsField
 
+from .rez_config_schema import (
+    hash_rez_config,
+    parse_rez_config_json,
+    render_rez_config,
+)
+
 class MultiplatformPath(BaseSettingsModel):
     windows: str = Field("", title="Windows")
     linux: str = Field("", title="Linux")
@@ -46,6 +53,44 @@ class RezInstallOptions(BaseSettingsModel):
         default_factory=str,
     )
 
+    wheelhouse_enabled: bool = SettingsField(
+        True,
+        title="Shared Wheelhouse",
+        description="Download the pip dependency wheels once into the rez root and install every bundle from there",
+    )
+
+    mirror_root: str = SettingsField(
+        title="Offline Mirror Root",
+        description="Directory, file:// or http(s):// root of a mirror populated with `python -m hbay_rez_manager.mirror`. When set, python, rez, graphviz and wheels are only taken from the mirror",
+        default_factory=str,
+    )
+
+    shared_install_root: MultiplatformPath = SettingsField(
+        default_factory=MultiplatformPath,
+        title="Shared Install Root",
+        description="UNC/NFS folder rez is installed to once for all hosts, one host installs while the others wait. Empty installs per user",
+    )
+
+    shared_install_local_overlay: bool = SettingsField(
+        False,
+        title="Local Copy of Shared Install",
+        description="Copy the shared python and rez to the local user folder on first use",
+    )
+
+    install_phase_timeout: float = SettingsField(
+        30.0,
+        title="Install Phase Timeout (minutes)",
+        description="The tray install is cancelled if a single phase, e.g. downloading or installing the pip dependencies, takes longer",
+        ge=0.0,
+    )
+
+    settings_check_interval: int = SettingsField(
+        60,
+        title="Settings Check Interval (seconds)",
+        description="How often the tray checks for changed rez settings, changes are installed in the background without a tray restart. 0 disables the check",
+        ge=0,
+    )
+
 
 class RezConfigOptions(BaseSettingsModel):
     config_type: str = SettingsField(
@@ -71,6 +116,129 @@ class RezConfigOptions(BaseSettingsModel):
         title="Path pointing to file will be set to REZ_CONFIG_FILE",
         description="This can expand variables like %localappdata%.",
     )
+    config_web_rendered: str = SettingsField(
+        "",
+        title="Generated rezconfig.py (read-only)",
+        description="Generated from 'Rez Config JSON' on save, clients write this content as is",
+        widget="textarea",
+    )
+    config_web_hash: str = SettingsField(
+        "",
+        title="Generated rezconfig.py hash (read-only)",
+        description="SHA256 of the generated rezconfig.py, clients only compare this",
+    )
+    package_index_enabled: bool = SettingsField(
+        False,
+        title="Local Package Index",
+        description="Keep a local index of the package family and version folders and package.py files of the shared packages_path entries, resolves read it instead of listing the shares",
+    )
+    package_index_interval: int = SettingsField(
+        300,
+        title="Package Index Refresh Interval (seconds)",
+        description="How often the tray refreshes the package index, changed families are detected on resolve in between. 0 only refreshes on tray start",
+        ge=0,
+    )
+    package_cache_enabled: bool = SettingsField(
+        False,
+        title="Local Package Payload Cache",
+        description="Copy the payloads of frequently launched packages to the rez package cache on local disk in the background, launches use the local copies",
+    )
+    package_cache_max_size: float = SettingsField(
+        20.0,
+        title="Package Payload Cache Size (GB)",
+        description="Least recently used packages are evicted above this size",
+        ge=0.0,
+    )
+    package_cache_min_launches: int = SettingsField(
+        3,
+        title="Package Payload Cache Minimum Launches",
+        description="Launches within 30 days after which a package is copied to the cache",
+        ge=1,
+    )
+
+    @validator("config_web")
+    def validate_config_web(cls, value):
+        try:
+            parse_rez_config_json(value)
+        except ValueError as e:
+            raise BadRequestException(str(e)) from e
+        return value
+
+    @validator("config_web_rendered", always=True)
+    def render_config_web(cls, value, values):
+        # always regenerate, the field is derived from 'config_web'
+        config_web = values.get("config_web")
+        if not config_web:
+            return ""
+        return render_rez_config(parse_rez_config_json(config_web))
+
+    @validator("config_web_hash", always=True)
+    def hash_config_web(cls, value, values):
+        rendered = values.get("config_web_rendered")
+        if not rendered:
+            return ""
+        return hash_rez_config(rendered)
+
+
+def _env_transport_enum():
+    return [
+        {"value": "marshal", "label": "Binary payload file (robust to stdout prints)"},
+        {"value": "json", "label": "JSON on stdout"},
+    ]
+
+
+class RezLaunchOptions(BaseSettingsModel):
+    env_transport: str = SettingsField(
+        "marshal",
+        title="Resolved Environment Transport",
+        enum_resolver=_env_transport_enum,
+        description="How the resolved environment is passed from rez to the launch hook",
+    )
+    resolve_cache_enabled: bool = SettingsField(
+        True,
+        title="Cache Resolved Contexts",
+        description="Store resolved contexts and reuse them on launch",
+    )
+    resolve_cache_ttl: float = SettingsField(
+        12.0,
+        title="Resolve Cache TTL (hours)",
+        ge=0.0,
+        description="Hours a cached context is reused before resolving again",
+    )
+    failure_cache_ttl: float = SettingsField(
+        5.0,
+        title="Failed Resolve Cache TTL (minutes)",
+        ge=0.0,
+        description="Minutes a failed resolve is reported again without resolving",
+    )
+    resolve_neighbour_enabled: bool = SettingsField(
+        False,
+        title="Resolve from Similar Cached Contexts",
+        description="Resolve a request that differs from a cached one by a "
+                    "few packages with the versions of the cached context "
+                    "and log the environment difference",
+    )
+    resolve_neighbour_max_changes: int = SettingsField(
+        1,
+        title="Similar Context Max Changed Packages",
+        ge=1,
+        le=10,
+        description="Number of differing package requests a cached context "
+                    "is still used for",
+    )
+    pre_resolve_on_tray_start: bool = SettingsField(
+        True,
+        title="Pre-resolve Applications on Tray Start",
+        description="Resolve AYON_REZ_PACKAGES of all application variants "
+                    "and tools in the background when the tray starts",
+    )
+    pre_resolve_workers: int = SettingsField(
+        4,
+        title="Pre-resolve Workers",
+        ge=1,
+        le=32,
+        description="Number of parallel rez processes used to pre-resolve",
+    )
 
 
 class RezStandaloneAppConfig(BaseSettingsModel):
@@ -106,6 +274,10 @@ class RezManagerSettings(BaseSettingsModel):
         title="Rez Config Options",
         default_factory=RezConfigOptions,
     )
+    rez_launch_options: RezLaunchOptions = SettingsField(
+        title="Rez Launch Options",
+        default_factory=RezLaunchOptions,
+    )
     rez_standalone_apps: list[RezStandaloneAppConfig] = SettingsField(
         title="Rez Standalone Applications",
         default_factory=list,
@@ -120,9 +292,27 @@ DEFAULT_VALUES: dict[str, Any] = {
         "rez_version": "3.3.0",
         "graphviz_version": "14.1.1",
         "additional_dependencies_pip": '["PySide6==6.10.1", "Qt.py==1.4.8"]',
+        "wheelhouse_enabled": True,
+        "install_phase_timeout": 30.0,
+        "settings_check_interval": 60,
     },
     "rez_config_options": {
-        "rez_packages_path": {"windows": "P:/pipe/rez/p-ext;P:/pipe/rez/p-int"}
+        "rez_packages_path": {"windows": "P:/pipe/rez/p-ext;P:/pipe/rez/p-int"},
+        "package_index_enabled": False,
+        "package_index_interval": 300,
+        "package_cache_enabled": False,
+        "package_cache_max_size": 20.0,
+        "package_cache_min_launches": 3,
+    },
+    "rez_launch_options": {
+        "env_transport": "marshal",
+        "resolve_cache_enabled": True,
+        "resolve_cache_ttl": 12.0,
+        "failure_cache_ttl": 5.0,
+        "resolve_neighbour_enabled": False,
+        "resolve_neighbour_max_changes": 1,
+        "pre_resolve_on_tray_start": True,
+        "pre_resolve_workers": 4,
     },
     "rez_standalone_apps": [
         {
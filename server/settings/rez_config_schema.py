@@ -0,0 +1,132 @@
+"""Validation and rendering of the web based rez config.
+
+The schema mirrors the value types rez expects for the most commonly used
+keys of its config (see `rez/rezconfig.py`). Keys that are not listed are
+passed through untouched, rez itself does not reject unknown keys either.
+"""
+import hashlib
+import json
+import keyword
+from typing import Any
+
+REZCONFIG_HEADER = "# Auto-generated from web config JSON\n"
+
+_STR = (str,)
+_OPT_STR = (str, type(None))
+_BOOL = (bool,)
+_INT = (int,)
+_NUMBER = (int, float)
+_LIST = (list,)
+_OPT_LIST = (list, type(None))
+_DICT = (dict,)
+_OPT_DICT = (dict, type(None))
+
+REZ_CONFIG_SCHEMA: dict[str, tuple] = {
+    # paths
+    "packages_path": _LIST,
+    "local_packages_path": _STR,
+    "release_packages_path": _STR,
+    "plugin_path": _LIST,
+    "package_definition_python_path": _OPT_STR,
+    "tmpdir": _OPT_STR,
+    "context_tmpdir": _OPT_STR,
+    "build_directory": _STR,
+    # resolving
+    "implicit_packages": _LIST,
+    "package_filter": (dict, list, type(None)),
+    "package_orderers": _OPT_LIST,
+    "variant_select_mode": _STR,
+    "allow_unversioned_packages": _BOOL,
+    "error_on_missing_variant_requires": _BOOL,
+    "prune_failed_graph": _BOOL,
+    "platform_map": _DICT,
+    # caching
+    "resolve_caching": _BOOL,
+    "cache_package_files": _BOOL,
+    "cache_listdir": _BOOL,
+    "memcached_uri": _LIST,
+    "cache_packages_path": _OPT_STR,
+    "package_cache_async": _BOOL,
+    "package_cache_local": _BOOL,
+    "package_cache_same_device": _BOOL,
+    "package_cache_during_build": _BOOL,
+    "package_cache_max_variant_days": _INT,
+    "package_cache_clean_limit": _NUMBER,
+    "default_cachable": _BOOL,
+    "default_cachable_per_package": _OPT_DICT,
+    "default_cachable_per_repository": _OPT_DICT,
+    # environment
+    "default_shell": _STR,
+    "parent_variables": _LIST,
+    "all_parent_variables": _BOOL,
+    "resetting_variables": _LIST,
+    "all_resetting_variables": _BOOL,
+    "standard_system_paths": _LIST,
+    "env_var_separators": _DICT,
+    "pathed_env_vars": _LIST,
+    "shell_pathed_env_vars": _DICT,
+    # misc
+    "plugins": _DICT,
+    "suite_visibility": _STR,
+    "rez_tools_visibility": _STR,
+    "dot_image_format": _STR,
+    "catch_rex_errors": _BOOL,
+    "quiet": _BOOL,
+    "warn_all": _BOOL,
+    "color_enabled": _BOOL,
+}
+
+
+def _type_names(types: tuple) -> str:
+    return " or ".join(
+        "null" if t is type(None) else t.__name__ for t in types
+    )
+
+
+def parse_rez_config_json(config_json: str) -> dict[str, Any]:
+    """Parse and validate the web config JSON.
+
+    Raises:
+        ValueError: If the JSON is invalid or does not match rez's schema.
+    """
+    if not config_json.strip():
+        return {}
+    try:
+        config_dict = json.loads(config_json)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in rez config: {e}") from e
+
+    if not isinstance(config_dict, dict):
+        raise ValueError("Rez config JSON must be an object")
+
+    errors = []
+    for key, value in config_dict.items():
+        if not key.isidentifier() or keyword.iskeyword(key):
+            errors.append(f"'{key}' is not a valid rez config key")
+            continue
+        expected = REZ_CONFIG_SCHEMA.get(key)
+        # bool is a subclass of int, do not let it pass as a number
+        if expected and (
+            not isinstance(value, expected)
+            or (isinstance(value, bool) and bool not in expected)
+        ):
+            errors.append(
+                f"'{key}' expects {_type_names(expected)},"
+                f" got {type(value).__name__}"
+            )
+    if errors:
+        raise ValueError("Invalid rez config: " + "; ".join(errors))
+    return config_dict
+
+
+def render_rez_config(config_dict: dict[str, Any]) -> str:
+    """Render the canonical rezconfig.py content for a config dict."""
+    python_lines = [REZCONFIG_HEADER]
+    for key, value in config_dict.items():
+        python_lines.append(f"{key} = {repr(value)}\n")
+    return "".join(python_lines)
+
+
+def hash_rez_config(content: str) -> str:
+    """Hash used by clients to detect if the rezconfig.py is up to date."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,184 @@
+"""Synthetic install archives served from a local stand-in server.
+
+Python-build-standalone, Rez and Graphviz archives are created in a temp
+folder and served with `http.server`, `local_urls` points the installer
+to it, so install tests don't leave the machine.
+"""
+import functools
+import http.server
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import threading
+import zipfile
+from pathlib import Path
+
+import pytest
+from hbay_rez_manager import rez_installer
+from hbay_rez_manager.rez_installer import RezInstaller
+
+PYTHON_VERSION = "3.13.11"
+ASTRAL_TAG = "20260127"
+REZ_VERSION = "3.3.0"
+# Also served, for updates of the rez version
+REZ_UPDATE_VERSION = "3.4.0"
+GRAPHVIZ_VERSION = "14.1.1"
+DEPENDENCIES = ["PySide6==6.10.1", "Qt.py==1.4.8"]
+
+# Amount of filler content in the synthetic archives
+PYTHON_FILLER_FILES = 400
+REZ_FILLER_FILES = 200
+FILLER_FILE_SIZE = 16 * 1024
+
+# Synthetic rez 'install.py', creates the layout the real one does
+REZ_INSTALL_PY = '''import os
+import sys
+
+dest = sys.argv[-1]
+for folder in ("bin/rez", "lib"):
+    os.makedirs(os.path.join(dest, folder), exist_ok=True)
+for name in ("bin/rez/rez", "bin/pip"):
+    path = os.path.join(dest, name)
+    with open(path, "w") as stream:
+        stream.write("#!/bin/sh\\nexit 0\\n")
+    os.chmod(path, 0o755)
+'''
+
+
+def _filler(index: int) -> bytes:
+    # Semi random content so the archives don't compress to nothing
+    return os.urandom(FILLER_FILE_SIZE // 2) + bytes(
+        (index + i) % 251 for i in range(FILLER_FILE_SIZE // 2)
+    )
+
+
+def _add_tar_file(tar: tarfile.TarFile, name: str, data: bytes,
+                  mode: int = 0o644) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = mode
+    tar.addfile(info, io.BytesIO(data))
+
+
+def create_python_archive(path: Path) -> int:
+    """python-build-standalone like archive, python forwards to pytest's."""
+    launcher = f'#!/bin/sh\nexec "{sys.executable}" "$@"\n'.encode()
+    with tarfile.open(path, "w:gz") as tar:
+        _add_tar_file(tar, "python/install/bin/python3", launcher, 0o755)
+        _add_tar_file(
+            tar, "python/install/lib/libpython3.13.so", _filler(0))
+        for index in range(PYTHON_FILLER_FILES):
+            _add_tar_file(
+                tar,
+                f"python/install/lib/python3.13/filler_{index}.py",
+                _filler(index),
+            )
+    return PYTHON_FILLER_FILES + 2
+
+
+def create_rez_archive(path: Path, version: str = REZ_VERSION) -> int:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr(f"rez-{version}/install.py", REZ_INSTALL_PY)
+        for index in range(REZ_FILLER_FILES):
+            zipf.writestr(
+                f"rez-{version}/src/rez/filler_{index}.py",
+                _filler(index),
+            )
+    return REZ_FILLER_FILES + 1
+
+
+def create_graphviz_archive(path: Path) -> int:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr(
+            f"Graphviz-{GRAPHVIZ_VERSION}-win64/bin/dot.exe", _filler(0))
+    return 1
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def archive_server(tmp_path_factory):
+    """Serve synthetic archives, yields base url and archive statistics."""
+    root = tmp_path_factory.mktemp("archives")
+    target = RezInstaller._get_platform_target()
+    python_archive = (
+        root / "python" / ASTRAL_TAG
+        / f"cpython-{PYTHON_VERSION}+{ASTRAL_TAG}-{target}-pgo+lto-full.tar.gz"
+    )
+    rez_archive = root / "rez" / f"{REZ_VERSION}.zip"
+    graphviz_archive = root / "graphviz" / f"{GRAPHVIZ_VERSION}.zip"
+    for path in (python_archive, rez_archive, graphviz_archive):
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    stats = {
+        "python": {"files": create_python_archive(python_archive)},
+        "rez": {"files": create_rez_archive(rez_archive)},
+        "graphviz": {"files": create_graphviz_archive(graphviz_archive)},
+    }
+    create_rez_archive(
+        root / "rez" / f"{REZ_UPDATE_VERSION}.zip", REZ_UPDATE_VERSION)
+    stats["python"]["bytes"] = python_archive.stat().st_size
+    stats["rez"]["bytes"] = rez_archive.stat().st_size
+    stats["graphviz"]["bytes"] = graphviz_archive.stat().st_size
+
+    handler = functools.partial(_QuietHandler, directory=str(root))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", stats
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+@pytest.fixture
+def local_urls(archive_server, monkeypatch):
+    base_url, stats = archive_server
+    monkeypatch.setattr(
+        rez_installer, "ASTRAL_PYTHON_DOWNLOAD_ROOT", f"{base_url}/python")
+    monkeypatch.setattr(rez_installer, "REZ_URL", f"{base_url}/rez/{{0}}.zip")
+    monkeypatch.setattr(
+        rez_installer, "GRAPHVIZ_URL", f"{base_url}/graphviz/{{0}}.zip")
+    return stats
+
+
+@pytest.fixture
+def make_installer():
+    """Installer for the served versions, any argument can be replaced."""
+    def make(root, dependencies=DEPENDENCIES, rez_version=REZ_VERSION,
+             **kwargs):
+        return RezInstaller(
+            str(root), rez_version, PYTHON_VERSION, GRAPHVIZ_VERSION,
+            dependencies, astral_python_tag=ASTRAL_TAG, **kwargs,
+        )
+    return make
+
+
+# Modules of the AYON launcher, a farm node or image build only has the
+# install dependencies. Blocked even if they are importable here.
+_AYON_MODULES = ("ayon_api", "ayon_applications", "ayon_core", "qtpy")
+
+
+@pytest.fixture
+def run_headless():
+    """Run `python -m <module>` without AYON and Qt modules."""
+    def run(module, args):
+        code = (
+            "import runpy, sys\n"
+            f"sys.modules.update(dict.fromkeys({_AYON_MODULES!r}))\n"
+            f"sys.argv = [{module!r}] + {list(args)!r}\n"
+            f"runpy.run_module({module!r}, run_name='__main__', "
+            "alter_sys=True)\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            env=env, capture_output=True, text=True,
+        )
+    return run
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import os
+
+from hbay_rez_manager.bundle_delta import (
+    find_previous_bundle,
+    load_bundle_manifest,
+    seed_from_previous_bundle,
+    write_bundle_manifest,
+)
+
+SITE = os.path.join("lib", "python3.13", "site-packages")
+
+
+def _record_hash(data: bytes) -> str:
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest())
+    return "sha256=" + digest.rstrip(b"=").decode()
+
+
+def _create_bundle(folder, dist="Foo", version="1.0", requires=()):
+    site = folder / SITE
+    package = dist.lower()
+    files = {
+        f"{package}/__init__.py": b"VALUE = 1\n",
+        f"{package}/big.bin": os.urandom(4096),
+        f"../../../bin/{package}": f"#!{folder}/bin/python\n".encode(),
+    }
+    dist_info = site / f"{dist}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    record = []
+    for relpath, data in files.items():
+        path = site / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        record.append(f"{relpath},{_record_hash(data)},{len(data)}")
+    (dist_info / "METADATA").write_text(
+        f"Name: {dist}\n"
+        + "".join(f"Requires-Dist: {require}\n" for require in requires)
+        + "\nDescription\n")
+    record.append(
+        f"{dist}-{version}.dist-info/METADATA,"
+        f"{_record_hash((dist_info / 'METADATA').read_bytes())},10")
+    record.append(f"{dist}-{version}.dist-info/RECORD,,")
+    (dist_info / "RECORD").write_text("\n".join(record) + "\n")
+    return site
+
+
+def test_seed_from_previous_bundle(tmp_path):
+    previous = tmp_path / "3.13.11-3.3.0"
+    new = tmp_path / "3.13.11-3.3.1"
+    _create_bundle(previous)
+    write_bundle_manifest(str(previous))
+    (new / SITE).mkdir(parents=True)
+
+    assert find_previous_bundle(str(new), "3.13.11") == str(previous)
+    stats = seed_from_previous_bundle(str(previous), str(new), ["Foo==1.0"])
+
+    assert stats["distributions"] == 1
+    assert stats["linked"] == 4
+    assert stats["copied"] == 1
+    site = new / SITE
+    assert os.path.samefile(
+        site / "foo" / "big.bin", previous / SITE / "foo" / "big.bin")
+    assert (new / "bin" / "foo").read_text() == f"#!{new}/bin/python\n"
+
+    # Seeded files are hashed with the new bundle, reusing unchanged entries
+    files = write_bundle_manifest(str(new))
+    assert files["bin/foo"][2] != load_bundle_manifest(
+        str(previous))["files"]["bin/foo"][2]
+
+
+def test_seed_skips_changed_and_unpinned(tmp_path):
+    previous = tmp_path / "3.13.11-3.3.0"
+    new = tmp_path / "3.13.11-3.3.1"
+    site = _create_bundle(previous)
+    write_bundle_manifest(str(previous))
+    (new / SITE).mkdir(parents=True)
+
+    assert seed_from_previous_bundle(
+        str(previous), str(new), ["Foo"])["distributions"] == 0
+    assert seed_from_previous_bundle(
+        str(previous), str(new), ["Foo==2.0"])["distributions"] == 0
+
+    (site / "foo" / "__init__.py").write_text("VALUE = 2\n")
+    write_bundle_manifest(str(previous))
+    assert seed_from_previous_bundle(
+        str(previous), str(new), ["Foo==1.0"])["distributions"] == 0
+    assert not (new / SITE / "foo").exists()
+
+
+def test_seed_transitive_dependencies(tmp_path):
+    previous = tmp_path / "3.13.11-3.3.0"
+    new = tmp_path / "3.13.11-3.3.1"
+    _create_bundle(previous, "PySide6", "6.10.1", requires=[
+        "shiboken6==6.10.1", "PySide6_Essentials==6.10.1"])
+    _create_bundle(previous, "PySide6_Essentials", "6.10.1",
+                   requires=["shiboken6==6.10.1"])
+    _create_bundle(previous, "shiboken6", "6.10.1")
+    _create_bundle(previous, "Docs", "1.0", requires=["Extra; extra == 'x'"])
+    _create_bundle(previous, "Extra", "1.0")
+    _create_bundle(previous, "Unused", "1.0")
+    write_bundle_manifest(str(previous))
+    (new / SITE).mkdir(parents=True)
+
+    stats = seed_from_previous_bundle(
+        str(previous), str(new), ["PySide6==6.10.1", "Docs==1.0"])
+
+    assert stats["distributions"] == 4
+    seeded = sorted(path.name for path in (new / SITE).glob("*.dist-info"))
+    assert seeded == [
+        "Docs-1.0.dist-info",
+        "PySide6-6.10.1.dist-info",
+        "PySide6_Essentials-6.10.1.dist-info",
+        "shiboken6-6.10.1.dist-info",
+    ]
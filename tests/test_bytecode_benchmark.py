@@ -0,0 +1,126 @@
+"""Cold start time of python imports with and without precompiled pycs.
+
+A synthetic package tree stands in for the rez venv, it is imported with
+`PYTHONDONTWRITEBYTECODE` as a read-only install would be, once without
+any pycs and once after `compile_bytecode`. The precompiled start has to
+be faster.
+
+With `HBAY_REZ_BENCH_REZ` pointing to the bin folder of an installed rez,
+`rez --version` and `rez python -c pass` are measured the same way, pycs
+are hidden through an empty `PYTHONPYCACHEPREFIX` for the "before" run.
+Results go to the junit report via `record_property`.
+"""
+import os
+import statistics
+import struct
+import subprocess
+import sys
+import time
+
+import pytest
+from hbay_rez_manager.bytecode import (
+    INVALIDATION_MODE,
+    compile_bytecode,
+    count_bytecode_files,
+)
+
+MODULES = 300
+RUNS = 5
+
+
+def _create_package(root):
+    package = root / "bench_pkg"
+    package.mkdir(parents=True)
+    body = "\n".join(
+        f"def function_{i}(value):\n"
+        f"    return [value * {i} for _ in range(3)] + list(range({i}))\n"
+        for i in range(40)
+    )
+    for index in range(MODULES):
+        (package / f"module_{index}.py").write_text(body)
+    (package / "__init__.py").write_text("\n".join(
+        f"from . import module_{index}" for index in range(MODULES)))
+    return package
+
+
+def _cold_start(command, env) -> float:
+    """Median wall time of `RUNS` process starts."""
+    durations = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, check=True, capture_output=True)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def _benchmark_env(**values):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("PYTHONPYCACHEPREFIX", None)
+    env.update(values)
+    return env
+
+
+def test_precompiled_import_is_faster(tmp_path, record_property):
+    package = _create_package(tmp_path / "site")
+    command = [sys.executable, "-c", "import bench_pkg"]
+    env = _benchmark_env(PYTHONPATH=str(tmp_path / "site"))
+
+    before = _cold_start(command, env)
+    assert count_bytecode_files(str(package)) == 0
+
+    report = compile_bytecode(sys.executable, str(tmp_path / "site"))
+    assert report["files"] == MODULES + 1
+    assert report["invalidation_mode"] == INVALIDATION_MODE
+    assert not report["errors"]
+    after = _cold_start(command, env)
+
+    pyc = next((package / "__pycache__").glob("module_0.*.pyc"))
+    assert _get_pyc_flags(pyc) == 0b11
+
+    record_property("import_cold_seconds", before)
+    record_property("import_precompiled_seconds", after)
+    assert after < before
+
+
+def _get_pyc_flags(pyc):
+    """Flags field of the pyc header, 0b11 for checked-hash pycs."""
+    flags, = struct.unpack("<I", pyc.read_bytes()[4:8])
+    return flags
+
+
+def test_timestamp_pycs_are_replaced(tmp_path):
+    site = tmp_path / "site"
+    (site / "installed").mkdir(parents=True)
+    (site / "installed" / "__init__.py").write_text("VALUE = 1\n")
+    # pip compiles the packages it installs with timestamp pycs
+    subprocess.run(
+        [sys.executable, "-m", "compileall", "-q",
+         "--invalidation-mode", "timestamp", str(site)],
+        check=True,
+    )
+    pyc, = (site / "installed" / "__pycache__").glob("__init__.*.pyc")
+    assert _get_pyc_flags(pyc) == 0
+
+    compile_bytecode(sys.executable, str(site))
+    assert _get_pyc_flags(pyc) == 0b11
+
+
+@pytest.mark.skipif(
+    not os.environ.get("HBAY_REZ_BENCH_REZ"),
+    reason="Set HBAY_REZ_BENCH_REZ to the bin folder of an installed rez",
+)
+@pytest.mark.parametrize("args", [["--version"], ["python", "-c", "pass"]])
+def test_rez_cold_start(tmp_path, record_property, args):
+    rez = os.path.join(os.environ["HBAY_REZ_BENCH_REZ"], "rez")
+    command = [rez] + args
+    empty_prefix = tmp_path / "no-pycs"
+    empty_prefix.mkdir()
+
+    before = _cold_start(
+        command, _benchmark_env(PYTHONPYCACHEPREFIX=str(empty_prefix)))
+    after = _cold_start(command, _benchmark_env())
+
+    name = "_".join(a.strip("-") for a in args if a != "-c")
+    record_property(f"rez_{name}_cold_seconds", before)
+    record_property(f"rez_{name}_precompiled_seconds", after)
+    assert after < before
@@ -0,0 +1,194 @@
+"""Nearest cached request lookup and context diffs.
+
+With `HBAY_REZ_PYTHON` pointing to a python that can import rez, requests
+are resolved from the context of a similar request.
+"""
+import json
+import os
+import subprocess
+import time
+
+import pytest
+from hbay_rez_manager import resolve_helper
+from hbay_rez_manager.resolve_helper import (
+    RESOLVE_SCRIPT,
+    find_neighbour_context,
+    get_context_cache_path,
+    get_request_info_path,
+    get_request_key,
+    get_resolve_base_key,
+    start_background_resolve,
+)
+from hbay_rez_manager.scripts import context_diff
+
+
+def test_changed_families():
+    assert context_diff.get_family("maya-2024") == "maya"
+    assert context_diff.get_family("~usd==24.5") == "usd"
+    assert context_diff.get_family("!plugin<2") == "plugin"
+
+    assert context_diff.get_changed_families(
+        ["maya-2024", "plugin-1.2", "usd"],
+        ["maya-2024", "plugin-1.3", "usd"],
+    ) == {"plugin"}
+    assert context_diff.get_changed_families(
+        ["maya-2024", "usd"], ["maya-2024", "qtpy"]) == {"usd", "qtpy"}
+    assert context_diff.get_changed_families(["usd"], ["usd"]) == set()
+
+
+def test_diffs():
+    assert context_diff.diff_packages(
+        {"foo": "1.0", "bar": "2.0", "old": "1"},
+        {"foo": "1.1", "bar": "2.0", "new": "1"},
+    ) == {
+        "added": ["new-1"],
+        "removed": ["old-1"],
+        "changed": [["foo-1.0", "foo-1.1"]],
+    }
+    assert context_diff.diff_environ(
+        {"A": "1", "B": "2", "C": "3"}, {"A": "1", "B": "x", "D": "4"}
+    ) == {"added": ["D"], "removed": ["C"], "changed": ["B"]}
+
+
+def _cache(rez_root, packages, base_key, age=0):
+    path = get_context_cache_path(
+        rez_root, get_request_key(packages, {}, base_key))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("{}")
+    with open(get_request_info_path(path), "w") as f:
+        json.dump({"packages": packages, "base": base_key}, f)
+    mtime = os.path.getmtime(path) - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_find_neighbour_context(tmp_path):
+    rez_root = str(tmp_path)
+    request = ["maya-2024", "plugin-1.3", "usd"]
+    one_change = _cache(rez_root, ["maya-2024", "plugin-1.2", "usd"], "base")
+    _cache(rez_root, ["maya-2024", "plugin-1.1", "qtpy"], "base")
+    _cache(rez_root, ["maya-2024", "plugin-1.2", "usd"], "other config")
+
+    assert find_neighbour_context(rez_root, request, "base", 3600) == (
+        one_change, ["maya-2024", "plugin-1.2", "usd"])
+    assert find_neighbour_context(
+        rez_root, ["nuke", "usd"], "base", 3600, max_changes=2) is None
+
+    # The younger of two equally similar contexts
+    younger = _cache(rez_root, ["maya-2024", "plugin-1.4", "usd"], "base")
+    os.utime(one_change, (0, os.path.getmtime(younger) - 10))
+    assert find_neighbour_context(
+        rez_root, request, "base", 3600)[0] == younger
+
+    # Expired contexts are no neighbours
+    os.utime(younger, (0, 0))
+    os.utime(one_change, (0, 0))
+    assert find_neighbour_context(rez_root, request, "base", 3600) is None
+
+
+def _release(share, name, version, requires=()):
+    folder = share / name / version
+    folder.mkdir(parents=True)
+    (folder / "package.py").write_text(
+        f"name = {name!r}\nversion = {version!r}\nrequires = {list(requires)!r}\n"
+        f"def commands():\n    env.{name.upper()}_VERSION = {version!r}\n")
+
+
+def _launch(rez_python, env, rez_root, packages, neighbour=None,
+            diff_environ=False):
+    cache_path = get_context_cache_path(
+        rez_root, get_request_key(packages, env))
+    args = [
+        rez_python, RESOLVE_SCRIPT,
+        "--context-cache", cache_path,
+        "--max-age", "3600",
+        "--cache-base", get_resolve_base_key(env),
+    ]
+    diff_path = os.path.join(rez_root, "diff.json")
+    if os.path.exists(diff_path):
+        os.remove(diff_path)
+    if neighbour:
+        args += ["--neighbour-context", neighbour, "--diff-output", diff_path]
+    if diff_environ:
+        args.append("--diff-environ")
+    result = subprocess.run(
+        args + packages, env=env, check=True, capture_output=True, text=True)
+    return cache_path, json.loads(result.stdout), context_diff.load_diff(
+        diff_path)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("HBAY_REZ_PYTHON"),
+    reason="Set HBAY_REZ_PYTHON to a python that can import rez",
+)
+def test_resolve_from_neighbour(tmp_path, monkeypatch):
+    rez_python = os.environ["HBAY_REZ_PYTHON"]
+    # Background resolves with the test's rez python instead of `rez python`
+    monkeypatch.setattr(
+        resolve_helper, "get_script_command",
+        lambda script, args: [rez_python, script] + list(args),
+    )
+    share = tmp_path / "share"
+    _release(share, "lib", "1.0")
+    _release(share, "lib", "1.1")
+    _release(share, "plugin", "1.0", requires=["lib-1.0"])
+    _release(share, "plugin", "2.0", requires=["lib"])
+    _release(share, "plugin", "3.0", requires=["lib-1.1"])
+    _release(share, "app", "1.0", requires=["lib"])
+    # Contexts are timestamped in whole seconds, releases before are older
+    old = time.time() - 10
+    for family in share.iterdir():
+        os.utime(family, (old, old))
+    config_path = tmp_path / "rezconfig.py"
+    config_path.write_text(f"packages_path = [{str(share)!r}]\n")
+    env = dict(os.environ, REZ_CONFIG_FILE=str(config_path))
+    rez_root = str(tmp_path / "rez")
+    base_key = get_resolve_base_key(env)
+
+    neighbour, environ, _ = _launch(
+        rez_python, env, rez_root, ["app", "plugin-1"])
+    assert environ["LIB_VERSION"] == "1.0"
+    os.utime(neighbour, (0, os.path.getmtime(neighbour) - 60))
+
+    # plugin-2 accepts any lib, the neighbour's lib is kept
+    request = ["app", "plugin-2"]
+    found = find_neighbour_context(rez_root, request, base_key, 3600)
+    assert found == (neighbour, ["app", "plugin-1"])
+    cache_path, environ, diff = _launch(
+        rez_python, env, rez_root, request, neighbour=found[0])
+
+    assert environ["PLUGIN_VERSION"] == "2.0"
+    assert environ["LIB_VERSION"] == "1.0"
+    assert diff["reused"] is True
+    assert diff["packages"] == {
+        "added": [], "removed": [], "changed": [["plugin-1.0", "plugin-2.0"]]}
+    assert "environ" not in diff
+    # A full resolve picks the newer lib, the pinned context isn't cached
+    assert not os.path.exists(cache_path)
+
+    # The hook's background resolve caches the full resolve
+    start_background_resolve(cache_path, base_key, request, env).wait()
+    _, environ, _ = _launch(rez_python, env, rez_root, request)
+    assert environ["LIB_VERSION"] == "1.1"
+    os.remove(cache_path)
+
+    _, _, diff = _launch(
+        rez_python, env, rez_root, request, neighbour=neighbour,
+        diff_environ=True)
+    assert "PLUGIN_VERSION" in diff["environ"]["changed"]
+
+    # The neighbour's lib doesn't satisfy the request, resolved from scratch
+    request = ["app", "plugin-3"]
+    _, environ, diff = _launch(
+        rez_python, env, rez_root, request, neighbour=neighbour)
+    assert environ["LIB_VERSION"] == "1.1"
+    assert diff["reused"] is False
+
+    # A release outdates the neighbour, it isn't used anymore
+    _release(share, "lib", "1.2")
+    request = ["app", "plugin-2.0"]
+    _, environ, diff = _launch(
+        rez_python, env, rez_root, request, neighbour=neighbour)
+    assert environ["LIB_VERSION"] == "1.2"
+    assert diff is None
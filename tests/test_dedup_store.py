@@ -0,0 +1,46 @@
+import os
+
+from hbay_rez_manager.bundle_delta import write_bundle_manifest
+from hbay_rez_manager.dedup_store import DedupStore
+
+
+def _create_bundle(folder, shared: bytes, unique: bytes):
+    (folder / "lib").mkdir(parents=True)
+    (folder / "lib" / "libpython.so").write_bytes(shared)
+    (folder / "lib" / "unique.so").write_bytes(unique)
+    (folder / "small.txt").write_text("small")
+
+
+def test_dedup_store(tmp_path):
+    shared = os.urandom(64 * 1024)
+    bundles = [tmp_path / "a", tmp_path / "b", tmp_path / "c"]
+    for bundle in bundles:
+        _create_bundle(bundle, shared, os.urandom(8192))
+
+    store = DedupStore(str(tmp_path / "store"))
+    reports = [
+        store.dedup_folder(str(bundle), write_bundle_manifest(str(bundle)))
+        for bundle in bundles
+    ]
+
+    assert [r["bytes_saved"] for r in reports] == [0, len(shared), len(shared)]
+    assert os.path.samefile(
+        bundles[0] / "lib" / "libpython.so",
+        bundles[2] / "lib" / "libpython.so",
+    )
+    assert (bundles[1] / "lib" / "libpython.so").read_bytes() == shared
+    assert not os.path.samefile(
+        bundles[0] / "lib" / "unique.so", bundles[1] / "lib" / "unique.so")
+
+    report = store.report()
+    assert report["blobs"] == 4
+    assert report["bytes_saved"] == 2 * len(shared)
+
+    # a second run changes nothing
+    assert store.dedup_folder(
+        str(bundles[0]), write_bundle_manifest(str(bundles[0]))
+    )["bytes_saved"] == 0
+
+    (bundles[2] / "lib" / "unique.so").unlink()
+    assert store.prune() == 1
+    assert store.report()["blobs"] == 3
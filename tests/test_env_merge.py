@@ -0,0 +1,57 @@
+import os
+import time
+
+from hbay_rez_manager.env_merge import merge_environment, normalize_path_list
+
+VARIABLE_COUNT = 2000
+# Merge of a 2000 variable environment must stay well below a frame
+MERGE_BUDGET_SECONDS = 0.05
+
+
+def _big_environment(count: int) -> dict[str, str]:
+    env = {f"VAR_{index}": f"value_{index}" for index in range(count)}
+    env["PATH"] = os.pathsep.join(f"/opt/tool_{i}/bin" for i in range(200))
+    env["PYTHONPATH"] = os.pathsep.join(
+        f"/opt/tool_{i}/python" for i in range(200))
+    return env
+
+
+def test_normalize_path_list():
+    value = os.pathsep.join(["", "/a", "/b", "/a", " /c ", "", "/b/"])
+    assert normalize_path_list(value) == os.pathsep.join(["/a", "/b", "/c"])
+
+
+def test_merge_environment_only_changed_keys():
+    env = {"KEEP": "1", "PATH": "/a", "OTHER": "x"}
+    update = {
+        "KEEP": "1",
+        "PATH": os.pathsep.join(["/rez/bin", "/a", "/rez/bin"]),
+        "LD_LIBRARY_PATH": os.pathsep + "/rez/lib",
+        "EMPTY_BEFORE": os.pathsep + "value",
+    }
+    changed = merge_environment(env, update)
+
+    assert sorted(changed) == ["EMPTY_BEFORE", "LD_LIBRARY_PATH", "PATH"]
+    assert env["PATH"] == os.pathsep.join(["/rez/bin", "/a"])
+    assert env["LD_LIBRARY_PATH"] == "/rez/lib"
+    assert env["EMPTY_BEFORE"] == "value"
+    assert env["OTHER"] == "x"
+
+
+def test_merge_environment_benchmark():
+    env = _big_environment(VARIABLE_COUNT)
+    update = dict(env)
+    # rez changes a few variables and prepends its paths
+    for index in range(0, VARIABLE_COUNT, 40):
+        update[f"VAR_{index}"] = f"changed_{index}"
+    update["PATH"] = os.pathsep.join(["/rez/bin", env["PATH"], "/rez/bin"])
+    update["PYTHONPATH"] = os.pathsep.join(["/rez/python", env["PYTHONPATH"]])
+
+    start = time.perf_counter()
+    changed = merge_environment(env, update)
+    duration = time.perf_counter() - start
+
+    assert len(changed) == VARIABLE_COUNT // 40 + 2
+    assert env["PATH"].split(os.pathsep).count("/rez/bin") == 1
+    assert duration < MERGE_BUDGET_SECONDS, (
+        f"Merge took {duration * 1000:.1f}ms")
@@ -0,0 +1,78 @@
+"""Headless installer CLI against the local archive server."""
+import json
+import platform
+
+import pytest
+from hbay_rez_manager import install
+
+from conftest import (
+    ASTRAL_TAG,
+    DEPENDENCIES,
+    GRAPHVIZ_VERSION,
+    PYTHON_VERSION,
+    REZ_VERSION,
+)
+
+pytestmark = pytest.mark.skipif(
+    platform.system() != "Linux",
+    reason="Installer CLI test runs on Linux only",
+)
+
+
+@pytest.fixture
+def settings_file(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({
+        "rez_install_options": {
+            "rez_python_version": PYTHON_VERSION,
+            "astral_python_tag": ASTRAL_TAG,
+            "rez_version": REZ_VERSION,
+            "graphviz_version": GRAPHVIZ_VERSION,
+            "additional_dependencies_pip": json.dumps(DEPENDENCIES),
+        },
+        "rez_config_options": {"config_type": "config_file"},
+    }))
+    return str(path)
+
+
+def _events(output):
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def test_install_cli(local_urls, settings_file, tmp_path, capsys):
+    args = ["--settings", settings_file, "--root", str(tmp_path / "rez")]
+
+    assert install.main(args + ["--check-only"]) == install.EXIT_NOT_INSTALLED
+    capsys.readouterr()
+
+    assert install.main(args + ["--json"]) == install.EXIT_OK
+    events = _events(capsys.readouterr().out)
+    assert [e["percent"] for e in events if e["event"] == "progress"][-1] == 100
+    assert events[-1]["event"] == "done"
+    assert events[-1]["rez_config"].endswith("rezconfig.py")
+
+    assert install.main(args + ["--check-only", "--json"]) == install.EXIT_OK
+    assert _events(capsys.readouterr().out) == [{
+        "event": "check",
+        "installed": True,
+        "root": str(tmp_path / "rez"),
+        "rez_path": events[-1]["rez_path"],
+    }]
+
+
+def test_install_cli_settings_error(tmp_path, capsys):
+    args = ["--settings", str(tmp_path / "missing.json"), "--json"]
+    assert install.main(args) == install.EXIT_SETTINGS_ERROR
+    assert _events(capsys.readouterr().out)[0]["event"] == "error"
+
+
+def test_install_cli_without_ayon(settings_file, run_headless, tmp_path):
+    result = run_headless("hbay_rez_manager.install", [
+        "--settings", settings_file,
+        "--root", str(tmp_path / "rez"),
+        "--check-only", "--json",
+    ])
+
+    assert "ModuleNotFoundError" not in result.stderr
+    assert result.returncode == install.EXIT_NOT_INSTALLED
+    assert _events(result.stdout)[0]["installed"] is False
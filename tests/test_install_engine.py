@@ -0,0 +1,117 @@
+"""Asyncio install engine, concurrency, cancellation and phase timeouts."""
+import os
+import platform
+import sys
+import threading
+import time
+
+import pytest
+from hbay_rez_manager.install_engine import AsyncInstallEngine
+from hbay_rez_manager.rez_installer import INSTALL_LOCK_NAME, InstallCancelled
+
+pytestmark = pytest.mark.skipif(
+    platform.system() != "Linux", reason="Installs run on Linux only")
+
+
+def _hang_rez_install(installer, monkeypatch):
+    """Make rez install.py a subprocess that doesn't finish on its own."""
+    prepare = installer._prepare_rez_install
+
+    def prepare_hanging(archive):
+        prepare(archive)
+        return [sys.executable, "-c", "import time; time.sleep(60)"]
+
+    monkeypatch.setattr(installer, "_prepare_rez_install", prepare_hanging)
+
+
+def test_engine_install(local_urls, make_installer, tmp_path):
+    installer = make_installer(tmp_path)
+    progress = []
+    engine = AsyncInstallEngine(installer)
+    engine.progress_callback = lambda percent, message: progress.append(
+        percent)
+    engine.run()
+
+    assert installer.check_if_installed() is True
+    assert make_installer(tmp_path).check_if_installed() is True
+    assert progress[-1] == 100
+    timings = installer.installed["timings"]
+    for phase in ("fetch", "python", "rez", "dependencies", "bytecode"):
+        assert f"phase.{phase}" in timings
+    assert installer.installed["bytecode"]["invalidation_mode"] == (
+        "checked-hash")
+
+    # python and rez are downloaded at the same time
+    downloads = [s for s in installer.tracer.spans if s.name == "download"]
+    assert len(downloads) == 2
+    assert len({s.thread_id for s in downloads}) == 2
+
+
+def test_engine_prefetch_after_python(
+        local_urls, make_installer, tmp_path, monkeypatch):
+    installer = make_installer(tmp_path)
+    pythons = []
+
+    def prefetch_wheels():
+        pythons.append(installer._get_prefetch_python())
+        return False
+
+    monkeypatch.setattr(installer, "prefetch_wheels", prefetch_wheels)
+    AsyncInstallEngine(installer).run()
+
+    # Once, with the new bundle python instead of the launcher's
+    assert pythons == [installer.python]
+    assert installer.check_if_installed() is True
+
+
+def test_engine_cancel_kills_subprocess(
+        local_urls, make_installer, tmp_path, monkeypatch):
+    installer = make_installer(tmp_path)
+    _hang_rez_install(installer, monkeypatch)
+    engine = AsyncInstallEngine(installer)
+    errors = []
+
+    def run():
+        try:
+            engine.run()
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while not installer._staging:
+        time.sleep(0.05)
+    time.sleep(0.5)
+    start = time.perf_counter()
+    engine.cancel()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert time.perf_counter() - start < 5
+    assert len(errors) == 1 and isinstance(errors[0], InstallCancelled)
+    # the staged bundle is gone and the lock released
+    assert os.listdir(installer.rez_source_folder) == []
+    assert not os.path.exists(os.path.join(tmp_path, INSTALL_LOCK_NAME))
+    assert installer.check_if_installed() is False
+
+
+def test_engine_phase_timeout(
+        local_urls, make_installer, tmp_path, monkeypatch):
+    installer = make_installer(tmp_path)
+    _hang_rez_install(installer, monkeypatch)
+    engine = AsyncInstallEngine(installer, timeouts={"rez": 0.5})
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError, match="rez"):
+        engine.run()
+    assert time.perf_counter() - start < 10
+    assert os.listdir(installer.rez_source_folder) == []
+
+
+def test_cancel_before_run(local_urls, make_installer, tmp_path):
+    installer = make_installer(tmp_path)
+    engine = AsyncInstallEngine(installer)
+    engine.cancel()
+    with pytest.raises(InstallCancelled):
+        engine.run()
+    assert not os.path.exists(os.path.join(tmp_path, INSTALL_LOCK_NAME))
@@ -0,0 +1,153 @@
+"""Install lock between processes, heartbeat, stale locks and progress."""
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from hbay_rez_manager.install_lock import InstallLock
+from hbay_rez_manager.rez_installer import (
+    INSTALL_LOCK_NAME,
+    INSTALL_PROGRESS_NAME,
+    RezInstaller,
+)
+
+
+def test_install_lock_timeout(tmp_path):
+    path = str(tmp_path / ".install.lock")
+    with InstallLock(path):
+        with pytest.raises(TimeoutError):
+            InstallLock(path, timeout=0.2, poll_interval=0.05).acquire()
+    assert not os.path.exists(path)
+
+
+def test_install_lock_heartbeat(tmp_path):
+    """A held lock stays fresh, an abandoned one is taken over."""
+    path = str(tmp_path / ".install.lock")
+    lock = InstallLock(path, heartbeat_interval=0.05, stale_after=0.3)
+    lock.acquire()
+    time.sleep(0.6)
+    with pytest.raises(TimeoutError):
+        InstallLock(
+            path, timeout=0.2, poll_interval=0.05, stale_after=0.3).acquire()
+
+    # crashed owner on another host, no heartbeat anymore
+    lock._stop_heartbeat.set()
+    lock._heartbeat_thread.join()
+    with open(path, "w") as f:
+        json.dump({"host": "other-host", "pid": 1}, f)
+    time.sleep(0.4)
+    other = InstallLock(path, timeout=1, poll_interval=0.05, stale_after=0.3)
+    other.acquire()
+    assert other.read_owner()["pid"] == os.getpid()
+    other.release()
+
+
+def test_install_lock_clock_skew(tmp_path):
+    """A heartbeat with old server timestamps is still alive."""
+    path = str(tmp_path / ".install.lock")
+    with open(path, "w") as f:
+        json.dump({"host": "other-host", "pid": 1}, f)
+    skewed = time.time() - 3600
+    stop = threading.Event()
+
+    def heartbeat():
+        beat = 0
+        while not stop.wait(0.05):
+            beat += 1
+            os.utime(path, (skewed + beat, skewed + beat))
+
+    thread = threading.Thread(target=heartbeat)
+    thread.start()
+    try:
+        with pytest.raises(TimeoutError):
+            InstallLock(
+                path, timeout=0.6, poll_interval=0.05, stale_after=0.3
+            ).acquire()
+    finally:
+        stop.set()
+        thread.join()
+
+    # The heartbeat stopped, taken over after `stale_after`
+    lock = InstallLock(path, timeout=2, poll_interval=0.05, stale_after=0.3)
+    lock.acquire()
+    assert lock.read_owner()["pid"] == os.getpid()
+    lock.release()
+
+
+def test_install_lock_dead_owner(tmp_path):
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    path = str(tmp_path / ".install.lock")
+    with open(path, "w") as f:
+        json.dump({"host": socket.gethostname(), "pid": process.pid}, f)
+
+    lock = InstallLock(path, timeout=1, poll_interval=0.05)
+    lock.acquire()
+    assert lock.locked
+    lock.release()
+
+
+def test_take_over_race_without_hard_links(tmp_path, monkeypatch):
+    """A lock taken over meanwhile is put back on shares without links."""
+    path = tmp_path / ".install.lock"
+    fresh = {"host": "other-host", "pid": 2}
+    path.write_text(json.dumps(fresh))
+
+    def link(*args):
+        raise OSError("Operation not supported")
+
+    monkeypatch.setattr(os, "link", link)
+    lock = InstallLock(str(path))
+    lock._take_over_stale({"host": "other-host", "pid": 1})
+
+    assert lock.read_owner() == fresh
+    assert os.listdir(tmp_path) == [".install.lock"]
+
+
+@pytest.mark.skipif(
+    platform.system() != "Linux", reason="Installs run on Linux only")
+def test_waiting_installer_follows_progress(tmp_path):
+    """Second installer waits, reports the first one's progress, no install."""
+    kwargs = dict(
+        root=str(tmp_path), rez_version="3.3.0", python_version="3.13.11",
+        graphviz_version="14.1.1", dependencies=[],
+    )
+    first = RezInstaller(**kwargs)
+    second = RezInstaller(**kwargs)
+    started = threading.Event()
+
+    def fake_install():
+        first._report_progress(40, "Installing Rez")
+        started.set()
+        time.sleep(1.5)
+        os.makedirs(first.rez_folder)
+        for key in ("python_version", "rez_version", "graphviz_version"):
+            first.write_manifest(key, kwargs[key])
+        first.write_manifest("dependencies", [])
+
+    first._run = fake_install
+    second._run = lambda: pytest.fail("second installer installed")
+    messages = []
+    second.progress_callback = lambda percent, message: messages.append(
+        (percent, message))
+
+    thread = threading.Thread(target=first.run)
+    thread.start()
+    started.wait()
+    progress_file = tmp_path / INSTALL_PROGRESS_NAME
+    assert json.loads(progress_file.read_text())["percent"] == 40
+    second.run()
+    thread.join()
+
+    assert any(
+        percent == 40 and "Installing Rez" in message
+        for percent, message in messages
+    )
+    assert messages[-1] == (100, "Done")
+    assert not (tmp_path / INSTALL_LOCK_NAME).exists()
+    assert not progress_file.exists()
@@ -0,0 +1,57 @@
+"""Launch hook timing samples and their percentiles."""
+import json
+
+import pytest
+from hbay_rez_manager.launch_stats import (
+    MAX_SAMPLES,
+    get_launch_stats,
+    get_stats_path,
+    record_launch_timings,
+)
+
+
+def test_record_and_aggregate(tmp_path):
+    stats_path = get_stats_path(str(tmp_path / "rez"))
+    for index in range(1, MAX_SAMPLES + 11):
+        record_launch_timings(
+            stats_path, "resolve", "maya-2024 usd",
+            {"resolve": index / 1000, "cache": 0.002},
+        )
+    record_launch_timings(stats_path, "resolve", "nuke", {"resolve": 0.5})
+
+    # only the last samples are kept, no temp files are left behind
+    with open(stats_path) as f:
+        stats = json.load(f)
+    assert len(stats["resolve|maya-2024 usd"]) == MAX_SAMPLES
+    assert [p.name for p in (tmp_path / "rez").iterdir()] == [
+        "launch_stats.json"]
+
+    rows = {
+        (row["request"], row["step"]): row
+        for row in get_launch_stats(stats_path)
+    }
+    assert set(rows) == {
+        ("maya-2024 usd", "resolve"),
+        ("maya-2024 usd", "cache"),
+        ("nuke", "resolve"),
+    }
+    # samples 11 to 60 ms
+    row = rows["maya-2024 usd", "resolve"]
+    assert row["hook"] == "resolve"
+    assert row["samples"] == MAX_SAMPLES
+    assert row["p50"] == pytest.approx(35)
+    assert row["p95"] == pytest.approx(58)
+    assert rows["maya-2024 usd", "cache"]["p95"] == pytest.approx(2)
+    assert rows["nuke", "resolve"]["p50"] == pytest.approx(500)
+
+
+def test_broken_stats_file(tmp_path):
+    stats_path = get_stats_path(str(tmp_path))
+    assert get_launch_stats(stats_path) == []
+
+    with open(stats_path, "w") as f:
+        f.write("{half")
+    assert get_launch_stats(stats_path) == []
+    # a broken file is replaced by the next sample
+    record_launch_timings(stats_path, "resolve", "maya", {"resolve": 0.1})
+    assert [row["samples"] for row in get_launch_stats(stats_path)] == [1]
@@ -0,0 +1,130 @@
+"""Install from a local mirror directory without any network access."""
+import json
+import platform
+import socket
+import subprocess
+
+import pytest
+from hbay_rez_manager.mirror import Mirror, get_file_sha256
+from hbay_rez_manager.rez_installer import RezInstaller
+
+from conftest import (
+    ASTRAL_TAG,
+    GRAPHVIZ_VERSION,
+    PYTHON_VERSION,
+    REZ_VERSION,
+    create_graphviz_archive,
+    create_python_archive,
+    create_rez_archive,
+)
+
+pytestmark = pytest.mark.skipif(
+    platform.system() != "Linux",
+    reason="Mirror install runs on Linux only",
+)
+
+
+@pytest.fixture
+def mirror_root(tmp_path):
+    root = tmp_path / "mirror"
+    target = RezInstaller._get_platform_target()
+    files = {
+        "python": root / "python" / (
+            f"cpython-{PYTHON_VERSION}+{ASTRAL_TAG}-{target}"
+            f"-pgo+lto-full.tar.gz"),
+        "rez": root / "rez" / f"rez-{REZ_VERSION}.zip",
+        "graphviz": root / "graphviz" / f"Graphviz-{GRAPHVIZ_VERSION}-win64.zip",
+    }
+    for path in files.values():
+        path.parent.mkdir(parents=True)
+    (root / "wheels").mkdir()
+    create_python_archive(files["python"])
+    create_rez_archive(files["rez"])
+    create_graphviz_archive(files["graphviz"])
+
+    def entry(key):
+        return {
+            "path": files[key].relative_to(root).as_posix(),
+            "sha256": get_file_sha256(str(files[key])),
+        }
+
+    index = {
+        "version": 1,
+        "python": {PYTHON_VERSION: {target: entry("python")}},
+        "rez": {REZ_VERSION: entry("rez")},
+        "graphviz": {GRAPHVIZ_VERSION: entry("graphviz")},
+        "wheels": "wheels",
+    }
+    (root / "index.json").write_text(json.dumps(index))
+    return root
+
+
+@pytest.fixture
+def no_network(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Network access in mirror mode")
+
+    monkeypatch.setattr(socket, "create_connection", fail)
+
+
+def test_mirror_lookup(mirror_root):
+    mirror = Mirror(str(mirror_root))
+    url, sha256 = mirror.get_rez(REZ_VERSION)
+    assert url == (mirror_root / "rez" / f"rez-{REZ_VERSION}.zip").as_uri()
+    assert len(sha256) == 64
+    assert mirror.get_wheels_location() == str(mirror_root / "wheels")
+    with pytest.raises(RuntimeError):
+        mirror.get_rez("0.0.0")
+
+
+def test_install_from_mirror(
+        mirror_root, make_installer, tmp_path, no_network, monkeypatch):
+    """Full install offline, pip only looks into the mirror wheels."""
+    calls = []
+    run = subprocess.run
+
+    def recording_run(cmd, *args, **kwargs):
+        calls.append(list(cmd))
+        return run(cmd, *args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "run", recording_run)
+    installer = make_installer(
+        tmp_path / "rez root", ["Qt.py==1.4.8"],
+        mirror_root=str(mirror_root),
+    )
+    installer.run()
+
+    assert installer.check_if_installed() is True
+    pip_cmd = next(cmd for cmd in calls if "install" in cmd)
+    assert "--no-index" in pip_cmd
+    assert str(mirror_root / "wheels") in pip_cmd
+
+
+def test_mirror_checksum_mismatch(mirror_root, make_installer, tmp_path):
+    index_path = mirror_root / "index.json"
+    index = json.loads(index_path.read_text())
+    index["rez"][REZ_VERSION]["sha256"] = "0" * 64
+    index_path.write_text(json.dumps(index))
+
+    installer = make_installer(
+        tmp_path / "rez root", [], mirror_root=str(mirror_root))
+    with pytest.raises(RuntimeError, match="Checksum mismatch"):
+        installer.download_rez()
+
+
+
+def test_populate_without_ayon(mirror_root, run_headless):
+    index = json.loads((mirror_root / "index.json").read_text())
+
+    # Everything is in the index already, nothing is downloaded
+    result = run_headless("hbay_rez_manager.mirror", [
+        str(mirror_root),
+        "--python-version", PYTHON_VERSION,
+        "--astral-tag", ASTRAL_TAG,
+        "--rez-version", REZ_VERSION,
+        "--graphviz-version", GRAPHVIZ_VERSION,
+        "--targets", RezInstaller._get_platform_target(),
+    ])
+
+    assert result.returncode == 0, result.stderr
+    assert json.loads((mirror_root / "index.json").read_text()) == index
@@ -0,0 +1,198 @@
+"""Package repository index refresh, config overlay and the rez plugin.
+
+With `HBAY_REZ_PYTHON` pointing to a python that can import rez, resolves
+through the `hbay_index` repository are checked against the share.
+"""
+import json
+import os
+import subprocess
+import textwrap
+
+import pytest
+from hbay_rez_manager import package_index
+from hbay_rez_manager.package_index import (
+    PackageIndex,
+    get_index_folder,
+    get_index_locations,
+    refresh_package_indexes,
+    write_index_config,
+)
+
+
+def _release(share, name, version, requires=()):
+    folder = share / name / version
+    folder.mkdir(parents=True)
+    (folder / "package.py").write_text(
+        f"name = {name!r}\nversion = {version!r}\nrequires = {list(requires)!r}\n")
+    # rez touches the family folder on every release
+    os.utime(share / name)
+
+
+@pytest.fixture
+def share(tmp_path):
+    share = tmp_path / "share"
+    share.mkdir()
+    _release(share, "foo", "1.0.0")
+    _release(share, "foo", "1.1.0")
+    _release(share, "bar", "2.0", requires=["foo-1"])
+    return share
+
+
+def _config(tmp_path, share, **values):
+    values.setdefault("packages_path", [str(share)])
+    path = tmp_path / "rezconfig.py"
+    path.write_text("".join(f"{k} = {v!r}\n" for k, v in values.items()))
+    return str(path)
+
+
+def test_refresh_is_incremental(tmp_path, share):
+    index = PackageIndex(str(share), str(tmp_path / "index"))
+
+    assert index.refresh() == {"families": 2, "scanned": 2, "copied": 3}
+    families = index.load()["families"]
+    assert sorted(families["foo"]["versions"]) == ["1.0.0", "1.1.0"]
+    copy = tmp_path / "index" / "files" / "bar" / "2.0" / "package.py"
+    assert copy.read_text() == (share / "bar" / "2.0" / "package.py").read_text()
+
+    # Nothing changed, nothing listed
+    assert index.refresh() == {"families": 2, "scanned": 0, "copied": 0}
+
+    _release(share, "foo", "1.2.0")
+    (share / "foo" / ".ignore1.0.0").write_text("")
+    os.utime(share / "foo", ns=(1, 1))
+    assert index.refresh() == {"families": 2, "scanned": 1, "copied": 1}
+    foo = index.load()["families"]["foo"]
+    assert sorted(foo["versions"]) == ["1.1.0", "1.2.0"]
+    assert list(foo["ignored"]) == ["1.0.0"]
+
+
+def test_refresh_removes_stale_copies(tmp_path, share):
+    index = PackageIndex(str(share), str(tmp_path / "index"))
+    index.refresh()
+
+    for path in (share / "bar" / "2.0").iterdir():
+        path.unlink()
+    (share / "bar" / "2.0").rmdir()
+    (share / "bar").rmdir()
+    index.refresh()
+
+    assert "bar" not in index.load()["families"]
+    assert not (tmp_path / "index" / "files" / "bar").exists()
+
+
+def test_verify_files_picks_up_edits(tmp_path, share):
+    index = PackageIndex(str(share), str(tmp_path / "index"))
+    index.refresh()
+    package_file = share / "foo" / "1.0.0" / "package.py"
+    mtime_ns = (share / "foo").stat().st_mtime_ns
+    package_file.write_text("name = 'foo'\nversion = '1.0.0'\n# edited\n")
+    os.utime(share / "foo", ns=(mtime_ns, mtime_ns))
+
+    assert index.refresh()["copied"] == 0
+    assert index.refresh(verify_files=True)["copied"] == 1
+    copy = tmp_path / "index" / "files" / "foo" / "1.0.0" / "package.py"
+    assert copy.read_text().endswith("# edited\n")
+
+
+def test_index_locations(tmp_path, share):
+    local = tmp_path / "local"
+    config_path = _config(
+        tmp_path, share,
+        packages_path=[str(local), str(share), "memory@any"],
+        local_packages_path=str(local),
+    )
+
+    assert get_index_locations(config_path) == [str(share)]
+
+
+def test_index_config_overlay(tmp_path, share):
+    local = tmp_path / "local"
+    config_path = _config(
+        tmp_path, share,
+        packages_path=[str(local), str(share)],
+        local_packages_path=str(local),
+    )
+    index_root = str(tmp_path / "index")
+
+    overlay = write_index_config(index_root, config_path)
+
+    content = open(overlay).read()
+    assert f"packages_path = [{str(local)!r}, 'hbay_index@{share}']" in content
+    assert package_index.PLUGIN_PATH in content
+    assert repr(get_index_folder(index_root, str(share))) in content
+    # The overlay maps back to the same locations, the tray refreshes them
+    # from the combined REZ_CONFIG_FILE
+    combined = os.pathsep.join([config_path, overlay])
+    assert get_index_locations(combined) == [str(share)]
+    assert write_index_config(index_root, combined) == overlay
+    assert open(overlay).read() == content
+
+
+def test_refresh_skips_unreachable(tmp_path, share):
+    results = refresh_package_indexes(
+        [str(share), str(tmp_path / "missing")], str(tmp_path / "index"))
+
+    assert list(results) == [str(share)]
+
+
+_REZ_SCRIPT = textwrap.dedent("""
+    import json
+    import os
+    import sys
+
+    share = sys.argv[1]
+    listings = []
+
+    def audit(event, args):
+        if event in ("os.listdir", "os.scandir") and args and \\
+                str(args[0]).startswith(share):
+            listings.append(str(args[0]))
+
+    sys.addaudithook(audit)
+
+    from rez.resolved_context import ResolvedContext
+
+    context = ResolvedContext(["bar"])
+    print(json.dumps({
+        "status": context.status.name,
+        "packages": [v.qualified_package_name for v in context.resolved_packages],
+        "roots": [v.root for v in context.resolved_packages],
+        "listings": len(listings),
+    }))
+""")
+
+
+def _resolve(rez_python, config, share):
+    result = subprocess.run(
+        [rez_python, "-c", _REZ_SCRIPT, str(share)],
+        env=dict(os.environ, REZ_CONFIG_FILE=config),
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.skipif(
+    not os.environ.get("HBAY_REZ_PYTHON"),
+    reason="Set HBAY_REZ_PYTHON to a python that can import rez",
+)
+def test_rez_resolves_from_index(tmp_path, share):
+    rez_python = os.environ["HBAY_REZ_PYTHON"]
+    config_path = _config(tmp_path, share)
+    index_root = str(tmp_path / "index")
+    refresh_package_indexes([str(share)], index_root)
+    overlay = write_index_config(index_root, config_path)
+    indexed_config = os.pathsep.join([config_path, overlay])
+
+    plain = _resolve(rez_python, config_path, share)
+    indexed = _resolve(rez_python, indexed_config, share)
+
+    assert indexed["status"] == plain["status"] == "solved"
+    assert indexed["packages"] == plain["packages"] == ["foo-1.1.0", "bar-2.0"]
+    # Payloads stay on the share
+    assert indexed["roots"] == plain["roots"]
+    assert indexed["listings"] == 0 < plain["listings"]
+
+    # Released after the refresh, found through the changed family folder
+    _release(share, "foo", "1.2.0")
+    assert _resolve(rez_python, indexed_config, share)["packages"] == [
+        "foo-1.2.0", "bar-2.0"]
@@ -0,0 +1,161 @@
+"""Package payload cache usage log, LRU ledger and rez package cache sync.
+
+With `HBAY_REZ_PYTHON` pointing to a python that can import rez, hot
+variants are copied to a rez package cache and launches use the copies.
+"""
+import json
+import os
+import subprocess
+
+import pytest
+from hbay_rez_manager import payload_cache
+from hbay_rez_manager.payload_cache import (
+    get_packages_cache_path,
+    get_usage_path,
+    sync_payload_cache,
+    write_cache_config,
+)
+from hbay_rez_manager.resolve_helper import RESOLVE_SCRIPT
+from hbay_rez_manager.rez_config_helper import manage_rez_config_from_settings
+from hbay_rez_manager.scripts import payload_ledger
+
+FOO = {"name": "foo", "version": "1.0"}
+BAR = {"name": "bar", "version": "2.0"}
+
+
+def test_usage_counts_recent_launches(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+    payload_ledger.record_usage(path, [FOO, BAR])
+    payload_ledger.record_usage(path, [FOO])
+    with open(path, "a") as f:
+        f.write(json.dumps({"time": 0, "variants": [BAR]}) + "\n")
+        f.write('{"time": 1, "vari')
+
+    usage = payload_ledger.load_usage(path, 3600)
+
+    assert usage[payload_ledger.get_ledger_key(FOO)]["count"] == 2
+    assert usage[payload_ledger.get_ledger_key(BAR)]["count"] == 1
+    hot = payload_ledger.select_hot(usage, 2)
+    assert [item["handle"] for item in hot] == [FOO]
+
+    payload_ledger.compact_usage(path, 3600)
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+    assert payload_ledger.load_usage(path, 3600) == usage
+
+
+def test_evicts_least_recently_used():
+    ledger = {
+        "old": {"size": 40, "last_used": 1},
+        "new": {"size": 40, "last_used": 3},
+        "mid": {"size": 40, "last_used": 2},
+    }
+
+    assert payload_ledger.select_evictions(ledger, 120) == []
+    assert payload_ledger.select_evictions(ledger, 100) == ["old"]
+    assert payload_ledger.select_evictions(ledger, 40) == ["old", "mid"]
+    assert payload_ledger.select_evictions(ledger, 0) == [
+        "old", "mid", "new"]
+
+
+def test_config_overlays(tmp_path):
+    config_path = tmp_path / "rezconfig.py"
+    config_path.write_text(f"packages_path = [{str(tmp_path / 'share')!r}]\n")
+    rez_root = str(tmp_path / "root")
+    settings = {
+        "config_type": "config_envvar",
+        "config_envvar": str(config_path),
+    }
+
+    assert manage_rez_config_from_settings(settings, rez_root) == str(
+        config_path)
+
+    settings["package_cache_enabled"] = True
+    paths = manage_rez_config_from_settings(settings, rez_root).split(
+        os.pathsep)
+    cache_root = payload_cache.get_payload_cache_root(rez_root)
+    assert paths == [str(config_path), write_cache_config(cache_root)]
+    content = open(paths[1]).read()
+    assert repr(get_packages_cache_path(cache_root)) in content
+    assert "write_package_cache = False" in content
+    assert os.path.isdir(get_packages_cache_path(cache_root))
+
+    settings["package_index_enabled"] = True
+    paths = manage_rez_config_from_settings(settings, rez_root).split(
+        os.pathsep)
+    assert len(paths) == 3
+    assert "hbay_index@" in open(paths[1]).read()
+
+
+def _release(share, version, name="foo", cachable=True):
+    folder = share / name / version
+    (folder / "python").mkdir(parents=True)
+    (folder / "python" / f"{name}.py").write_text(f"print({name!r})\n")
+    (folder / "package.py").write_text(
+        f"name = {name!r}\nversion = {version!r}\ncachable = {cachable!r}\n"
+        "def commands():\n    env.PYTHONPATH.append('{root}/python')\n")
+
+
+def _launch(rez_python, env, usage_path=None, name="foo"):
+    """Root of a package in a launch through the resolve script."""
+    args = [rez_python, RESOLVE_SCRIPT]
+    if usage_path:
+        args += ["--usage-log", usage_path]
+    result = subprocess.run(
+        args + [name], env=env, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)[f"REZ_{name.upper()}_ROOT"]
+
+
+@pytest.mark.skipif(
+    not os.environ.get("HBAY_REZ_PYTHON"),
+    reason="Set HBAY_REZ_PYTHON to a python that can import rez",
+)
+def test_hot_packages_launch_from_cache(tmp_path, monkeypatch):
+    rez_python = os.environ["HBAY_REZ_PYTHON"]
+    share = tmp_path / "share"
+    _release(share, "1.0")
+    _release(share, "1.0", name="bar", cachable=False)
+    config_path = tmp_path / "rezconfig.py"
+    # The share is a network mount in production, here it's on the same
+    # disk and below the temp folder rez treats as a test repository
+    rez_tmp = tmp_path / "rez_tmp"
+    rez_tmp.mkdir()
+    config_path.write_text(
+        f"packages_path = [{str(share)!r}]\n"
+        "package_cache_same_device = True\n"
+        f"tmpdir = {str(rez_tmp)!r}\n"
+    )
+    cache_root = str(tmp_path / "payload_cache")
+    env = dict(os.environ, REZ_CONFIG_FILE=os.pathsep.join(
+        [str(config_path), write_cache_config(cache_root)]))
+    # Run the sync script with the test's rez python instead of `rez python`
+    monkeypatch.setattr(
+        payload_cache, "get_script_command",
+        lambda script, args: [rez_python, script] + list(args),
+    )
+    usage_path = get_usage_path(cache_root)
+    for _ in range(2):
+        share_root = _launch(rez_python, env, usage_path)
+        _launch(rez_python, env, usage_path, name="bar")
+    assert share_root.startswith(str(share))
+
+    report = sync_payload_cache(cache_root, 1.0, 2, env=env)
+
+    # bar isn't cachable, it keeps running from the share
+    assert report["added"] == 1 and report["skipped"] == 1
+    assert _launch(rez_python, env, name="bar").startswith(str(share))
+    assert report["size"] > 0
+    cached_root = _launch(rez_python, env)
+    assert cached_root.startswith(get_packages_cache_path(cache_root))
+    assert os.path.isfile(os.path.join(cached_root, "python", "foo.py"))
+
+    # Re-released package definition, the copy is replaced
+    package_file = share / "foo" / "1.0" / "package.py"
+    package_file.write_text(package_file.read_text() + "# re-released\n")
+    report = sync_payload_cache(cache_root, 1.0, 2, env=env)
+    assert report["updated"] == 1 and report["added"] == 1
+
+    # Above the size limit the least recently used variant is evicted
+    report = sync_payload_cache(cache_root, 0.0, 2, env=env)
+    assert report["evicted"] == 1 and report["size"] == 0
+    assert _launch(rez_python, env).startswith(str(share))
@@ -0,0 +1,167 @@
+import json
+import os
+import subprocess
+import time
+
+import pytest
+from hbay_rez_manager.pre_resolve import collect_rez_requests
+from hbay_rez_manager.resolve_helper import (
+    RESOLVE_SCRIPT,
+    get_context_cache_path,
+    get_fail_graph_file,
+    get_request_key,
+    load_failure,
+)
+
+
+def _env(value):
+    return json.dumps({"AYON_REZ_PACKAGES": value})
+
+
+def test_collect_rez_requests_variants_and_tools():
+    sep = os.pathsep
+    settings = {
+        "applications": {
+            "maya": {
+                "enabled": True,
+                "environment": _env(f"maya_tools{sep}usd"),
+                "variants": [
+                    {"name": "2024", "environment": _env(
+                        f"maya-2024{sep}{{AYON_REZ_PACKAGES}}")},
+                    {"name": "2025", "environment": "{}"},
+                ],
+            },
+            "nuke": {
+                "enabled": False,
+                "environment": _env("nuke"),
+                "variants": [{"name": "15", "environment": "{}"}],
+            },
+            "additional_apps": [
+                {
+                    "name": "tool_app",
+                    "environment": "{}",
+                    "variants": [{"name": "1", "environment": _env(
+                        {"linux": "app-1", "windows": "app-1",
+                         "darwin": "app-1"})}],
+                },
+            ],
+        },
+        "tool_groups": [
+            {"name": "qt", "environment": _env(["qtpy", ""]),
+             "variants": []},
+            # duplicate request is only resolved once
+            {"name": "usd", "environment": _env(f"maya_tools{sep}usd"),
+             "variants": []},
+        ],
+    }
+
+    assert collect_rez_requests(settings, env={}) == [
+        (["maya-2024", "maya_tools", "usd"], {}),
+        (["maya_tools", "usd"], {}),
+        (["app-1"], {}),
+        (["qtpy"], {}),
+    ]
+
+
+def test_collect_rez_requests_resolve_env():
+    sep = os.pathsep
+    group_env = {"AYON_REZ_PACKAGES": "maya", "REZ_PACKAGE_FILTER": "beta"}
+    settings = {"applications": {"maya": {
+        "environment": json.dumps(group_env),
+        "variants": [
+            {"name": "2024", "environment": "{}"},
+            {"name": "2025", "environment": json.dumps({
+                "REZ_PACKAGES_PATH": f"/app{sep}{{REZ_PACKAGES_PATH}}"})},
+        ],
+    }}}
+    tray_env = {"REZ_PACKAGES_PATH": "/share", "OTHER": "1"}
+
+    requests = collect_rez_requests(settings, env=tray_env)
+
+    assert requests == [
+        (["maya"], {"REZ_PACKAGES_PATH": "/share",
+                    "REZ_PACKAGE_FILTER": "beta"}),
+        (["maya"], {"REZ_PACKAGES_PATH": f"/app{sep}/share",
+                    "REZ_PACKAGE_FILTER": "beta"}),
+    ]
+    # Same key as the launch hook computes from the launch environment
+    launch_env = dict(tray_env, **group_env, REZ_ALL_PARENT_VARIABLES="1")
+    launch_env["REZ_PACKAGES_PATH"] = f"/app{sep}/share"
+    packages, resolve_env = requests[1]
+    assert get_request_key(packages, dict(tray_env, **resolve_env)) == (
+        get_request_key(["maya"], launch_env))
+
+
+def test_request_key_depends_on_config(tmp_path):
+    config = tmp_path / "rezconfig.py"
+    config.write_text("packages_path = []\n")
+    env = {"REZ_CONFIG_FILE": str(config)}
+    key = get_request_key(["usd"], env)
+
+    assert key == get_request_key(["usd"], dict(env, OTHER="1"))
+    assert key != get_request_key(["usd", "qtpy"], env)
+    config.write_text("packages_path = ['/other']\n")
+    assert key != get_request_key(["usd"], env)
+
+
+def test_failure_cache(tmp_path):
+    failure_path = tmp_path / "failures" / "key.json"
+    graph_path = failure_path.with_suffix(".dot")
+    failure_path.parent.mkdir()
+    graph_path.write_text("digraph g {}")
+    failure_path.write_text(json.dumps(
+        {"packages": ["bad"], "summary": "conflict", "graph": str(graph_path)}
+    ))
+
+    failure = load_failure(str(failure_path), 60)
+    assert failure["summary"] == "conflict"
+    assert get_fail_graph_file(failure) == str(graph_path)
+    failure_path.with_suffix(".svg").write_text("<svg/>")
+    assert get_fail_graph_file(failure) == str(failure_path.with_suffix(".svg"))
+
+    old = time.time() - 120
+    os.utime(failure_path, (old, old))
+    assert load_failure(str(failure_path), 60) is None
+    assert load_failure(str(tmp_path / "missing.json"), 60) is None
+
+
+def _release(share, version):
+    folder = share / "foo" / version
+    folder.mkdir(parents=True)
+    (folder / "package.py").write_text(
+        f"name = 'foo'\nversion = {version!r}\n"
+        f"def commands():\n    env.FOO_VERSION = {version!r}\n")
+
+
+@pytest.mark.skipif(
+    not os.environ.get("HBAY_REZ_PYTHON"),
+    reason="Set HBAY_REZ_PYTHON to a python that can import rez",
+)
+def test_release_outdates_cached_context(tmp_path):
+    share = tmp_path / "share"
+    _release(share, "1.0")
+    config_path = tmp_path / "rezconfig.py"
+    config_path.write_text(f"packages_path = [{str(share)!r}]\n")
+    env = dict(os.environ, REZ_CONFIG_FILE=str(config_path))
+    cache_path = get_context_cache_path(
+        str(tmp_path), get_request_key(["foo"], env))
+
+    def launch():
+        result = subprocess.run(
+            [os.environ["HBAY_REZ_PYTHON"], RESOLVE_SCRIPT,
+             "--context-cache", cache_path, "--max-age", "3600", "foo"],
+            env=env, check=True, capture_output=True, text=True,
+        )
+        return json.loads(result.stdout)["FOO_VERSION"]
+
+    # Contexts are timestamped in whole seconds
+    old = time.time() - 10
+    os.utime(share / "foo", (old, old))
+    assert launch() == "1.0"
+    os.utime(cache_path, (old, old))
+    assert launch() == "1.0"
+    assert os.path.getmtime(cache_path) == old
+
+    _release(share, "1.1")
+    assert launch() == "1.1"
+    assert os.path.getmtime(cache_path) > old
@@ -0,0 +1,125 @@
+"""Benchmark RezInstaller phases against a local HTTP stand-in server.
+
+Synthetic python-build-standalone, Rez and Graphviz archives are served
+from a local `http.server` (see `conftest`), so nothing leaves the
+machine. Every phase of
+`RezInstaller.run` is timed and compared against a time budget, a phase
+exceeding its budget fails the test.
+
+Budgets can be scaled for slower CI machines with
+`HBAY_REZ_BENCH_TOLERANCE` (default 1.0). Results are added to the junit
+report via `record_property` and written as JSON to
+`HBAY_REZ_BENCH_OUTPUT` if set.
+"""
+import functools
+import json
+import logging
+import os
+import platform
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+# Maximum seconds per phase on a regular CI runner
+PHASE_BUDGETS = {
+    "resolve": 2.0,
+    "download": 5.0,
+    "extract": 5.0,
+    "install": 10.0,
+    "pip": 5.0,
+    "graphviz": 5.0,
+}
+
+pytestmark = pytest.mark.skipif(
+    platform.system() != "Linux",
+    reason="Installer benchmark runs on Linux only",
+)
+
+
+def _timed(timings: dict, phase: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[phase] = (
+                timings.get(phase, 0.0) + time.perf_counter() - start)
+    return wrapper
+
+
+def _write_results(results: dict) -> None:
+    output = os.environ.get("HBAY_REZ_BENCH_OUTPUT")
+    if output:
+        Path(output).write_text(json.dumps(results, indent=4))
+
+
+def test_rez_installer_phase_benchmark(
+        local_urls, make_installer, tmp_path, monkeypatch, record_property):
+    """Time every installer phase and fail if one exceeds its budget."""
+    logging.basicConfig(level=logging.INFO)
+    installer = make_installer(tmp_path / "rez root")
+
+    timings: dict[str, float] = {}
+    downloaded = {"bytes": 0}
+    urlretrieve = urllib.request.urlretrieve
+
+    def counting_urlretrieve(url, filename, *args, **kwargs):
+        result = urlretrieve(url, filename, *args, **kwargs)
+        downloaded["bytes"] += os.path.getsize(filename)
+        return result
+
+    monkeypatch.setattr(
+        urllib.request, "urlretrieve",
+        _timed(timings, "download", counting_urlretrieve))
+    for phase, attr in (
+        ("resolve", "_resolve_python_build_standalone_url"),
+        ("extract", "_extract_archive"),
+        ("install", "install_rez"),
+        ("pip", "get_additional_packages"),
+        ("graphviz", "get_graphviz"),
+    ):
+        monkeypatch.setattr(
+            installer, attr, _timed(timings, phase, getattr(installer, attr)))
+
+    start = time.perf_counter()
+    installer.run()
+    total = time.perf_counter() - start
+    assert installer.check_if_installed() is True
+    assert "phase.python" in installer.installed["timings"]
+
+    # graphviz is only installed on windows, the phase is still timed
+    timings.setdefault("graphviz", 0.0)
+    results = {
+        "total_seconds": total,
+        "phases": timings,
+        "download_mb_per_s": (
+            downloaded["bytes"] / (1024 * 1024) / timings["download"]),
+        "extract_files_per_s": (
+            local_urls["python"]["files"] / timings["extract"]),
+    }
+    for key, value in results.items():
+        record_property(key, value)
+    _write_results(results)
+    logging.getLogger(__name__).info(
+        "Installer benchmark: %s", json.dumps(results, indent=4))
+
+    tolerance = float(os.environ.get("HBAY_REZ_BENCH_TOLERANCE", "1.0"))
+    slow_phases = {
+        phase: round(timings[phase], 3)
+        for phase, budget in PHASE_BUDGETS.items()
+        if timings[phase] > budget * tolerance
+    }
+    assert not slow_phases, f"Phases exceeded their budget: {slow_phases}"
+
+
+def test_rez_installer_check_only_is_fast(
+        local_urls, make_installer, tmp_path):
+    """Second installer on an installed root only reads the manifest."""
+    make_installer(tmp_path).run()
+
+    start = time.perf_counter()
+    assert make_installer(tmp_path).check_if_installed() is True
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,125 @@
+"""Settings change detection of the tray."""
+import pytest
+from hbay_rez_manager.settings_watcher import SettingsWatcher, diff_settings
+
+SETTINGS = {
+    "rez_install_options": {"rez_version": "3.3.0", "graphviz_version": "14.1.1"},
+    "rez_config_options": {"config_type": "config_web", "config_web": "{}"},
+    "rez_launch_options": {"env_transport": "marshal"},
+}
+
+
+def _changed(section, **values):
+    settings = {key: dict(value) for key, value in SETTINGS.items()}
+    settings[section].update(values)
+    return settings
+
+
+def test_diff_settings():
+    assert diff_settings(SETTINGS, SETTINGS) == {}
+    # launch options are read per launch, they are not watched
+    assert diff_settings(
+        SETTINGS, _changed("rez_launch_options", env_transport="json")) == {}
+    assert diff_settings(
+        SETTINGS, _changed("rez_install_options", rez_version="3.4.0")
+    ) == {"rez_install_options": ["rez_version"]}
+    assert diff_settings({}, SETTINGS) == {
+        "rez_config_options": ["config_type", "config_web"],
+        "rez_install_options": ["graphviz_version", "rez_version"],
+    }
+
+
+def test_watcher_fetches_only_on_events():
+    server = {"settings": SETTINGS, "events": [], "fetches": 0}
+    calls = []
+
+    def get_settings():
+        server["fetches"] += 1
+        return server["settings"]
+
+    def get_events(newer_than):
+        return [e for e in server["events"] if e["createdAt"] > newer_than]
+
+    watcher = SettingsWatcher(
+        "hbay_rez_manager", "1.0.0", SETTINGS,
+        lambda settings, changes: calls.append(changes),
+        get_settings=get_settings, get_events=get_events,
+    )
+    assert watcher.check() == {}
+    assert server["fetches"] == 0
+
+    server["settings"] = _changed("rez_config_options", config_web='{"a": 1}')
+    server["events"] = [
+        {"createdAt": "9999-01-01T00:00:00+00:00",
+         "summary": {"addon_name": "other_addon"}},
+    ]
+    assert watcher.check() == {}
+    assert server["fetches"] == 0
+
+    server["events"].append(
+        {"createdAt": "9999-01-01T00:00:01+00:00",
+         "summary": {"addon_name": "hbay_rez_manager"}})
+    assert watcher.check() == {"rez_config_options": ["config_web"]}
+    assert calls == [{"rez_config_options": ["config_web"]}]
+    # the event is only handled once
+    assert watcher.check() == {}
+    assert server["fetches"] == 1
+
+
+def test_watcher_falls_back_to_comparing():
+    server = {"settings": SETTINGS}
+    calls = []
+
+    def get_events(newer_than):
+        raise AttributeError("no events query")
+
+    watcher = SettingsWatcher(
+        "hbay_rez_manager", "1.0.0", SETTINGS,
+        lambda settings, changes: calls.append(settings),
+        get_settings=lambda: server["settings"], get_events=get_events,
+    )
+    assert watcher.check() == {}
+    server["settings"] = _changed("rez_install_options", rez_version="3.4.0")
+    assert watcher.check() == {"rez_install_options": ["rez_version"]}
+    assert calls == [server["settings"]]
+    assert watcher.settings is server["settings"]
+
+
+def test_watcher_retries_failures():
+    server = {"settings": SETTINGS, "events": [], "fail": "events"}
+    calls = []
+
+    def get_events(newer_than):
+        if server["fail"] == "events":
+            raise ConnectionError("server restarting")
+        return [e for e in server["events"] if e["createdAt"] > newer_than]
+
+    def on_change(settings, changes):
+        calls.append(changes)
+        if server["fail"] == "install":
+            raise RuntimeError("install failed")
+
+    watcher = SettingsWatcher(
+        "hbay_rez_manager", "1.0.0", SETTINGS, on_change,
+        get_settings=lambda: server["settings"], get_events=get_events,
+    )
+    # A failed query doesn't disable the events
+    with pytest.raises(ConnectionError):
+        watcher.check()
+    server["fail"] = "install"
+    assert watcher.check() == {}
+
+    # A failed install is applied again without a new event
+    server["settings"] = _changed("rez_install_options", rez_version="3.4.0")
+    server["events"] = [
+        {"createdAt": "9999-01-01T00:00:00+00:00",
+         "summary": {"addon_name": "hbay_rez_manager"}},
+    ]
+    with pytest.raises(RuntimeError):
+        watcher.check()
+    assert watcher.settings is SETTINGS
+    server["fail"] = None
+    assert watcher.check() == {"rez_install_options": ["rez_version"]}
+    assert len(calls) == 2
+    assert watcher.settings is server["settings"]
+    assert watcher.check() == {}
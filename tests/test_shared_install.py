@@ -0,0 +1,59 @@
+"""Shared install root with install lock and local overlay."""
+import os
+import platform
+import threading
+import time
+
+import pytest
+from hbay_rez_manager.shared_install import sync_local_overlay
+
+
+@pytest.mark.skipif(
+    platform.system() != "Linux", reason="Installs run on Linux only")
+def test_shared_install_once(local_urls, make_installer, tmp_path):
+    """Concurrent hosts on the same share install only once."""
+    shared_root = tmp_path / "share"
+    installers = [make_installer(shared_root, shared=True) for _ in range(3)]
+    runs = []
+    for installer in installers:
+        installer._run = _counting(installer._run, runs)
+
+    threads = [threading.Thread(target=i.run) for i in installers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert make_installer(shared_root).check_if_installed()
+    assert not (shared_root / ".install.lock").exists()
+
+
+@pytest.mark.skipif(
+    platform.system() != "Linux", reason="Installs run on Linux only")
+def test_local_overlay(local_urls, make_installer, tmp_path):
+    shared_root = tmp_path / "share"
+    installer = make_installer(shared_root, shared=True)
+    installer.run()
+    script = os.path.join(installer.rez_path_folder, "rez-env")
+    with open(script, "w") as f:
+        f.write(f"#!{installer.rez_folder}/bin/python\n")
+
+    overlay_root = tmp_path / "local"
+    rez_path = sync_local_overlay(installer, str(overlay_root))
+    assert rez_path.startswith(str(overlay_root))
+    with open(os.path.join(rez_path, "rez-env")) as f:
+        assert f.read().startswith(f"#!{overlay_root}")
+
+    # second sync only checks the overlay manifest
+    os.remove(os.path.join(rez_path, "rez-env"))
+    assert sync_local_overlay(installer, str(overlay_root)) == rez_path
+    assert not os.path.exists(os.path.join(rez_path, "rez-env"))
+
+
+def _counting(func, calls):
+    def wrapper():
+        calls.append(1)
+        time.sleep(0.2)
+        return func()
+    return wrapper
@@ -0,0 +1,95 @@
+"""Bundles are staged in a new folder and activated through the manifest."""
+import os
+import platform
+import stat
+
+import pytest
+
+from conftest import DEPENDENCIES, REZ_UPDATE_VERSION, REZ_VERSION
+
+pytestmark = pytest.mark.skipif(
+    platform.system() != "Linux", reason="Installs run on Linux only")
+
+
+def test_update_keeps_previous_bundle(local_urls, make_installer, tmp_path):
+    first = make_installer(tmp_path)
+    first.run()
+    first_folder = first.rez_folder
+    assert first.installed["bytecode"]["errors"] is False
+
+    # dependency change builds a new bundle, the old one stays live until
+    # the new one is activated
+    second = make_installer(tmp_path, DEPENDENCIES + ["six==1.17.0"])
+    assert second.rez_folder == first_folder
+    assert not second.check_if_installed()
+    umask = os.umask(0o022)
+    try:
+        second.run()
+    finally:
+        os.umask(umask)
+    assert second.rez_folder != first_folder
+    # Usable by all users of a shared install root
+    assert stat.S_IMODE(os.stat(second.rez_folder).st_mode) == 0o755
+    assert os.path.isdir(first_folder)
+    assert make_installer(
+        tmp_path, DEPENDENCIES + ["six==1.17.0"]).check_if_installed()
+
+    assert second.rollback() is True
+    assert second.rez_folder == first_folder
+    assert make_installer(tmp_path).check_if_installed()
+
+
+def test_rollback_rez_update(local_urls, make_installer, tmp_path):
+    first = make_installer(tmp_path)
+    first.run()
+    first_folder = first.rez_folder
+
+    update = make_installer(tmp_path, rez_version=REZ_UPDATE_VERSION)
+    assert not update.check_if_installed()
+    update.run()
+    update_folder = update.rez_folder
+    assert update_folder != first_folder
+
+    assert update.rollback() is True
+    assert update.rez_folder == first_folder
+    assert update.rez_version == REZ_VERSION
+    # Unchanged settings keep the rolled back bundle
+    check = make_installer(tmp_path, rez_version=REZ_UPDATE_VERSION)
+    assert check.check_if_installed()
+    assert check.rez_folder == first_folder
+
+    # Rolling back again returns to the update
+    assert check.rollback() is True
+    assert check.rez_folder == update_folder
+    assert check.rollback() is True
+
+    # A settings change ends the rollback
+    changed = make_installer(
+        tmp_path, DEPENDENCIES + ["six==1.17.0"], REZ_UPDATE_VERSION)
+    assert changed.rez_version == REZ_UPDATE_VERSION
+    assert not changed.check_if_installed()
+    changed.run()
+    assert changed.check_if_installed()
+    assert changed.rollback() is True
+    assert changed.rez_folder == first_folder
+
+
+def test_failed_install_leaves_live_bundle(
+        local_urls, make_installer, tmp_path, monkeypatch):
+    first = make_installer(tmp_path)
+    first.run()
+    live_folder = first.rez_folder
+
+    second = make_installer(tmp_path, DEPENDENCIES + ["six==1.17.0"])
+
+    def fail(*args):
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(second, "get_graphviz", fail)
+    with pytest.raises(RuntimeError):
+        second.run()
+
+    assert second.rez_folder == live_folder
+    assert sorted(os.listdir(second.rez_source_folder)) == [
+        os.path.basename(live_folder)]
+    assert make_installer(tmp_path).check_if_installed()
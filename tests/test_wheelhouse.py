@@ -0,0 +1,99 @@
+"""Wheelhouse prefetch, hash index and reuse of complete sets."""
+import os
+import subprocess
+import zipfile
+
+import pytest
+from hbay_rez_manager import wheelhouse
+from hbay_rez_manager.wheelhouse import Wheelhouse
+
+TARGET = "x86_64-unknown-linux-gnu"
+
+
+def _create_wheel(folder, name="demo_pkg", version="1.0"):
+    """Minimal pure python wheel pip accepts."""
+    dist_info = f"{name}-{version}.dist-info"
+    path = folder / f"{name}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(path, "w") as zipf:
+        zipf.writestr(f"{name}/__init__.py", "")
+        zipf.writestr(
+            f"{dist_info}/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+        zipf.writestr(
+            f"{dist_info}/WHEEL",
+            "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\n"
+            "Tag: py3-none-any\n")
+        zipf.writestr(f"{dist_info}/RECORD", "")
+    return path
+
+
+@pytest.fixture
+def local_index(tmp_path):
+    """pip environment that only sees a local folder of wheels."""
+    links = tmp_path / "links"
+    links.mkdir()
+    _create_wheel(links)
+    env = dict(os.environ, PIP_NO_INDEX="1", PIP_FIND_LINKS=str(links))
+    return env
+
+
+def test_prefetch_and_reuse(tmp_path, local_index, monkeypatch):
+    house = Wheelhouse(str(tmp_path / "wheelhouse"))
+    assert house.get_wheels(["demo_pkg==1.0"], "3.13.11", TARGET) is None
+
+    wheels = house.prefetch(
+        ["demo_pkg==1.0"], "3.13.11", TARGET, env=local_index)
+    assert [os.path.basename(w) for w in wheels] == [
+        "demo_pkg-1.0-py3-none-any.whl"]
+    index = house.load_index()
+    assert len(index["files"]["demo_pkg-1.0-py3-none-any.whl"][2]) == 64
+    assert house.get_wheels(["demo_pkg==1.0"], "3.13.11", TARGET) == wheels
+
+    # complete sets don't run pip again
+    def no_pip(*args, **kwargs):
+        raise AssertionError("pip should not run")
+
+    monkeypatch.setattr(wheelhouse.subprocess, "run", no_pip)
+    assert house.prefetch(
+        ["demo_pkg==1.0"], "3.13.11", TARGET, env=local_index) == wheels
+
+
+def test_changed_wheel_is_replaced(tmp_path, local_index):
+    house = Wheelhouse(str(tmp_path / "wheelhouse"))
+    wheel, = house.prefetch(
+        ["demo_pkg==1.0"], "3.13.11", TARGET, env=local_index)
+
+    size = os.path.getsize(wheel)
+    with open(wheel, "r+b") as f:
+        f.truncate(size // 2)
+    assert house.get_wheels(["demo_pkg==1.0"], "3.13.11", TARGET) is None
+    # leftover of an interrupted download
+    (tmp_path / "wheelhouse" / "partial-1.0-py3-none-any.whl").write_bytes(b"x")
+
+    assert house.prefetch(
+        ["demo_pkg==1.0"], "3.13.11", TARGET, env=local_index) == [wheel]
+    assert os.path.getsize(wheel) == size
+    assert not (tmp_path / "wheelhouse" / "partial-1.0-py3-none-any.whl").exists()
+
+
+def test_prefetch_failure(tmp_path, local_index):
+    house = Wheelhouse(str(tmp_path / "wheelhouse"))
+    with pytest.raises(subprocess.CalledProcessError):
+        house.prefetch(["missing_pkg==1.0"], "3.13.11", TARGET, env=local_index)
+    assert house.get_wheels(["missing_pkg==1.0"], "3.13.11", TARGET) is None
+
+
+def test_installer_uses_wheelhouse(tmp_path, local_index, monkeypatch):
+    from hbay_rez_manager.rez_installer import RezInstaller
+
+    for key in ("PIP_NO_INDEX", "PIP_FIND_LINKS"):
+        monkeypatch.setenv(key, local_index[key])
+    installer = RezInstaller(
+        str(tmp_path / "root"), "3.3.0", "3.13.11", "", ["demo_pkg==1.0"],
+        use_wheelhouse=True,
+    )
+    assert installer.prefetch_wheels() is True
+    cmd = installer._get_pip_command("demo_pkg==1.0")
+    assert cmd[-3:] == ["--no-index", "--find-links", installer.wheelhouse.root]
+    assert installer._get_install_env()["PIP_CACHE_DIR"].startswith(
+        installer.root_folder)